@@ -1,6 +1,11 @@
 import os
+import sys
+import json
 import time
+import random
 import argparse
+import itertools
+from functools import lru_cache
 try:
     from termcolor import cprint
 except Exception:
@@ -10,6 +15,7 @@ except Exception:
 from config import (
     get_balance,
     set_balance,
+    record_balance,
     get_lang,
     set_lang,
     get_fast,
@@ -18,28 +24,57 @@ from config import (
     set_horses,
     get_seed,
     set_seed,
+    get_fps,
+    set_fps,
+    get_instant,
+    set_instant,
+    get_turbo,
+    set_turbo,
+    get_history,
+    set_history,
+    flush,
     CONFIG_FILE,
 )
 from i18n import TRANSLATIONS, translator
-from utils import clear_screen, input_entero, fzf_available, fzf_select
-from game import animacion, build_race, compute_decimal_odds
+from utils import clear_screen, input_entero, menu_available, menu_select
+from game import RaceEngine, animacion, build_race, compute_decimal_odds, payout
+from simulate import simulate_races, print_summary
+from store import HistoryStore
 
 
-N_HORSES = get_horses(5)
+def _id_sesion():
+    """Tags ledger rounds so stakes and payouts from different sessions never mix."""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
 
 
-def cargar_idioma():
+_session_ids = itertools.count(1)
+
+
+@lru_cache(maxsize=None)
+def traductor(lang):
+    """Shared translator per language, so sessions do not each hold one."""
+    return translator(lang)
+
+
+def cargar_idioma(preguntar=True, salida=None):
+    """The configured language, asking for it the first time if ``preguntar``.
+
+    With ``salida`` (stderr under JSON Lines) the question is written there
+    and read as a plain line, never through the full-screen selector.
+    """
     try:
         lang = get_lang()
         if lang in TRANSLATIONS:
             return lang
     except Exception:
         pass
+    if not preguntar:
+        return "es"
     # Ask the user if not set or invalid
     while True:
         try:
-            if fzf_available():
-                choice = fzf_select(["English", "Español"], "Language")
+            if salida is None and menu_available():
+                choice = menu_select(["English", "Español"], "Language", hotkeys=["1", "2"])
                 if choice == "English":
                     lang = "en"
                 elif choice == "Español":
@@ -48,7 +83,13 @@ def cargar_idioma():
                     continue
             else:
                 # Default to English prompt to be welcoming
-                sel = input(TRANSLATIONS["en"]["language_prompt"]).strip()
+                prompt = TRANSLATIONS["en"]["language_prompt"]
+                if salida is None:
+                    sel = input(prompt).strip()
+                else:
+                    salida.write(prompt)
+                    salida.flush()
+                    sel = input().strip()
                 if sel == "1":
                     lang = "en"
                 elif sel == "2":
@@ -68,9 +109,6 @@ def cargar_idioma():
             return "es"
 
 
-LANG = cargar_idioma()
-t = translator(LANG)
-
 
 def cargar_dinero(valor_por_defecto=5000):
     try:
@@ -84,142 +122,446 @@ def cargar_dinero(valor_por_defecto=5000):
     return valor_por_defecto
 
 
-def guardar_dinero(valor):
+def guardar_dinero(valor, delta=None, tipo=None, ronda=None):
+    """Persist the balance; stakes and payouts (``tipo``) go to the ledger.
+
+    Returns the ledger's balance after a movement, None otherwise. A stake
+    the ledger refuses raises ValueError: the round must not be played.
+    """
     try:
-        set_balance(valor)
+        if tipo is None:
+            set_balance(valor)
+        else:
+            return record_balance(delta, tipo, ronda)
+    except ValueError:
+        if tipo is not None:
+            raise
     except Exception:
         pass
+    return None
 
 
-dinero = cargar_dinero()
-FAST_MODE = get_fast(False)
-SEED = get_seed(None)
+def iniciar(preguntar=True):
+    """Load config, language and balance into the CLI's persistent Session.
 
+    Importing this module has no side effects; ``main()`` calls this first.
+    It may prompt for a language the first time unless ``preguntar`` is False.
+    """
+    lang = cargar_idioma(preguntar)
+    # A warm daemon's forked runs share one import, so each run tags its own
+    return Session(
+        dinero=cargar_dinero(), n_horses=get_horses(5), lang=lang, fast=get_fast(False),
+        seed=get_seed(None), fps=get_fps(12.5), instant=get_instant(False), turbo=get_turbo(1),
+        history=get_history(False), id=_id_sesion(), persist=True,
+    )
 
-def animar_carrera(n, cuser):
-    race = build_race(n, SEED)
-    return animacion(n, cuser, t, race_profile=race, fast=FAST_MODE)
 
+@lru_cache(maxsize=1)
+def _historial():
+    # Failures are not cached, so an unavailable store is retried next round
+    return HistoryStore()
 
-def jugar():
-    global dinero
-    global N_HORSES
-    # Build race upfront to show odds
-    race = build_race(N_HORSES, SEED)
-    odds = compute_decimal_odds(race["weights"]) if "weights" in race else []
-    while True:
-        cprint(t("title"), "light_blue")
-        try:
-            # Show odds
-            print(t("odds_header"))
-            for i in range(N_HORSES):
-                name = t("horse_name", idx=i + 1)
-                odd = odds[i] if i < len(odds) else 2.0
-                print(t("odds_line", idx=i + 1, name=name, odds=odd))
-            print()
-        except Exception:
-            pass
-        cuser = input_entero(
-            t("bet_prompt", n=N_HORSES),
-            0,
-            N_HORSES,
-            invalid_msg=t("invalid_int"),
-            min_msg=t("enter_number_min", minimo=0),
-            max_msg=t("enter_number_max", maximo=N_HORSES),
-        )
-        if cuser == 0:
-            guardar_dinero(dinero)
-            return
-        apuesta = input_entero(
-            t("how_much_to_bet", dinero=dinero),
-            1,
-            dinero,
-            invalid_msg=t("invalid_int"),
-            min_msg=t("enter_number_min", minimo=1),
-            max_msg=t("enter_number_max", maximo=dinero),
-        )
-
-        dinero -= apuesta
-        guardar_dinero(dinero)
-        # Use the prepared race for consistency with shown odds
-        ganador = animacion(N_HORSES, cuser, t, race_profile=race, fast=FAST_MODE)
+
+def abrir_historial(activo=False):
+    """Open the SQLite history on first use; None when disabled or unavailable."""
+    if not activo:
+        return None
+    try:
+        return _historial()
+    except Exception:
+        return None
+
+
+def registrar_ronda(ronda_id, perfil, ganador, caballo, apuesta, pago, jugador=None, activo=False):
+    historial = abrir_historial(activo)
+    if historial is None:
+        return
+    try:
+        historial.record_round(ronda_id, perfil, ganador, [(caballo, apuesta, pago)], player=jugador)
+    except Exception:
+        pass
+
+
+class Session:
+    """One player's state: balance, settings, translator and RNG.
+
+    The CLI's session has ``persist=True`` and saves balance and settings to
+    config; any other session lives in memory only, so one process can host
+    many independent players. ``__slots__`` keeps each one small.
+    """
+
+    __slots__ = (
+        "id", "dinero", "n_horses", "lang", "t", "fast", "seed", "fps",
+        "instant", "turbo", "history", "ronda", "persist", "salida", "_rng",
+    )
+
+    def __init__(self, dinero=5000, n_horses=5, lang="es", fast=False, seed=None, fps=12.5,
+                 instant=False, turbo=1, id=None, persist=False, rng=None, t=None, salida=None,
+                 history=False):
+        self.id = id if id is not None else f"{_id_sesion()}.{next(_session_ids)}"
+        self.dinero = dinero
+        self.n_horses = n_horses
+        self.lang = lang
+        self.t = t if t is not None else traductor(lang)
+        self.fast = fast
+        self.seed = seed
+        self.fps = fps
+        self.instant = instant
+        self.turbo = turbo
+        self.history = history
+        self.ronda = 0
+        self.persist = persist
+        self.salida = salida
+        self._rng = rng
+
+    @property
+    def consola(self):
+        """Where prompts and messages go: stderr when stdout carries JSON Lines."""
+        return None if self.salida is None else sys.stderr
+
+    def _preguntar(self, prompt):
+        if self.salida is None:
+            return input(prompt)
+        sys.stderr.write(prompt)
+        sys.stderr.flush()
+        return input()
+
+    @property
+    def rng(self):
+        """Draws race seeds for unseeded sessions; created on first use."""
+        if self._rng is None:
+            self._rng = random.Random()
+        return self._rng
+
+    def _guardar(self):
+        """Write pending config changes; the balance is already in the ledger.
+
+        ``dinero`` is never written back as an absolute balance: other
+        sessions may have moved it since this one read it.
+        """
+        if self.persist:
+            try:
+                flush()
+            except Exception:
+                pass
+
+    def _mover_saldo(self, delta, tipo, ronda):
+        """Apply a stake or payout; a persisted session goes through the ledger.
+
+        The ledger answers with the shared balance, so bets other sessions
+        settled meanwhile show up here. A stake it refuses raises ValueError.
+        """
+        if self.persist:
+            try:
+                saldo = guardar_dinero(self.dinero + delta, delta, tipo, ronda)
+            except ValueError:
+                self.refrescar_saldo()
+                raise
+            if isinstance(saldo, int):
+                self.dinero = saldo
+                return
+        self.dinero += delta
+
+    def refrescar_saldo(self):
+        """Re-read a persisted session's balance before offering a stake."""
+        if self.persist:
+            self.dinero = get_balance(self.dinero)
+
+    def cobrar(self, apuesta):
+        """Take the stake of the next round now; ``apostar(cobrada=True)`` settles it."""
+        ronda_id = f"{self.id}:{self.ronda + 1}"
+        self._mover_saldo(-apuesta, "stake", ronda_id)
+        self.ronda += 1
+        return ronda_id
+
+    def apostar(self, cuser, apuesta, race, odds, correr=None, semilla=None, pagos=None, cobrada=False):
+        """Stake, run and settle one round; return ``(ganador, ganancia)``.
+
+        ``correr(perfil)`` runs the race and returns the winner; by default
+        it is simulated without drawing anything. ``semilla`` overrides the
+        session's own race seed, e.g. for a race shared by many players.
+        ``pagos`` maps this session's id to an already settled payout, as a
+        pari-mutuel ``Pool.settle`` returns. With ``cobrada`` the stake was
+        already taken by ``cobrar``. With a ``salida`` stream the round is
+        also written there as one JSON line.
+        """
+        inicio = time.perf_counter()
+        ronda_id = f"{self.id}:{self.ronda}" if cobrada else self.cobrar(apuesta)
+        # Use the prepared race for consistency with shown odds; a seeded
+        # session replays the same sequence of races, one seed per round
+        if semilla is None and self.seed is None:
+            semilla = self.rng.getrandbits(64)
+        elif semilla is None:
+            semilla = f"{self.seed}:{self.ronda}"
+        perfil = dict(race, seed=semilla)
+        carrera = time.perf_counter()
+        if correr is None:
+            ganador = RaceEngine.from_profile(perfil, self.n_horses).run_to_completion()[0]
+        else:
+            ganador = correr(perfil)
+        carrera = time.perf_counter() - carrera
+        ganancia = 0
         if cuser == ganador:
             # Decimal odds payout: stake * (odds - 1) + stake = stake * odds
             odd = odds[cuser - 1] if cuser - 1 < len(odds) else 2.0
-            ganancia = int(round(apuesta * odd))
-            dinero += ganancia
-            guardar_dinero(dinero)
-            cprint(
-                t("you_win", ganancia=ganancia, dinero=dinero),
-                "light_green",
+            ganancia = payout(apuesta, odd) if pagos is None else pagos.get(self.id, 0)
+            self._mover_saldo(ganancia, "payout", ronda_id)
+        registrar_ronda(ronda_id, perfil, ganador, cuser, apuesta, ganancia, jugador=None if self.persist else self.id,
+                        activo=self.history)
+        if self.salida is not None:
+            self._emitir({
+                "round": ronda_id,
+                "ts": round(time.time(), 3),
+                "seed": semilla,
+                "weights": perfil.get("weights", []),
+                "odds": odds,
+                "horse": cuser,
+                "winner": ganador,
+                "stake": apuesta,
+                "payout": ganancia,
+                "balance": self.dinero,
+                "race_ms": round(carrera * 1000, 3),
+                "round_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            })
+        return ganador, ganancia
+
+    def _emitir(self, registro):
+        # The whole line goes out in one write and one flush per round
+        try:
+            self.salida.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.salida.flush()
+        except Exception:
+            pass
+
+    def animar_carrera(self, cuser, perfil=None):
+        """Animate a race with this session's settings; return the winner.
+
+        Without ``perfil`` a new race is built from the session's seed.
+        """
+        if perfil is None:
+            perfil = build_race(self.n_horses, self.seed)
+        return animacion(self.n_horses, cuser, self.t, race_profile=perfil, fast=self.fast, fps=self.fps,
+                         instant=self.instant, turbo=self.turbo)
+
+    def preparar_carrera(self):
+        """The race profile and odds a betting session plays against."""
+        race = build_race(self.n_horses, self.seed)
+        odds = compute_decimal_odds(race["weights"]) if "weights" in race else []
+        return race, odds
+
+    def jugar(self):
+        t = self.t
+        # JSON Lines output keeps stdout to the round records and the prompts
+        texto = self.salida is None
+        # Build race upfront to show odds
+        race, odds = self.preparar_carrera()
+        while True:
+            if texto:
+                cprint(t("title"), "light_blue")
+                try:
+                    # Show odds
+                    print(t("odds_header"))
+                    for i in range(self.n_horses):
+                        name = t("horse_name", idx=i + 1)
+                        odd = odds[i] if i < len(odds) else 2.0
+                        print(t("odds_line", idx=i + 1, name=name, odds=odd))
+                    print()
+                except Exception:
+                    pass
+            cuser = input_entero(
+                t("bet_prompt", n=self.n_horses),
+                0,
+                self.n_horses,
+                invalid_msg=t("invalid_int"),
+                min_msg=t("enter_number_min", minimo=0),
+                max_msg=t("enter_number_max", maximo=self.n_horses),
+                salida=self.consola,
             )
-            input(t("press_enter_continue"))
-        else:
-            cprint(
-                t("you_lose", apuesta=apuesta, dinero=dinero),
-                "light_red",
+            if cuser == 0:
+                self._guardar()
+                return
+            self.refrescar_saldo()
+            if self.dinero < 1:
+                if texto:
+                    input(t("out_of_money"))
+                self._guardar()
+                return
+            apuesta = input_entero(
+                t("how_much_to_bet", dinero=self.dinero),
+                1,
+                self.dinero,
+                invalid_msg=t("invalid_int"),
+                min_msg=t("enter_number_min", minimo=1),
+                max_msg=t("enter_number_max", maximo=self.dinero),
+                salida=self.consola,
             )
-            input(t("press_enter_continue_alt"))
-
-        if dinero == 0:
-            input(t("out_of_money"))
-            guardar_dinero(dinero)
-            return
 
-        clear_screen()
-
-
-def cambiar_idioma():
-    global LANG
-    try:
-        if fzf_available():
-            choice = fzf_select(["English", "Español"], "Language")
-            if choice == "English":
-                LANG = "en"
-            elif choice == "Español":
-                LANG = "es"
+            try:
+                if not texto:
+                    self.apostar(cuser, apuesta, race, odds)
+                    if self.dinero == 0:
+                        self._guardar()
+                        return
+                    continue
+                ganador, ganancia = self.apostar(
+                    cuser,
+                    apuesta,
+                    race,
+                    odds,
+                    lambda perfil: self.animar_carrera(cuser, perfil),
+                )
+            except ValueError:
+                # Another session spent the money between prompt and stake
+                print(t("enter_number_max", maximo=self.dinero), file=self.consola)
+                continue
+            if cuser == ganador:
+                cprint(
+                    t("you_win", ganancia=ganancia, dinero=self.dinero),
+                    "light_green",
+                )
+                input(t("press_enter_continue"))
             else:
+                cprint(
+                    t("you_lose", apuesta=apuesta, dinero=self.dinero),
+                    "light_red",
+                )
+                input(t("press_enter_continue_alt"))
+
+            if self.dinero == 0:
+                input(t("out_of_money"))
+                self._guardar()
                 return
-        else:
-            sel = input(TRANSLATIONS["en"]["language_prompt"]).strip()
-            if sel == "1":
-                LANG = "en"
-            elif sel == "2":
-                LANG = "es"
-            else:
-                if sel in ("es", "ES", "2"):
-                    LANG = "es"
-                elif sel in ("en", "EN", "1"):
-                    LANG = "en"
+
+            # Instant rounds stay on screen and skip the per-round clear subprocess
+            if not self.instant:
+                clear_screen()
+
+    def jugar_script(self, apuestas, rondas=None):
+        """Play without prompts, cycling through ``(caballo, monto)`` bets.
+
+        Settles exactly like ``jugar`` but never animates, clears the screen
+        or waits. Stakes above the balance are cut to it and play stops when
+        the money runs out. Returns a summary of the run.
+        """
+        apuestas = list(apuestas)
+        for caballo, monto in apuestas:
+            if not 1 <= caballo <= self.n_horses or monto < 1:
+                raise ValueError(f"{caballo}:{monto}")
+        if rondas is None:
+            rondas = len(apuestas)
+        race, odds = self.preparar_carrera()
+        jugadas = ganadas = apostado = pagado = 0
+        start = time.perf_counter()
+        for caballo, monto in itertools.islice(itertools.cycle(apuestas), rondas):
+            self.refrescar_saldo()
+            if self.dinero <= 0:
+                break
+            apuesta = min(monto, self.dinero)
+            try:
+                ganador, ganancia = self.apostar(caballo, apuesta, race, odds)
+            except ValueError:
+                continue
+            jugadas += 1
+            ganadas += caballo == ganador
+            apostado += apuesta
+            pagado += ganancia
+        elapsed = time.perf_counter() - start
+        self._guardar()
+        return {
+            "rounds": jugadas,
+            "wins": ganadas,
+            "staked": apostado,
+            "paid": pagado,
+            # Not the balance change: other sessions may share this balance
+            "net": pagado - apostado,
+            "balance": self.dinero,
+            "elapsed": elapsed,
+            "rounds_per_sec": jugadas / elapsed if elapsed > 0 else float("inf"),
+        }
+
+    def cambiar_idioma(self):
+        try:
+            if self.salida is None and menu_available():
+                choice = menu_select(["English", "Español"], "Language", hotkeys=["1", "2"])
+                if choice == "English":
+                    lang = "en"
+                elif choice == "Español":
+                    lang = "es"
                 else:
                     return
-        set_lang(LANG)
-        # Confirm change in the chosen language
-        msg_key = "language_changed_en" if LANG == "en" else "language_changed_es"
-        cprint(t(msg_key), "light_blue")
-        input(t("press_enter_continue"))
-    except Exception:
-        pass
+            else:
+                sel = self._preguntar(TRANSLATIONS["en"]["language_prompt"]).strip()
+                if sel == "1":
+                    lang = "en"
+                elif sel == "2":
+                    lang = "es"
+                else:
+                    if sel in ("es", "ES", "2"):
+                        lang = "es"
+                    elif sel in ("en", "EN", "1"):
+                        lang = "en"
+                    else:
+                        return
+            self.lang = lang
+            self.t = traductor(lang)
+            if self.persist:
+                set_lang(lang)
+            # Confirm change in the chosen language
+            msg_key = "language_changed_en" if lang == "en" else "language_changed_es"
+            cprint(self.t(msg_key), "light_blue", file=self.consola)
+            self._preguntar(self.t("press_enter_continue"))
+        except Exception:
+            pass
 
+    def toggle_fast(self):
+        self.fast = not self.fast
+        if self.persist:
+            set_fast(self.fast)
+        cprint(self.t("fast_on") if self.fast else self.t("fast_off"), "light_blue", file=self.consola)
+        self._preguntar(self.t("press_enter_continue"))
 
-def toggle_fast():
-    global FAST_MODE
-    FAST_MODE = not FAST_MODE
-    set_fast(FAST_MODE)
-    cprint(t("fast_on") if FAST_MODE else t("fast_off"), "light_blue")
-    input(t("press_enter_continue"))
+    def mostrar_saldo(self):
+        cprint(self.t("current_balance", dinero=self.dinero), "light_blue", file=self.consola)
+        self._preguntar(self.t("press_enter_continue"))
 
 
-def mostrar_saldo():
-    cprint(t("current_balance", dinero=dinero), "light_blue")
-    input(t("press_enter_continue"))
+def parse_apuesta(texto):
+    """Parse a ``HORSE:AMOUNT`` bet such as ``3:100``."""
+    caballo, _, monto = texto.strip().partition(":")
+    try:
+        return int(caballo), int(monto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(texto)
+
+
+def leer_estrategia(ruta):
+    """Bets from a strategy file: one ``HORSE:AMOUNT`` per line, ``#`` comments."""
+    apuestas = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.split("#", 1)[0].strip()
+            if linea:
+                try:
+                    apuestas.append(parse_apuesta(linea))
+                except argparse.ArgumentTypeError:
+                    raise ValueError(linea)
+    return apuestas
+
+
+def jugar_script(apuestas, rondas=None, sesion=None):
+    """Scripted play on ``sesion`` (default: loaded from config); prints the summary and returns it."""
+    if sesion is None:
+        sesion = iniciar(preguntar=False)
+    resumen = sesion.jugar_script(apuestas, rondas)
+    # With JSON Lines on stdout the summary goes to stderr
+    print(sesion.t("script_summary", **resumen), file=sys.stdout if sesion.salida is None else sys.stderr)
+    return resumen
 
 
 def main():
-    global dinero
-    global N_HORSES
-    global FAST_MODE
-    global SEED
+    # The first-run language prompt waits for the menu: one-shot commands
+    # (and the warm client running them) never stop at it
+    sesion = iniciar(preguntar=False)
 
     # CLI flags
     try:
@@ -230,22 +572,110 @@ def main():
         parser.add_argument("--seed")
         parser.add_argument("--config", action="store_true")
         parser.add_argument("-e", dest="edit_config", action="store_true")
+        parser.add_argument("--simulate", type=int)
+        parser.add_argument("--fps", type=float)
+        parser.add_argument("--instant", action="store_true")
+        parser.add_argument("--no-instant", action="store_true")
+        parser.add_argument("--turbo", type=int)
+        parser.add_argument("--history", action="store_true")
+        parser.add_argument("--no-history", action="store_true")
+        parser.add_argument("--roi", type=int)
+        parser.add_argument("--bet", type=parse_apuesta, action="append")
+        parser.add_argument("--strategy-file")
+        parser.add_argument("--rounds", type=int)
+        parser.add_argument("--output", choices=("text", "jsonl"))
+        parser.add_argument("--serve", action="store_true")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=7878)
+        parser.add_argument("--bet-window", type=float, default=10.0)
+        parser.add_argument("--pool", action="store_true")
+        parser.add_argument("--daemon", action="store_true")
+        parser.add_argument("--daemon-stop", action="store_true")
         args, _ = parser.parse_known_args()
 
+        # Headless bulk simulation: report and exit without changing settings
+        if args.simulate is not None and args.simulate > 0:
+            n = args.horses if args.horses and args.horses >= 2 else sesion.n_horses
+            seed = sesion.seed
+            if args.seed is not None:
+                try:
+                    seed = int(args.seed)
+                except Exception:
+                    seed = str(args.seed)
+            print_summary(simulate_races(args.simulate, n, seed), sesion.t)
+            return
+        if args.roi is not None and args.roi > 0:
+            historial = HistoryStore()
+            print(sesion.t("roi_line", **historial.roi(args.roi)))
+            historial.close()
+            return
+
         if args.fast and not args.no_fast:
-            FAST_MODE = True
+            sesion.fast = True
         if args.no_fast:
-            FAST_MODE = False
+            sesion.fast = False
         if args.horses and args.horses >= 2:
-            N_HORSES = args.horses
-            set_horses(N_HORSES)
+            sesion.n_horses = args.horses
+            set_horses(sesion.n_horses)
+        if args.fps and args.fps > 0:
+            sesion.fps = args.fps
+            set_fps(sesion.fps)
+        if args.instant and not args.no_instant:
+            sesion.instant = True
+            set_instant(True)
+        if args.no_instant:
+            sesion.instant = False
+            set_instant(False)
+        if args.history and not args.no_history:
+            sesion.history = True
+            set_history(True)
+        if args.no_history:
+            sesion.history = False
+            set_history(False)
+        if args.output == "jsonl":
+            sesion.salida = sys.stdout
+        if args.turbo and args.turbo >= 1:
+            sesion.turbo = args.turbo
+            set_turbo(sesion.turbo)
         if args.seed is not None:
             # Accept int or any string; keep as provided
             try:
-                SEED = int(args.seed)
+                sesion.seed = int(args.seed)
             except Exception:
-                SEED = str(args.seed)
-            set_seed(SEED)
+                sesion.seed = str(args.seed)
+            set_seed(sesion.seed)
+        # Warm daemon for hipodromo-client; it keeps these modules loaded
+        if args.daemon:
+            import warm
+            try:
+                warm.serve()
+            except RuntimeError:
+                print(sesion.t("daemon_running"))
+            return
+        if args.daemon_stop:
+            import warm
+            warm.stop()
+            return
+        # Shared races for networked players; balances stay in memory
+        if args.serve:
+            from server import serve
+            serve(args.host, args.port, n_horses=sesion.n_horses, seed=sesion.seed, window=args.bet_window,
+                  fps=None if sesion.fast else sesion.fps, lang=sesion.lang, parimutuel=args.pool,
+                  history=sesion.history)
+            return
+        # Scripted play: no prompts, no animation, summary only
+        if args.bet or args.strategy_file:
+            try:
+                apuestas = list(args.bet or [])
+                if args.strategy_file:
+                    apuestas += leer_estrategia(args.strategy_file)
+                if apuestas:
+                    jugar_script(apuestas, args.rounds, sesion)
+            except (OSError, ValueError) as e:
+                # A usage error, like argparse's own: stderr and status 2
+                print(sesion.t("script_invalid", error=e), file=sys.stderr)
+                sys.exit(2)
+            return
         # Handle config inspection/editing
         if getattr(args, "config", False):
             print(CONFIG_FILE)
@@ -264,60 +694,69 @@ def main():
             return
 
         # Persist fast preference on startup change
-        set_fast(FAST_MODE)
+        set_fast(sesion.fast)
     except Exception:
         pass
+    # With JSON Lines on stdout the menu and its prompts go to stderr
+    consola = sesion.consola
+    if sesion.persist:
+        # First run: ask for the language now that the menu is really shown
+        sesion.lang = cargar_idioma(salida=consola)
+        sesion.t = traductor(sesion.lang)
     while True:
-        clear_screen()
-        cprint(t("title"), "light_blue")
-        if fzf_available():
+        selector = consola is None and menu_available()
+        # The selector draws on the alternate screen: nothing to clear or title
+        if consola is None and not selector:
+            clear_screen()
+            cprint(sesion.t("title"), "light_blue")
+        if selector:
             menu_options = [
-                t("menu_play"),
-                t("menu_change_lang"),
-                t("menu_show_balance"),
-                t("menu_toggle_fast"),
-                t("menu_exit"),
+                sesion.t("menu_play"),
+                sesion.t("menu_change_lang"),
+                sesion.t("menu_show_balance"),
+                sesion.t("menu_toggle_fast"),
+                sesion.t("menu_exit"),
             ]
-            choice = fzf_select(menu_options, t("menu_header"))
+            choice = menu_select(menu_options, sesion.t("menu_header"))
             if choice is None:
                 # Treat cancel as exit but persist
-                cprint(t("thanks"), "light_blue")
-                guardar_dinero(dinero)
+                cprint(sesion.t("thanks"), "light_blue")
+                flush()
                 break
-            if choice == t("menu_play"):
+            if choice == sesion.t("menu_play"):
                 opcion = 1
-            elif choice == t("menu_change_lang"):
+            elif choice == sesion.t("menu_change_lang"):
                 opcion = 2
-            elif choice == t("menu_show_balance"):
+            elif choice == sesion.t("menu_show_balance"):
                 opcion = 3
-            elif choice == t("menu_toggle_fast"):
+            elif choice == sesion.t("menu_toggle_fast"):
                 opcion = 4
-            elif choice == t("menu_exit"):
+            elif choice == sesion.t("menu_exit"):
                 opcion = 0
             else:
                 opcion = 0
         else:
-            print(t("menu_header"))
-            print(t("menu_play"))
-            print(t("menu_change_lang"))
-            print(t("menu_show_balance"))
-            print(t("menu_toggle_fast"))
-            print(t("menu_exit"))
-            opcion = input_entero(t("menu_prompt"), 0, 4, invalid_msg=t("invalid_int"))
+            print(sesion.t("menu_header"), file=consola)
+            print(sesion.t("menu_play"), file=consola)
+            print(sesion.t("menu_change_lang"), file=consola)
+            print(sesion.t("menu_show_balance"), file=consola)
+            print(sesion.t("menu_toggle_fast"), file=consola)
+            print(sesion.t("menu_exit"), file=consola)
+            opcion = input_entero(sesion.t("menu_prompt"), 0, 4, invalid_msg=sesion.t("invalid_int"), salida=consola)
         if opcion == 0:
-            cprint(t("thanks"), "light_blue")
-            guardar_dinero(dinero)
+            cprint(sesion.t("thanks"), "light_blue", file=consola)
+            flush()
             break
         elif opcion == 1:
-            jugar()
+            sesion.jugar()
         elif opcion == 2:
-            cambiar_idioma()
+            sesion.cambiar_idioma()
         elif opcion == 3:
-            mostrar_saldo()
+            sesion.mostrar_saldo()
         elif opcion == 4:
-            toggle_fast()
+            sesion.toggle_fast()
         else:
-            print(t("invalid_option"))
+            print(sesion.t("invalid_option"), file=consola)
             time.sleep(1)
 
 
@@ -1,10 +1,45 @@
 import os
 import json
+import time
+import tempfile
+import atexit
+import signal
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking only covers threads of one process
+    fcntl = None
 
 # Config directory and files
 CONFIG_DIR = os.path.expanduser("~/.config/hipodromo")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 
+# Write-behind: setters only mark the config dirty and a daemon thread
+# writes the latest state at most once per interval
+FLUSH_INTERVAL = 1.0
+# "full": fsync the file and its directory (survives power loss)
+# "file": fsync the file only; "never": leave it to the OS (crash-safe only)
+FSYNC_POLICY = "full"
+# Getters stat the config and ledger at most once per interval and re-parse
+# only when one changed (mtime, size or inode); None turns reloading off
+RELOAD_INTERVAL = 1.0
+
+# Balance ledger: every stake and payout is appended as one compact record
+# next to CONFIG_FILE and folded into the config snapshot every N records
+LEDGER_NAME = "ledger.jsonl"
+LEDGER_ARCHIVE_NAME = "ledger.archive.jsonl"
+LEDGER_COMPACT_EVERY = 256
+# Advisory lock serialising read-modify-write of the files above across
+# processes; a separate file because config.json is replaced on each write
+LOCK_NAME = "config.lock"
+
+# Where settings and balance live: "json" (config.json plus the ledger
+# above) or "sqlite" (store.SettingsStore, next to the history tables);
+# the HIPODROMO_BACKEND environment variable picks one
+BACKEND = os.environ.get("HIPODROMO_BACKEND", "json")
+
 # Legacy files for migration
 OLD_BALANCE_FILE = os.path.expanduser("~/.hipodromo_balance")
 OLD_LANG_FILE = os.path.expanduser("~/.hipodromo_lang")
@@ -24,34 +59,623 @@ def _read_legacy_value(path, coerce=None):
 
 
 def _load_config_from_disk():
+    # Read-your-writes: pending changes from this process land first
+    flush()
     try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            if isinstance(data, dict):
+                return data
     except Exception:
         pass
     return {}
 
 
-def _write_config_to_disk(config):
+_last_written = None
+_persist_stats = {
+    "writes": 0,
+    "writes_avoided": 0,
+    "writes_skipped": 0,
+    "bytes_written": 0,
+    "lock_acquisitions": 0,
+    "lock_wait": 0.0,
+    "lock_hold": 0.0,
+    "lock_hold_max": 0.0,
+}
+
+
+def _fsync_dir(path):
     try:
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened for fsync on every platform (Windows)
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
-def _ensure_and_migrate_config():
+def _encode_config(config):
+    return json.dumps(config, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_config_to_disk(config):
+    """Atomically replace ``CONFIG_FILE`` with compact JSON.
+
+    The bytes go to a temp file in ``CONFIG_DIR`` that is then renamed over
+    the config, so a crash leaves either the old or the new file, never a
+    truncated one. Returns False (and touches nothing) when the bytes match
+    the last write to the same path.
+    """
+    global _last_written
     try:
+        data = _encode_config(config)
+        if _last_written == (CONFIG_FILE, data):
+            return False
         os.makedirs(CONFIG_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CONFIG_DIR, prefix=".config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # mkstemp creates 0600; keep the mode the config already had
+                try:
+                    mode = os.stat(CONFIG_FILE).st_mode & 0o777
+                except OSError:
+                    mode = 0o644
+                os.chmod(tmp_path, mode)
+                f.write(data)
+                if FSYNC_POLICY in ("file", "full"):
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if FSYNC_POLICY == "full":
+            _fsync_dir(os.path.dirname(CONFIG_FILE))
+        _last_written = (CONFIG_FILE, data)
+        _persist_stats["bytes_written"] += len(data)
+        return True
     except Exception:
-        pass
-
-    config = _load_config_from_disk()
-
+        return False
+
+
+_ledger_seq = 0
+_ledger_tail = 0
+# Bytes of the ledger already folded into CONFIG, and the config signature
+# they were folded onto: while config.json is unchanged a sync only reads
+# the records appended past this offset
+_ledger_offset = 0
+_ledger_inode = None
+_synced_config = None
+_dirty = False
+# Keys set since the last write, and the balance change not yet written;
+# everything else is refreshed from disk before each write
+_dirty_keys = set()
+_balance_delta = 0
+_lock_depth = 0
+# (mtime, size, inode) of config and ledger as last seen in full
+_file_sig = None
+_next_check = 0.0
+# Reentrant so a signal handler can flush while the main thread holds them
+_state_lock = threading.RLock()
+_io_lock = threading.RLock()
+_flusher = None
+_previous_handlers = {}
+# The sqlite backend's connection and the PRAGMA data_version last merged
+_store = None
+_store_version = None
+
+
+def _mark_dirty(key=None):
+    """Schedule ``CONFIG`` for the next background write; never blocks on I/O."""
+    global _dirty
+    with _state_lock:
+        if _dirty:
+            # This change rides along with a write already pending
+            _persist_stats["writes_avoided"] += 1
+        _dirty = True
+        _dirty_keys.update(CONFIG if key is None else (key,))
+    if _flusher is None:
+        _start_flusher()
+
+
+def _stat_signature():
+    sig = []
+    for path in (CONFIG_FILE, _ledger_paths()[0]):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+@contextmanager
+def _file_lock():
+    """Hold the cross-process config lock; reentrant within this process.
+
+    Wait and hold times are added to ``persist_stats()`` so the critical
+    sections can be kept short.
+    """
+    global _lock_depth
+    with _io_lock:
+        if fcntl is None or _lock_depth:
+            _lock_depth += 1
+            try:
+                yield
+            finally:
+                _lock_depth -= 1
+                if _lock_depth == 0:
+                    _remember_signature()
+            return
+        path = os.path.join(os.path.dirname(CONFIG_FILE), LOCK_NAME)
+        requested = time.perf_counter()
+        try:
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            fd = None
+        try:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            acquired = time.perf_counter()
+            _lock_depth += 1
+            try:
+                yield
+            finally:
+                _lock_depth -= 1
+                if _lock_depth == 0:
+                    # Everything on disk is now known to this process
+                    _remember_signature()
+                held = time.perf_counter() - acquired
+                with _state_lock:
+                    _persist_stats["lock_acquisitions"] += 1
+                    _persist_stats["lock_wait"] += acquired - requested
+                    _persist_stats["lock_hold"] += held
+                    _persist_stats["lock_hold_max"] = max(_persist_stats["lock_hold_max"], held)
+        finally:
+            if fd is not None:
+                os.close(fd)  # also releases the flock
+
+
+def _remember_signature():
+    global _file_sig, _next_check
+    _file_sig = _stat_signature()
+    if RELOAD_INTERVAL is not None:
+        _next_check = time.monotonic() + RELOAD_INTERVAL
+
+
+def _maybe_reload():
+    """Re-read config and ledger if another writer changed them."""
+    global _next_check, _store_version
+    with _io_lock:
+        db = _settings_store()
+        if db is not None:
+            version = db.data_version()
+            if version != _store_version:
+                _store_version = version
+                _merge_settings(db.load())
+            if RELOAD_INTERVAL is not None:
+                _next_check = time.monotonic() + RELOAD_INTERVAL
+        elif _stat_signature() != _file_sig:
+            with _file_lock():
+                # Releasing the lock records the new signature
+                _sync_locked()
+        elif RELOAD_INTERVAL is not None:
+            _next_check = time.monotonic() + RELOAD_INTERVAL
+
+
+def _sync_locked():
+    """Fold what other processes wrote into ``CONFIG``; needs ``_file_lock``.
+
+    Keys this process changed since its last write keep their local value.
+    The balance becomes the on-disk snapshot plus ledger, plus the local
+    change not yet written, so concurrent sessions add up instead of
+    overwriting each other.
+    """
+    global _last_written, _synced_config
+    config_sig, ledger_sig = _stat_signature()
+    if _synced_config is not None and config_sig == _synced_config and _ledger_grew(ledger_sig):
+        _replay_ledger_tail()
+        return
+    try:
+        with open(CONFIG_FILE, "rb") as f:
+            raw = f.read()
+        disk = json.loads(raw)
+    except (OSError, ValueError):
+        return
+    if not isinstance(disk, dict):
+        return
+    # Compare the next write against what is really on disk
+    _last_written = (CONFIG_FILE, raw)
+    has_balance = isinstance(disk.get("balance"), int)
+    if has_balance:
+        _replay_ledger(disk)
+    with _state_lock:
+        for key, value in disk.items():
+            if key != "balance" and key not in _dirty_keys:
+                CONFIG[key] = value
+        if has_balance:
+            # Concurrent stakes can only overdraw through a stale absolute set
+            CONFIG["balance"] = max(0, disk["balance"] + _balance_delta)
+    _synced_config = config_sig if has_balance else None
+
+
+def _ledger_grew(ledger_sig):
+    """Whether the ledger is the file last read, only ever appended to since."""
+    if ledger_sig is None:
+        return _ledger_offset == 0
+    return ledger_sig[1] >= _ledger_offset and ledger_sig[2] == _ledger_inode
+
+
+def _replay_ledger_tail():
+    """Fold records appended after ``_ledger_offset`` into ``CONFIG``."""
+    global _ledger_seq, _ledger_tail, _ledger_offset
+    records, _ledger_offset = _read_ledger_from(_ledger_paths()[0], _ledger_offset)
+    delta = 0
+    for record in records:
+        _ledger_tail += 1
+        if record["seq"] <= _ledger_seq:
+            continue
+        try:
+            delta += int(record["delta"])
+        except (TypeError, ValueError):
+            continue
+        _ledger_seq = record["seq"]
+    if delta:
+        with _state_lock:
+            CONFIG["balance"] = max(0, CONFIG.get("balance", 0) + delta)
+            CONFIG["ledger_seq"] = _ledger_seq
+
+
+def _write_snapshot_locked():
+    """Write ``CONFIG`` as the new snapshot; needs ``_file_lock``.
+
+    A failed write leaves the changes pending, so the flusher retries them.
+    """
+    global _dirty, _balance_delta, _synced_config
+    with _state_lock:
+        keys = set(_dirty_keys)
+        delta = _balance_delta
+        _dirty = False
+        _dirty_keys.clear()
+        _balance_delta = 0
+        snapshot = dict(CONFIG)
+    if _write_config_to_disk(snapshot):
+        _persist_stats["writes"] += 1
+        if _synced_config is not None:
+            _synced_config = _stat_signature()[0]
+        return True
+    _persist_stats["writes_skipped"] += 1
+    if _last_written == (CONFIG_FILE, _encode_config(snapshot)):
+        return True
+    with _state_lock:
+        # Changes made during the write are already back in these
+        _dirty = True
+        _dirty_keys.update(keys)
+        _balance_delta += delta
+    return False
+
+
+def flush():
+    """Write pending changes now. Returns once they are on disk."""
+    with _io_lock:
+        with _state_lock:
+            if not _dirty:
+                return
+        if _settings_store() is not None:
+            _flush_sqlite()
+            return
+        with _file_lock():
+            _sync_locked()
+            _write_snapshot_locked()
+
+
+def _settings_store():
+    """The sqlite backend's store, opened on first use; None for json."""
+    global _store
+    if BACKEND != "sqlite":
+        return None
+    if _store is None:
+        # Imported here: store reads CONFIG_DIR from this module
+        import store
+        _store = store.SettingsStore()
+    return _store
+
+
+def _merge_settings(fresh):
+    """Take settings from the database, except keys changed here since."""
+    with _state_lock:
+        for key, value in fresh.items():
+            if key != "balance" and key not in _dirty_keys:
+                CONFIG[key] = value
+        if isinstance(fresh.get("balance"), int):
+            CONFIG["balance"] = max(0, fresh["balance"] + _balance_delta)
+
+
+def _load_sqlite():
+    """Settings from SQLite; the first run imports config.json and its ledger."""
+    global _store_version
+    db = _settings_store()
+    loaded = db.load()
+    if "schema_version" not in loaded:
+        # Only fills what is missing, so concurrent first runs import once
+        loaded = db.seed(_ensure_and_migrate_config())
+    _store_version = db.data_version()
+    return loaded
+
+
+def _flush_sqlite():
+    """Write the changed keys and the balance change in one transaction."""
+    global _dirty, _balance_delta
+    db = _settings_store()
+    with _state_lock:
+        keys = set(_dirty_keys)
+        delta = _balance_delta
+        _dirty = False
+        _dirty_keys.clear()
+        _balance_delta = 0
+        values = {key: CONFIG[key] for key in keys if key in CONFIG}
+    try:
+        fresh = db.save(values, delta)
+    except Exception:
+        with _state_lock:
+            _dirty = True
+            _dirty_keys.update(keys)
+            _balance_delta += delta
+        return
+    _persist_stats["writes"] += 1
+    _merge_settings(fresh)
+
+
+def persist_stats():
+    # Taking the I/O lock waits out an in-flight write, so pending=False
+    # means the last change is on disk
+    with _io_lock:
+        with _state_lock:
+            return dict(_persist_stats, pending=_dirty)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+
+def _start_flusher():
+    global _flusher
+    with _state_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_loop, name="hipodromo-config-flush", daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+    for name in ("SIGTERM", "SIGHUP"):
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        try:
+            # Only take over signals nobody else handles or ignores
+            if signal.getsignal(signum) is signal.SIG_DFL:
+                _previous_handlers[signum] = signal.SIG_DFL
+                signal.signal(signum, _flush_on_signal)
+        except (ValueError, OSError):
+            # Not the main thread, or the platform refuses
+            pass
+
+
+def _after_fork_in_child():
+    """A forked child gets none of the parent's threads: drop their state.
+
+    Locks a thread held at fork time would never be released, so the child
+    starts with fresh ones and a flusher of its own on the next change.
+    """
+    global _state_lock, _io_lock, _flusher, _lock_depth, _store
+    _state_lock = threading.RLock()
+    _io_lock = threading.RLock()
+    _lock_depth = 0
+    _flusher = None
+    # An SQLite connection must not cross a fork; the child opens its own
+    _store = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _flush_on_signal(signum, frame):
+    flush()
+    signal.signal(signum, _previous_handlers.get(signum, signal.SIG_DFL))
+    os.kill(os.getpid(), signum)
+
+
+def _ledger_paths():
+    base = os.path.dirname(CONFIG_FILE)
+    return os.path.join(base, LEDGER_NAME), os.path.join(base, LEDGER_ARCHIVE_NAME)
+
+
+def _read_ledger(path):
+    """Yield well-formed records from a ledger file, oldest first.
+
+    A torn last line (crash mid-append) is skipped rather than trusted.
+    """
+    yield from _read_ledger_from(path, 0)[0]
+
+
+def _read_ledger_from(path, offset):
+    """Records after byte ``offset`` of a ledger, and the offset past them.
+
+    An unterminated last line is neither returned nor consumed.
+    """
+    global _ledger_inode
+    try:
+        with open(path, "rb") as f:
+            _ledger_inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and isinstance(record.get("seq"), int):
+            records.append(record)
+    return records, offset + end
+
+
+def _replay_ledger(config):
+    """Apply ledger records newer than the snapshot to ``config`` in place."""
+    global _ledger_seq, _ledger_tail, _ledger_offset
+    seq = config.get("ledger_seq", 0)
+    seq = seq if isinstance(seq, int) else 0
+    balance = config.get("balance")
+    tail = 0
+    records, _ledger_offset = _read_ledger_from(_ledger_paths()[0], 0)
+    for record in records:
+        tail += 1
+        if record["seq"] <= seq:
+            # Already folded into the snapshot by an interrupted compaction
+            continue
+        try:
+            balance = int(balance) + int(record["delta"])
+        except (TypeError, ValueError):
+            continue
+        seq = record["seq"]
+    if seq != config.get("ledger_seq", 0):
+        config["balance"] = balance
+        config["ledger_seq"] = seq
+    _ledger_seq = seq
+    _ledger_tail = tail
+
+
+def _append_ledger(record):
+    """Append one record; returns the ledger's size after it."""
+    global _ledger_inode
+    path = _ledger_paths()[0]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        if FSYNC_POLICY in ("file", "full"):
+            f.flush()
+            os.fsync(f.fileno())
+        _ledger_inode = os.fstat(f.fileno()).st_ino
+        return f.tell()
+
+
+def record_balance(delta, kind, round_id=None):
+    """Apply a balance change as one appended ledger record.
+
+    ``kind`` labels the movement (``"stake"``, ``"payout"``) and ``round_id``
+    ties a payout to its stake. Unlike ``set_balance`` this never rewrites
+    the config file: the snapshot catches up every ``LEDGER_COMPACT_EVERY``
+    records. Returns the new balance.
+
+    Raises ValueError, recording nothing, when a stake is more than the
+    balance: another session may have spent it since this one last looked.
+    """
+    global _ledger_seq, _ledger_tail, _ledger_offset
+    delta = int(delta)
+    _config()
+    db = _settings_store()
+    if db is not None:
+        with _io_lock:
+            balance = db.record(delta, kind, round_id)
+            with _state_lock:
+                CONFIG["balance"] = balance + _balance_delta
+                return CONFIG["balance"]
+    with _file_lock():
+        # Records other sessions appended come first; usually just their tail
+        _sync_locked()
+        with _state_lock:
+            balance = get_balance() + delta
+            seq = _ledger_seq + 1
+        if delta < 0 and balance < 0:
+            raise ValueError(f"stake {-delta} over balance {balance - delta}")
+        record = {"seq": seq, "ts": round(time.time(), 3), "round": round_id,
+                  "kind": kind, "delta": delta, "balance": balance - _balance_delta}
+        try:
+            size = _append_ledger(record)
+        except Exception:
+            # No ledger (read-only disk, ...): fall back to a snapshot write
+            set_balance(balance)
+            return balance
+        with _state_lock:
+            _ledger_seq = seq
+            _ledger_tail += 1
+            if size == _ledger_offset + len(_encode_config(record)) + 1:
+                _ledger_offset = size
+            CONFIG["balance"] = balance
+            CONFIG["ledger_seq"] = seq
+            compact = _ledger_tail >= LEDGER_COMPACT_EVERY
+        if compact:
+            compact_ledger()
+    return balance
+
+
+def compact_ledger():
+    """Fold the ledger into the config snapshot and start a new ledger.
+
+    The snapshot is written first and remembers the last folded ``seq``, so
+    a crash at any point replays each record at most once. Folded records
+    move to the archive file to keep the audit trail.
+    """
+    global _ledger_tail, _ledger_offset
+    ledger, archive = _ledger_paths()
+    _config()
+    if _settings_store() is not None:
+        # SQLite keeps the balance current; there is nothing to fold
+        return True
+    with _file_lock():
+        _sync_locked()
+        if not _write_snapshot_locked():
+            return False
+        try:
+            with open(ledger, "rb") as f:
+                folded = f.read()
+            if folded:
+                with open(archive, "ab") as f:
+                    f.write(folded)
+                    if FSYNC_POLICY in ("file", "full"):
+                        f.flush()
+                        os.fsync(f.fileno())
+            with open(ledger, "wb"):
+                pass
+        except OSError:
+            # Snapshot is authoritative; stale records are skipped on replay
+            return False
+        with _state_lock:
+            _ledger_tail = 0
+            _ledger_offset = 0
+    return True
+
+
+def ledger_entries():
+    """Yield every archived and pending ledger record in ``seq`` order."""
+    db = _settings_store()
+    if db is not None:
+        yield from db.ledger()
+        return
+    last = 0
+    for path in _ledger_paths()[::-1]:
+        for record in _read_ledger(path):
+            if record["seq"] > last:
+                last = record["seq"]
+                yield record
+
+
+def _migrate_legacy_files(config):
+    """v1: pull balance and language from the pre-JSON plain-text files."""
     if "balance" not in config:
         legacy_balance = None
         legacy_balance = _read_legacy_value(BALANCE_FILE, coerce=int) or legacy_balance
@@ -64,61 +688,132 @@ def _ensure_and_migrate_config():
         legacy_lang = _read_legacy_value(OLD_LANG_FILE) or legacy_lang
         config["lang"] = legacy_lang if legacy_lang in ("en", "es") else None
 
-    # New settings with sensible defaults
-    if "fast" not in config:
-        config["fast"] = False
-    if "horses" not in config:
-        config["horses"] = 5
-    if "seed" not in config:
-        config["seed"] = None
 
-    _write_config_to_disk(config)
+def _migrate_setting_defaults(config):
+    """v2: add every setting introduced after the legacy files."""
+    defaults = {
+        "fast": False,
+        "horses": 5,
+        "seed": None,
+        "fps": 12.5,
+        "instant": False,
+        "turbo": 1,
+        "history": False,
+    }
+    for key, value in defaults.items():
+        config.setdefault(key, value)
+
+
+# Applied in order to configs whose schema_version is older; append only
+MIGRATIONS = [
+    (1, _migrate_legacy_files),
+    (2, _migrate_setting_defaults),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_and_migrate_config():
+    config = _load_config_from_disk()
+    version = config.get("schema_version", 0)
+    version = version if isinstance(version, int) else 0
+
+    if version < SCHEMA_VERSION:
+        try:
+            os.makedirs(CONFIG_DIR, exist_ok=True)
+        except Exception:
+            pass
+        for target, migrate in MIGRATIONS:
+            if version < target:
+                migrate(config)
+                version = target
+        config["schema_version"] = version
+        _replay_ledger(config)
+        with _file_lock():
+            _write_config_to_disk(config)
+    else:
+        # Current schema: one read, no probes and nothing to write
+        _replay_ledger(config)
     return config
 
 
-CONFIG = _ensure_and_migrate_config()
+# Filled on first use by load_config(); importing this module touches no files
+CONFIG = {}
+_loaded = False
+
+
+def load_config():
+    """Read (and migrate) the config file once; later calls are free."""
+    global _loaded, _file_sig, _next_check
+    if _loaded:
+        return CONFIG
+    with _io_lock:
+        if not _loaded:
+            sig = _stat_signature()
+            loaded = _ensure_and_migrate_config() if _settings_store() is None else _load_sqlite()
+            with _state_lock:
+                # Values set before the first load win over the file
+                for key, value in loaded.items():
+                    CONFIG.setdefault(key, value)
+                _loaded = True
+                _file_sig = sig
+                _next_check = 0.0 if RELOAD_INTERVAL is None else time.monotonic() + RELOAD_INTERVAL
+    return CONFIG
+
+
+def _config():
+    if not _loaded:
+        return load_config()
+    if RELOAD_INTERVAL is not None and time.monotonic() >= _next_check:
+        _maybe_reload()
+    return CONFIG
 
 
 def get_lang(default=None):
-    return CONFIG.get("lang", default)
+    return _config().get("lang", default)
 
 
 def set_lang(lang):
-    CONFIG["lang"] = lang
-    _write_config_to_disk(CONFIG)
+    _config()["lang"] = lang
+    _mark_dirty("lang")
 
 
 def get_balance(default=5000):
     try:
-        value = int(CONFIG.get("balance", default))
+        value = int(_config().get("balance", default))
         return value if value >= 0 else default
     except Exception:
         return default
 
 
 def set_balance(value):
+    global _balance_delta
     try:
-        CONFIG["balance"] = int(value)
-        _write_config_to_disk(CONFIG)
+        value = int(value)
+        config = _config()
+        with _state_lock:
+            # Written as a change, so other sessions' bets are not lost
+            _balance_delta += value - get_balance(value)
+            config["balance"] = value
+        _mark_dirty("balance")
     except Exception:
         pass
 
 
 def get_fast(default=False):
     try:
-        return bool(CONFIG.get("fast", default))
+        return bool(_config().get("fast", default))
     except Exception:
         return default
 
 
 def set_fast(value: bool):
-    CONFIG["fast"] = bool(value)
-    _write_config_to_disk(CONFIG)
+    _config()["fast"] = bool(value)
+    _mark_dirty("fast")
 
 
 def get_horses(default=5):
     try:
-        n = int(CONFIG.get("horses", default))
+        n = int(_config().get("horses", default))
         return n if n >= 2 else default
     except Exception:
         return default
@@ -126,18 +821,72 @@ def get_horses(default=5):
 
 def set_horses(value: int):
     try:
-        CONFIG["horses"] = int(value)
-        _write_config_to_disk(CONFIG)
+        _config()["horses"] = int(value)
+        _mark_dirty("horses")
     except Exception:
         pass
 
 
 def get_seed(default=None):
-    return CONFIG.get("seed", default)
+    return _config().get("seed", default)
 
 
 def set_seed(value):
-    CONFIG["seed"] = value
-    _write_config_to_disk(CONFIG)
+    _config()["seed"] = value
+    _mark_dirty("seed")
+
+
+def get_fps(default=12.5):
+    try:
+        fps = float(_config().get("fps", default))
+        return fps if fps > 0 else default
+    except Exception:
+        return default
+
+
+def set_fps(value):
+    try:
+        _config()["fps"] = float(value)
+        _mark_dirty("fps")
+    except Exception:
+        pass
+
+
+def get_instant(default=False):
+    try:
+        return bool(_config().get("instant", default))
+    except Exception:
+        return default
+
+
+def set_instant(value: bool):
+    _config()["instant"] = bool(value)
+    _mark_dirty("instant")
+
+
+def get_turbo(default=1):
+    try:
+        k = int(_config().get("turbo", default))
+        return k if k >= 1 else default
+    except Exception:
+        return default
+
+
+def set_turbo(value: int):
+    try:
+        _config()["turbo"] = int(value)
+        _mark_dirty("turbo")
+    except Exception:
+        pass
+
+
+def get_history(default=False):
+    try:
+        return bool(_config().get("history", default))
+    except Exception:
+        return default
 
 
+def set_history(value: bool):
+    _config()["history"] = bool(value)
+    _mark_dirty("history")
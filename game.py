@@ -1,9 +1,24 @@
+import os
+import json
+import math
+import atexit
+import tempfile
 import time
+import sys
 import random
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional
-from termcolor import cprint
+from termcolor import colored, cprint
 
-from utils import clear_screen
+try:
+    import numpy as np
+except ImportError:  # optional extra: pip install "hipodromo[fast]"
+    np = None
+
+from config import CONFIG_DIR
+from utils import FrameRenderer, clear_screen
 
 
 def _generate_weights(num_horses: int, seed: Optional[int] = None):
@@ -16,89 +31,590 @@ def _generate_weights(num_horses: int, seed: Optional[int] = None):
     return [rng.uniform(0.6, 1.4) for _ in range(num_horses)]
 
 
-def compute_decimal_odds(weights):
-    """Compute house-edge-adjusted decimal odds from probability.
+# Simulated races per weight vector for the Monte Carlo cross-check; the
+# pure-Python fallback gets fewer so it stays interactive without NumPy
+ODDS_SAMPLES = 4000
+ODDS_SAMPLES_FALLBACK = 1000
+HOUSE_EDGE = 0.10
+# The exact solver stops once the race is still running with less than this
+FINISH_EPSILON = 1e-15
+
+
+def _bonus_probs(weights):
+    """Per-horse bonus step chance before halving, as used on every tick."""
+    total = sum(weights) or 1.0
+    return [max(0.0, min(0.6, w / total)) for w in weights]
+
+
+def _step_probabilities(weights):
+    """Return (P(0), P(1), P(2), P(3)) cells moved per tick for each horse.
+
+    The uniform 0-2 step plus a bonus step with chance ``b`` gives
+    P(0) = (1 - b) / 3, P(1) = P(2) = 1 / 3 and P(3) = b / 3.
+    """
+    steps = []
+    for p in _bonus_probs(weights):
+        b = p * 0.5
+        steps.append(((1 - b) / 3, 1 / 3, 1 / 3, b / 3))
+    return steps
+
+
+def _tick_profiles_python(steps, distance):
+    """Yield ``(alive, finishing)`` for each horse, one tick at a time.
+
+    ``alive[i]`` is the chance horse i is still short of the line after the
+    tick; ``finishing[i][k]`` the chance it crosses on this tick landing k
+    cells past the line. Positions never decrease, so cutting each horse's
+    position distribution at the line is all the absorption needed.
+    """
+    dists = [[1.0] + [0.0] * (distance - 1) for _ in steps]
+    zero = [0.0]
+    while True:
+        alive = []
+        finishing = []
+        for i, (q0, q1, q2, q3) in enumerate(steps):
+            d = dists[i]
+            fin = [0.0, 0.0, 0.0]
+            for s, q in ((1, q1), (2, q2), (3, q3)):
+                for k in range(s):
+                    p = distance + k - s
+                    if p >= 0:
+                        fin[k] += d[p] * q
+            d = [
+                a * q0 + b * q1 + c * q2 + e * q3
+                for a, b, c, e in zip(d, zero + d[:-1], zero * 2 + d[:-2], zero * 3 + d[:-3])
+            ]
+            dists[i] = d
+            alive.append(sum(d))
+            finishing.append(fin)
+        yield alive, finishing
+
+
+def _tick_profiles_numpy(steps, distance):
+    """Same as ``_tick_profiles_python`` over a (horses x cells) matrix."""
+    q = np.asarray(steps, dtype=np.float64)
+    d = np.zeros((len(steps), distance))
+    d[:, 0] = 1.0
+    while True:
+        fin = np.zeros((len(steps), 3))
+        for s in (1, 2, 3):
+            for k in range(s):
+                p = distance + k - s
+                if p >= 0:
+                    fin[:, k] += d[:, p] * q[:, s]
+        new = d * q[:, :1]
+        for s in (1, 2, 3):
+            new[:, s:] += d[:, :-s] * q[:, s : s + 1]
+        d = new
+        yield d.sum(axis=1).tolist(), fin.tolist()
+
+
+@lru_cache(maxsize=256)
+def _exact_win_probabilities(weights: tuple, distance: int) -> tuple:
+    steps = _step_probabilities(weights)
+    profiles = _tick_profiles_numpy if np is not None else _tick_profiles_python
+    n = len(steps)
+    wins = [0.0] * n
+    for alive, finishing in profiles(steps, distance):
+        running = 1.0
+        for a in alive:
+            running *= a
+        if running < 1.0:
+            # levels[k][j]: horse j is short of the line or landed fewer than
+            # k cells past it. Horse i wins landing k past the line if every
+            # lower index is below level k and every higher one below k + 1:
+            # an equal landing goes to the lower index, as
+            # posiciones.index(max(...)) does.
+            levels = [alive]
+            for k in range(3):
+                levels.append([lv + f[k] for lv, f in zip(levels[k], finishing)])
+            for k in range(3):
+                before, after = levels[k], levels[k + 1]
+                suffix = [1.0] * (n + 1)
+                for j in range(n - 1, 0, -1):
+                    suffix[j] = suffix[j + 1] * after[j]
+                prefix = 1.0
+                for i in range(n):
+                    f = finishing[i][k]
+                    if f:
+                        wins[i] += f * prefix * suffix[i + 1]
+                    prefix *= before[i]
+        if running < FINISH_EPSILON:
+            break
+    return tuple(wins)
+
+
+@lru_cache(maxsize=256)
+def _estimated_win_probabilities(weights: tuple, distance: int) -> tuple:
+    # Imported here because simulate builds on RaceEngine from this module
+    import simulate
+
+    samples = ODDS_SAMPLES if simulate.np is not None else ODDS_SAMPLES_FALLBACK
+    # Seeding from the weights makes the same race always get the same odds
+    wins, _ = simulate.simulate_batch(samples, weights, distance, seed=repr(weights))
+    # Half a pseudo-win per horse keeps a never-winning horse off infinite odds
+    total = samples + 0.5 * len(weights)
+    return tuple((w + 0.5) / total for w in wins)
+
+
+def win_probabilities(weights, distance: int = 100):
+    """Return each horse's exact win probability under the tick model.
+
+    Solved by a DP over (tick, position) per horse, stopped once the race
+    is over with all but ``FINISH_EPSILON`` probability. Results are cached
+    by weight vector, so repeated calls are free.
+    """
+    if not weights:
+        return []
+    return list(_exact_win_probabilities(tuple(float(w) for w in weights), distance))
+
+
+def estimate_win_probabilities(weights, distance: int = 100):
+    """Estimate win probabilities by simulating ``ODDS_SAMPLES`` races.
 
-    probability_i = w_i / sum(weights)
+    A noisy cross-check for ``win_probabilities``, cached the same way.
+    """
+    if not weights:
+        return []
+    return list(_estimated_win_probabilities(tuple(float(w) for w in weights), distance))
+
+
+def compute_decimal_odds(weights, distance: int = 100):
+    """Compute house-edge-adjusted decimal odds from exact win probability.
+
+    probability_i comes from ``win_probabilities`` (the real race dynamics)
     fair_odds = 1.0 / probability_i
     Apply a 10% house edge by multiplying fair payout by 0.9.
-    Minimum odds clamped at 1.5x to keep wins exciting for favorites.
+    Odds are cut down to the cent, so ``p * odds <= 0.9`` for every horse.
+    There is no minimum: with exact probabilities any floor above these
+    odds would make a clear favourite a winning bet for the player.
     """
-    total = sum(weights) if weights else 1.0
     odds = []
-    for w in weights:
-        p = max(1e-6, w / total)
-        fair = 1.0 / p
-        house = fair * 0.9
-        odds.append(round(max(1.5, house), 2))
+    for p in win_probabilities(weights, distance):
+        fair = 1.0 / max(1e-6, p)
+        house = fair * (1.0 - HOUSE_EDGE)
+        odds.append(round(math.floor(house * 100 + 1e-9) / 100, 2))
     return odds
 
 
+def payout(stake: int, odds: float) -> int:
+    """Amount returned on a winning bet: stake * decimal odds, rounded."""
+    return int(round(stake * odds))
+
+
+# Bump when the race rules change in a way the bytecode fingerprint below
+# would not catch (e.g. a constant moved to another module)
+MODEL_VERSION = 1
+ODDS_CACHE_SIZE = 512
+# New entries between writes of the on-disk store; the rest go out at exit
+ODDS_CACHE_SAVE_EVERY = 64
+ODDS_CACHE_FILE = os.path.join(CONFIG_DIR, "odds_cache.json")
+
+
+def _fingerprint(code, digest):
+    """Hash the parts of ``code`` that are the same in every process.
+
+    Nested code objects (comprehensions, lambdas) are hashed recursively:
+    their ``repr`` carries a memory address that changes on every start.
+    """
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _fingerprint(const, digest)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+
+def _model_version():
+    """Return ``MODEL_VERSION`` tagged with a fingerprint of the odds model.
+
+    Any edit to the weight, step, probability or odds code, or to the
+    constants they read, changes the fingerprint, so odds cached under
+    an older model are never served.
+    """
+    digest = hashlib.sha1()
+    for fn in (_generate_weights, RaceEngine.step, _bonus_probs, _step_probabilities, _tick_profiles_python,
+               _tick_profiles_numpy, _exact_win_probabilities.__wrapped__, compute_decimal_odds):
+        _fingerprint(fn.__code__, digest)
+    digest.update(repr((HOUSE_EDGE, FINISH_EPSILON)).encode("utf-8"))
+    return f"{MODEL_VERSION}-{digest.hexdigest()[:12]}"
+
+
+class OddsCache:
+    """Bounded LRU of seeded race profiles, optionally persisted to disk.
+
+    Entries are keyed by ``(num_horses, seed, distance)`` under the current
+    model version; a store written by another model version is discarded
+    on load. New entries are written every ``save_every`` misses and at
+    exit, never once per race. ``hits`` and ``misses`` count lookups since
+    creation.
+    """
+
+    def __init__(self, maxsize: int = ODDS_CACHE_SIZE, path: Optional[str] = None,
+                 save_every: int = ODDS_CACHE_SAVE_EVERY):
+        self.maxsize = maxsize
+        self.path = path
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._pending = 0
+        self._at_exit = False
+
+    @staticmethod
+    def _key(num_horses, seed, distance):
+        # JSON keeps 1 and "1" apart and is also the on-disk key format
+        return json.dumps([num_horses, seed, distance])
+
+    def _ensure_loaded(self):
+        if self._version is not None:
+            return
+        self._version = _model_version()
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("model_version") == self._version:
+                for key, entry in data.get("entries", {}).items():
+                    self._entries[key] = entry
+                self._trim()
+        except Exception:
+            pass
+
+    def _trim(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, num_horses, seed, distance):
+        """Return the cached ``{"weights", "odds"}`` entry or None."""
+        self._ensure_loaded()
+        key = self._key(num_horses, seed, distance)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, num_horses, seed, distance, weights, odds):
+        self._ensure_loaded()
+        key = self._key(num_horses, seed, distance)
+        self._entries[key] = {"weights": list(weights), "odds": list(odds)}
+        self._entries.move_to_end(key)
+        self._trim()
+        self._pending += 1
+        if not self.path:
+            return
+        if not self._at_exit:
+            self._at_exit = True
+            atexit.register(self.save)
+        if self._pending >= self.save_every:
+            self.save()
+
+    def save(self):
+        """Write pending entries; a temp file renamed over the store, like the config."""
+        if not self.path or not self._pending:
+            return
+        try:
+            directorio = os.path.dirname(self.path) or "."
+            os.makedirs(directorio, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directorio, prefix=".odds_cache.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"model_version": self._version, "entries": self._entries},
+                        f,
+                        separators=(",", ":"),
+                    )
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._pending = 0
+        except Exception:
+            pass
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self._pending += 1
+        self.save()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+ODDS_CACHE = OddsCache(path=ODDS_CACHE_FILE)
+
+
 def build_race(num_horses: int, seed: Optional[int] = None):
-    """Create a race profile with weights and precomputed odds."""
-    weights = _generate_weights(num_horses, seed)
-    odds = compute_decimal_odds(weights)
+    """Create a race profile with weights and precomputed odds.
+
+    The seed is kept in the profile so ``RaceEngine`` replays the same race.
+    Seeded profiles are served from ``ODDS_CACHE``; unseeded races are new
+    every time and skip it.
+    """
+    distance = 100
+    cached = ODDS_CACHE.get(num_horses, seed, distance) if seed is not None else None
+    if cached is not None:
+        weights, odds = list(cached["weights"]), list(cached["odds"])
+    else:
+        weights = _generate_weights(num_horses, seed)
+        odds = compute_decimal_odds(weights, distance)
+        if seed is not None:
+            ODDS_CACHE.put(num_horses, seed, distance, weights, odds)
     return {
         "weights": weights,
         "odds": odds,
-        "distance": 100,
+        "distance": distance,
         "emoji": "🐴",
+        "seed": seed,
     }
 
 
-def animacion(num_caballos, caballo_usuario, t, race_profile=None, fast=False):
-    posiciones = [0] * num_caballos
-    if race_profile is None:
-        race_profile = build_race(num_caballos)
-    pesos = race_profile.get("weights", [1.0] * num_caballos)
-    distancia = race_profile.get("distance", 100)
-    caballo_emoji = race_profile.get("emoji", "🐴")
-    nombres = [t("horse_name", idx=i + 1) for i in range(num_caballos)]
-    ganador = None
+class RaceEngine:
+    """Tick-by-tick race simulation with its own RNG and no I/O.
 
-    # Normalize weights to probabilities for a small bonus step chance
-    total_peso = sum(pesos) if pesos else 1.0
-    bonus_probs = [max(0.0, min(0.6, w / total_peso)) for w in pesos]
+    Each tick every horse advances a random 0-2 steps, plus one extra step
+    with probability ``min(0.6, w / sum(weights)) * 0.5``. The race ends on
+    the first tick where any horse reaches ``distance``; ties go to the
+    lowest index.
+    """
 
-    while True:
-        clear_screen()
-        cprint(t("title"), "light_blue")
-        print("+" + "-" * (distancia + 15) + "+")
-        for i in range(num_caballos):
-            espacio = " " * posiciones[i]
-            linea_meta = "|" if posiciones[i] >= distancia else ""
-            nombre = f">>{nombres[i]}<<" if i + 1 == caballo_usuario else nombres[i]
-            print(f"| {nombre:<14} {espacio}{caballo_emoji}{linea_meta}")
-        print("+" + "-" * (distancia + 15) + "+")
-
-        if max(posiciones) >= distancia:
-            ganador = posiciones.index(max(posiciones)) + 1
-            break
+    def __init__(self, weights, distance: int = 100, seed=None, rng: Optional[random.Random] = None):
+        self.weights = list(weights)
+        self.distance = distance
+        # A shared ``rng`` lets bulk simulations avoid reseeding per race
+        self._rng = rng if rng is not None else random.Random(seed)
+        self.bonus_probs = _bonus_probs(self.weights)
+        self._bonus_chance = [p * 0.5 for p in self.bonus_probs]
+        self.positions = [0] * len(self.weights)
+        self.finish_ticks = [None] * len(self.weights)
+        self.ticks = 0
 
-        if not fast:
-            time.sleep(0.08)
+    @classmethod
+    def from_profile(cls, race_profile, num_horses: Optional[int] = None):
+        """Build an engine from a ``build_race`` profile."""
+        n = num_horses if num_horses is not None else len(race_profile.get("weights", []))
+        return cls(
+            race_profile.get("weights", [1.0] * n),
+            distance=race_profile.get("distance", 100),
+            seed=race_profile.get("seed"),
+        )
 
-        # Advance positions with a small bias from weights
+    @property
+    def finished(self) -> bool:
+        return bool(self.positions) and max(self.positions) >= self.distance
+
+    @property
+    def winner(self) -> Optional[int]:
+        """1-based index of the winning horse, or None while running."""
+        if not self.finished:
+            return None
+        return self.positions.index(max(self.positions)) + 1
+
+    @property
+    def order(self):
+        """1-based horses by final position, winner first; ties keep index order."""
+        return sorted(range(1, len(self.positions) + 1), key=lambda h: -self.positions[h - 1])
+
+    def step(self):
+        """Advance every horse by one tick and return the new positions."""
+        if self.finished:
+            return self.positions
+        rand = self._rng.random
+        distance = self.distance
+        self.ticks += 1
         nuevas = []
-        for i, pos in enumerate(posiciones):
-            paso = random.randint(0, 2)
-            if random.random() < bonus_probs[i] * 0.5:
-                paso += 1
-            nuevas.append(pos + paso)
-        posiciones = nuevas
-
-    clear_screen()
-    cprint(t("title"), "light_blue")
+        for i, pos in enumerate(self.positions):
+            # Uniform 0-2 step; int(rand() * 3) is randint(0, 2) without its overhead
+            pos += int(rand() * 3)
+            if rand() < self._bonus_chance[i]:
+                pos += 1
+            if pos >= distance and self.finish_ticks[i] is None:
+                self.finish_ticks[i] = self.ticks
+            nuevas.append(pos)
+        self.positions = nuevas
+        return self.positions
+
+    def run_to_completion(self):
+        """Run the remaining ticks; return ``(winner, finish_ticks)``."""
+        while not self.finished:
+            self.step()
+        return self.winner, list(self.finish_ticks)
+
+
+# 12.5 FPS is the original 80 ms per tick
+DEFAULT_FPS = 12.5
+
+
+class FrameScheduler:
+    """Pace a frame loop at a fixed rate against a monotonic clock.
+
+    ``wait()`` sleeps only for what is left of the current frame. When the
+    loop has fallen behind it does not sleep and instead returns how many
+    ticks are due, so the caller skips drawing those frames and the race
+    keeps its wall-clock length. ``fps=None`` runs unthrottled.
+    """
+
+    def __init__(self, fps: Optional[float] = DEFAULT_FPS, clock=time.perf_counter, sleep=time.sleep):
+        self.period = 1.0 / fps if fps else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._start = None
+        self._end = None
+        self._next = None
+        self.frames = 0
+        self.dropped = 0
+
+    def start(self):
+        self._start = self._next = self._clock()
+        self._end = None
 
-    print("+" + "-" * (distancia + 15) + "+")
-    for i in range(num_caballos):
+    def wait(self) -> int:
+        """Mark a frame as drawn and block until the next one is due.
+
+        Returns the number of ticks to advance: 1, plus one per dropped frame.
+        """
+        self.frames += 1
+        if not self.period:
+            return 1
+        self._next += self.period
+        now = self._clock()
+        if now < self._next:
+            self._sleep(self._next - now)
+            return 1
+        late = int((now - self._next) // self.period)
+        self._next += late * self.period
+        self.dropped += late
+        return 1 + late
+
+    def stop(self):
+        """Mark the final frame as drawn and stop the clock."""
+        self.frames += 1
+        self._end = self._clock()
+
+    def stats(self):
+        end = self._end if self._end is not None else self._clock()
+        elapsed = end - self._start if self._start is not None else 0.0
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "elapsed": elapsed,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "target_fps": 1.0 / self.period if self.period else None,
+        }
+
+
+def _track_lines(posiciones, nombres, caballo_usuario, distancia, caballo_emoji, t, ganador=None):
+    borde = "+" + "-" * (distancia + 15) + "+"
+    lines = [borde]
+    for i in range(len(posiciones)):
         espacio = " " * posiciones[i]
         linea_meta = "|" if posiciones[i] >= distancia else ""
-        ganador_texto = t("winner_suffix") if i == ganador - 1 else ""
+        ganador_texto = t("winner_suffix") if ganador is not None and i == ganador - 1 else ""
         nombre = f">>{nombres[i]}<<" if i + 1 == caballo_usuario else nombres[i]
-        print(f"| {nombre:<14} {espacio}{caballo_emoji}{linea_meta}{ganador_texto}")
-    print("+" + "-" * (distancia + 15) + "+")
-    print(t("winner_announcement", winner=ganador))
-    return ganador
+        lines.append(f"| {nombre:<14} {espacio}{caballo_emoji}{linea_meta}{ganador_texto}")
+    lines.append(borde)
+    return lines
+
+
+def _print_track(posiciones, nombres, caballo_usuario, distancia, caballo_emoji, t, ganador=None):
+    cprint(t("title"), "light_blue")
+    for line in _track_lines(posiciones, nombres, caballo_usuario, distancia, caballo_emoji, t, ganador):
+        print(line)
+
+
+def animacion(
+    num_caballos,
+    caballo_usuario,
+    t,
+    race_profile=None,
+    fast=False,
+    renderer=None,
+    fps=DEFAULT_FPS,
+    scheduler=None,
+    instant=False,
+    turbo=1,
+):
+    """Animate a race and return the 1-based winner.
+
+    On a terminal the race is drawn by a ``FrameRenderer`` (pass one to
+    read its stats); otherwise every tick is cleared and reprinted. Frames
+    are paced by a ``FrameScheduler`` at ``fps`` unless ``fast``, and each
+    frame covers ``turbo`` ticks. ``instant`` skips straight to the final
+    board.
+    """
+    if race_profile is None:
+        race_profile = build_race(num_caballos)
+    engine = RaceEngine.from_profile(race_profile, num_caballos)
+    distancia = engine.distance
+    caballo_emoji = race_profile.get("emoji", "🐴")
+    nombres = [t("horse_name", idx=i + 1) for i in range(num_caballos)]
+
+    if instant:
+        engine.run_to_completion()
+        ganador = engine.winner
+        _print_track(engine.positions, nombres, caballo_usuario, distancia, caballo_emoji, t, ganador=ganador)
+        print(t("winner_announcement", winner=ganador))
+        return ganador
+
+    if renderer is None and sys.stdout.isatty():
+        renderer = FrameRenderer()
+    if scheduler is None:
+        scheduler = FrameScheduler(None if fast else fps)
+    turbo = max(1, int(turbo))
 
+    def avanzar():
+        for _ in range(scheduler.wait() * turbo):
+            engine.step()
 
+    scheduler.start()
+    if renderer is not None:
+        titulo = t("title")
+        cabecera = [colored(titulo.rstrip("\n"), "light_blue")] + [""] * titulo.count("\n")
+        with renderer:
+            while True:
+                renderer.draw(
+                    cabecera
+                    + _track_lines(engine.positions, nombres, caballo_usuario, distancia, caballo_emoji, t)
+                )
+                if engine.finished:
+                    break
+                avanzar()
+        # Back on the main screen: leave the final board in the scrollback
+        sys.stdout.write("\x1b[H\x1b[2J")
+    else:
+        while True:
+            clear_screen()
+            _print_track(engine.positions, nombres, caballo_usuario, distancia, caballo_emoji, t)
+
+            if engine.finished:
+                break
+
+            avanzar()
+        clear_screen()
+    scheduler.stop()
+
+    ganador = engine.winner
+    _print_track(engine.positions, nombres, caballo_usuario, distancia, caballo_emoji, t, ganador=ganador)
+    print(t("winner_announcement", winner=ganador))
+    if not fast:
+        stats = scheduler.stats()
+        print(t("race_stats", fps=stats["fps"], target=stats["target_fps"] or 0.0, dropped=stats["dropped"]))
+    return ganador
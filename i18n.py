@@ -34,6 +34,15 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "fast_off": "Modo rápido desactivado.",
         "set_horses": "Número de caballos establecido a {n}.",
         "menu_toggle_fast": "4) Alternar modo rápido",
+        "sim_header": "Simulación de {races} carreras:",
+        "sim_line": "{idx}) {name}: {wins} victorias ({pct:.2f}%), cuota {odds}x, retorno {ret:.3f}",
+        "sim_footer": "Duración media: {ticks:.1f} ticks | {rate:.0f} carreras/s ({elapsed:.2f}s)",
+        "race_stats": "{fps:.1f}/{target:.1f} FPS, {dropped} cuadros omitidos",
+        "roi_line": "Últimas {rounds} rondas: apostado ${staked}, pagado ${paid}, neto ${net}, ROI {roi:.2%}",
+        "script_summary": "{rounds} rondas, {wins} ganadas: apostado ${staked}, pagado ${paid}, neto ${net}, saldo ${balance} | {rounds_per_sec:.0f} rondas/s ({elapsed:.2f}s)",
+        "script_invalid": "Apuesta o archivo de estrategia inválido: {error}",
+        "serve_listening": "Hipódromo escuchando en {host}:{port} (Ctrl+C para salir)",
+        "daemon_running": "El demonio de hipodromo ya está en marcha",
     },
     "en": {
         "title": "Hippodrome v0.3\n",
@@ -68,6 +77,15 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         "fast_off": "Fast mode disabled.",
         "set_horses": "Number of horses set to {n}.",
         "menu_toggle_fast": "4) Toggle fast mode",
+        "sim_header": "Simulated {races} races:",
+        "sim_line": "{idx}) {name}: {wins} wins ({pct:.2f}%), odds {odds}x, return {ret:.3f}",
+        "sim_footer": "Mean length: {ticks:.1f} ticks | {rate:.0f} races/s ({elapsed:.2f}s)",
+        "race_stats": "{fps:.1f}/{target:.1f} FPS, {dropped} frames dropped",
+        "roi_line": "Last {rounds} rounds: staked ${staked}, paid ${paid}, net ${net}, ROI {roi:.2%}",
+        "script_summary": "{rounds} rounds, {wins} won: staked ${staked}, paid ${paid}, net ${net}, balance ${balance} | {rounds_per_sec:.0f} rounds/s ({elapsed:.2f}s)",
+        "script_invalid": "Invalid bet or strategy file: {error}",
+        "serve_listening": "Hipodromo listening on {host}:{port} (Ctrl+C to quit)",
+        "daemon_running": "The hipodromo daemon is already running",
     },
 }
 
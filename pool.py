@@ -0,0 +1,76 @@
+import math
+
+from game import HOUSE_EDGE, payout
+
+# Pool odds are cut down to this step; the remainder ("breakage") goes to the house
+BREAKAGE = 0.01
+# A winning ticket at least returns its stake, even if the house adds to the pool
+MIN_POOL_ODDS = 1.0
+
+
+class Pool:
+    """Pari-mutuel win pool for one race.
+
+    Each horse's odds are the whole pool, less the ``takeout``, divided by
+    the money on that horse. Running totals make placing, replacing or
+    withdrawing a bet and reading any horse's odds O(1), so live odds can
+    be shown while bets arrive. Bets are keyed by their owner (one per key).
+    """
+
+    def __init__(self, num_horses: int, takeout: float = HOUSE_EDGE, breakage: float = BREAKAGE):
+        self.num_horses = num_horses
+        self.takeout = takeout
+        self.breakage = breakage
+        self.totals = [0] * num_horses
+        self.total = 0
+        self._bets = {}
+        # Per-horse bets so settlement walks only the winner's pool
+        self._por_caballo = [{} for _ in range(num_horses)]
+
+    def __len__(self):
+        return len(self._bets)
+
+    def add(self, horse: int, stake: int, key=None):
+        """Place ``stake`` on 1-based ``horse``, replacing ``key``'s last bet."""
+        if not 1 <= horse <= self.num_horses or stake < 1:
+            raise ValueError(f"{horse}:{stake}")
+        if key is None:
+            key = object()
+        self.remove(key)
+        self._bets[key] = (horse, stake)
+        self._por_caballo[horse - 1][key] = stake
+        self.totals[horse - 1] += stake
+        self.total += stake
+        return key
+
+    def remove(self, key):
+        """Withdraw ``key``'s bet, if any."""
+        bet = self._bets.pop(key, None)
+        if bet is None:
+            return
+        horse, stake = bet
+        del self._por_caballo[horse - 1][key]
+        self.totals[horse - 1] -= stake
+        self.total -= stake
+
+    def odds(self, horse: int) -> float:
+        """Current decimal odds of 1-based ``horse``; 0.0 while nobody backs it."""
+        backed = self.totals[horse - 1]
+        if not backed:
+            return 0.0
+        neto = self.total * (1.0 - self.takeout)
+        steps = math.floor(neto / backed / self.breakage + 1e-9)
+        return round(max(MIN_POOL_ODDS, steps * self.breakage), 2)
+
+    def all_odds(self):
+        return [self.odds(horse) for horse in range(1, self.num_horses + 1)]
+
+    def settle(self, winner: int):
+        """``{key: payout}`` for the winning bets, in one pass over their pool.
+
+        Payouts round like fixed-odds ones (``game.payout``) at the final
+        odds. Money on the other horses has nothing to settle; if nobody
+        backed the winner the whole pool goes to the house.
+        """
+        odds = self.odds(winner)
+        return {key: payout(stake, odds) for key, stake in self._por_caballo[winner - 1].items()}
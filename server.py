@@ -0,0 +1,341 @@
+import time
+import random
+import asyncio
+
+from game import DEFAULT_FPS, RaceEngine, build_race
+from i18n import translator
+from pool import Pool
+
+HOST = "127.0.0.1"
+PORT = 7878
+# Seconds bets stay open before each race
+BET_WINDOW = 10.0
+# Above this many unsent bytes a client is paused and skips race frames
+FRAME_HIGH_WATER = 64 * 1024
+# A client this far behind is dropped; it cannot even take control lines
+MAX_BUFFER = 1024 * 1024
+MAX_LINE = 1024
+# Pari-mutuel rounds send live odds at most this often while bets arrive
+ODDS_INTERVAL = 0.5
+
+
+class Client(asyncio.Protocol):
+    """One connected bettor speaking the line protocol.
+
+    Client to server: ``BET <horse> <amount>``, ``BALANCE``, ``QUIT``.
+    Server to client: ``HELLO <id> <balance>``, ``RACE <round> <horses>
+    <odds,...> <window>``, ``OK <horse> <amount>``, ``ERR <reason>``,
+    ``ODDS <odds,...>`` (pari-mutuel only), ``GO``, ``FRAME <tick>
+    <pos,...>``, ``WINNER <horse>``, ``RESULT <stake> <payout> <balance>``
+    and ``BALANCE <balance>``.
+
+    Writes never block the race: once asyncio pauses the transport at
+    ``FRAME_HIGH_WATER`` the client skips frames until it catches up.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.sesion = server.nueva_sesion()
+        self.transport = None
+        self.apuesta = None
+        self.paused = False
+        self.dropped = 0
+        self._buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.server.high_water)
+        self.server.conectar(self)
+        self.send(f"HELLO {self.sesion.id} {self.sesion.dinero}\n".encode())
+
+    def connection_lost(self, exc):
+        # An open bet is not staked yet, so leaving during the window costs
+        # nothing; once it closes the stake is taken and the bet stands
+        self.server.desconectar(self)
+        # Once the window closes the pool and its odds are final
+        if self.server.pool is not None and self.server.abierta:
+            self.server.pool.remove(self.sesion.id)
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+
+    def data_received(self, data):
+        self._buffer += data
+        while b"\n" in self._buffer:
+            linea, self._buffer = self._buffer.split(b"\n", 1)
+            self.server.comando(self, linea.decode("utf-8", "replace").split())
+        if len(self._buffer) > MAX_LINE:
+            self.transport.close()
+
+    def send(self, data):
+        if self.transport.is_closing():
+            return
+        if self.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.transport.abort()
+            return
+        self.transport.write(data)
+
+    def send_frame(self, data):
+        if self.paused:
+            self.dropped += 1
+            self.server._stats["frames_dropped"] += 1
+            return
+        self.send(data)
+
+
+class RaceServer:
+    """Shared races for many bettors over asyncio TCP.
+
+    Each round opens a betting window, then runs one ``RaceEngine`` race and
+    broadcasts every frame, encoded once, to every connected client. Bets
+    settle through each player's in-memory ``Session``, exactly like
+    ``jugar``. Balances live as long as the connection.
+
+    With ``parimutuel`` the odds come from a ``Pool`` of this round's bets
+    instead of the fixed odds of ``build_race``; they are broadcast live
+    during the window and settled at their final value.
+    """
+
+    def __init__(self, host=HOST, port=PORT, n_horses=5, seed=None, window=BET_WINDOW, fps=DEFAULT_FPS,
+                 dinero=5000, lang="es", high_water=FRAME_HIGH_WATER, parimutuel=False, history=False):
+        self.host = host
+        self.port = port
+        self.n_horses = n_horses
+        self.seed = seed
+        self.window = window
+        self.period = 1.0 / fps if fps else 0.0
+        self.dinero = dinero
+        self.t = translator(lang)
+        self.lang = lang
+        self.high_water = high_water
+        self.clients = set()
+        self.ronda = 0
+        self.abierta = False
+        self.parimutuel = parimutuel
+        self.history = history
+        self.pool = None
+        self._server = None
+        self._rng = random.Random()
+        self._hay_clientes = None
+        self._stats = {"rounds": 0, "bets": 0, "frames": 0, "frames_dropped": 0, "broadcast": 0.0,
+                       "broadcast_max": 0.0, "settle": 0.0, "peak_clients": 0}
+
+    def nueva_sesion(self):
+        from Hipodromo import Session
+        return Session(dinero=self.dinero, n_horses=self.n_horses, lang=self.lang, t=self.t, history=self.history)
+
+    def conectar(self, client):
+        self.clients.add(client)
+        self._stats["peak_clients"] = max(self._stats["peak_clients"], len(self.clients))
+        if self._hay_clientes is not None:
+            self._hay_clientes.set()
+
+    def desconectar(self, client):
+        self.clients.discard(client)
+        if not self.clients and self._hay_clientes is not None:
+            self._hay_clientes.clear()
+
+    def comando(self, client, partes):
+        if not partes:
+            return
+        orden = partes[0].upper()
+        if orden == "BET":
+            client.send(self._apostar(client, partes[1:]).encode())
+        elif orden == "BALANCE":
+            client.send(f"BALANCE {client.sesion.dinero}\n".encode())
+        elif orden == "QUIT":
+            client.transport.close()
+        else:
+            client.send(b"ERR command\n")
+
+    def _apostar(self, client, args):
+        if not self.abierta:
+            return "ERR closed\n"
+        try:
+            caballo, monto = int(args[0]), int(args[1])
+        except (IndexError, ValueError):
+            return "ERR syntax\n"
+        if not 1 <= caballo <= self.n_horses:
+            return "ERR horse\n"
+        if not 1 <= monto <= client.sesion.dinero:
+            return "ERR amount\n"
+        # One bet per round; betting again replaces it
+        client.apuesta = (caballo, monto)
+        if self.pool is not None:
+            self.pool.add(caballo, monto, client.sesion.id)
+        self._stats["bets"] += 1
+        return f"OK {caballo} {monto}\n"
+
+    def broadcast(self, data):
+        """Send one pre-encoded frame to every client that keeps up."""
+        start = time.perf_counter()
+        for client in list(self.clients):
+            client.send_frame(data)
+        elapsed = time.perf_counter() - start
+        self._stats["frames"] += 1
+        self._stats["broadcast"] += elapsed
+        self._stats["broadcast_max"] = max(self._stats["broadcast_max"], elapsed)
+
+    def anunciar(self, data):
+        """Send a control line every client must get, even a paused one."""
+        for client in list(self.clients):
+            client.send(data)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        # Created here so it belongs to the running loop
+        self._hay_clientes = asyncio.Event()
+        self._server = await loop.create_server(lambda: Client(self), self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for client in list(self.clients):
+                client.transport.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def run_round(self):
+        """Take bets, run and broadcast one race, settle; return the winner."""
+        self.ronda += 1
+        if self.seed is None:
+            semilla = self._rng.getrandbits(64)
+            race = build_race(self.n_horses)
+        else:
+            semilla = f"{self.seed}:{self.ronda}"
+            race = build_race(self.n_horses, semilla)
+        odds = race["odds"]
+        for client in self.clients:
+            client.apuesta = None
+        if self.parimutuel:
+            self.pool = Pool(self.n_horses)
+
+        self.abierta = True
+        # Pari-mutuel rounds open with the fixed odds as a morning line
+        self.anunciar(
+            f"RACE {self.ronda} {self.n_horses} {','.join(f'{o:.2f}' for o in odds)} {self.window:g}\n".encode()
+        )
+        await self._ventana()
+        self.abierta = False
+        self._cobrar()
+        if self.pool is not None:
+            odds = self.pool.all_odds()
+            self.anunciar(self._linea_odds())
+        self.anunciar(b"GO\n")
+
+        loop = asyncio.get_running_loop()
+        engine = RaceEngine(race["weights"], race["distance"], seed=semilla)
+        siguiente = loop.time()
+        while True:
+            self.broadcast(f"FRAME {engine.ticks} {','.join(map(str, engine.positions))}\n".encode())
+            if engine.finished:
+                break
+            siguiente += self.period
+            await asyncio.sleep(max(0.0, siguiente - loop.time()))
+            engine.step()
+        ganador = engine.winner
+        self.anunciar(f"WINNER {ganador}\n".encode())
+
+        start = time.perf_counter()
+        # One pass over the winner's pool; everyone else just loses the stake
+        pagos = self.pool.settle(ganador) if self.pool is not None else None
+        # Players who left mid-race already paid in; their payouts stay with the house
+        for client in list(self.clients):
+            if client.apuesta is None:
+                continue
+            caballo, monto = client.apuesta
+            client.apuesta = None
+            _, ganancia = client.sesion.apostar(caballo, monto, race, odds, lambda perfil: ganador, semilla, pagos,
+                                                cobrada=True)
+            client.send(f"RESULT {monto} {ganancia} {client.sesion.dinero}\n".encode())
+        self.pool = None
+        self._stats["settle"] += time.perf_counter() - start
+        self._stats["rounds"] += 1
+        return ganador
+
+    def _cobrar(self):
+        """Take every open bet's stake as the window closes, before anyone can leave."""
+        for client in list(self.clients):
+            if client.apuesta is None:
+                continue
+            caballo, monto = client.apuesta
+            # The player may have less than the bet if it changed mid-window
+            monto = min(monto, client.sesion.dinero)
+            if monto < 1:
+                client.apuesta = None
+                if self.pool is not None:
+                    self.pool.remove(client.sesion.id)
+                continue
+            if self.pool is not None and monto != client.apuesta[1]:
+                self.pool.add(caballo, monto, client.sesion.id)
+            client.sesion.cobrar(monto)
+            client.apuesta = (caballo, monto)
+
+    async def _ventana(self):
+        """Keep bets open for the window, sending pool odds as they move."""
+        if self.pool is None:
+            await asyncio.sleep(self.window)
+            return
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + self.window
+        enviado = None
+        while True:
+            restante = fin - loop.time()
+            if restante <= 0:
+                return
+            await asyncio.sleep(min(ODDS_INTERVAL, restante))
+            actual = (self.pool.total, tuple(self.pool.totals))
+            if actual != enviado:
+                enviado = actual
+                self.anunciar(self._linea_odds())
+
+    def _linea_odds(self):
+        return f"ODDS {','.join(f'{o:.2f}' for o in self.pool.all_odds())}\n".encode()
+
+    async def serve(self, rondas=None):
+        """Run rounds while anyone is connected; ``rondas`` bounds them."""
+        if self._server is None:
+            await self.start()
+        jugadas = 0
+        try:
+            while rondas is None or jugadas < rondas:
+                await self._hay_clientes.wait()
+                await self.run_round()
+                jugadas += 1
+        finally:
+            await self.close()
+
+    def stats(self):
+        frames = max(1, self._stats["frames"])
+        return {
+            "clients": len(self.clients),
+            "peak_clients": self._stats["peak_clients"],
+            "rounds": self._stats["rounds"],
+            "bets": self._stats["bets"],
+            "frames": self._stats["frames"],
+            "frames_dropped": self._stats["frames_dropped"],
+            "broadcast_ms": self._stats["broadcast"] / frames * 1000,
+            "broadcast_max_ms": self._stats["broadcast_max"] * 1000,
+            "settle_ms": self._stats["settle"] * 1000,
+        }
+
+
+def serve(host=HOST, port=PORT, **kwargs):
+    """Run a ``RaceServer`` until interrupted."""
+    server = RaceServer(host, port, **kwargs)
+
+    async def run():
+        await server.start()
+        print(server.t("serve_listening", host=server.host, port=server.port))
+        await server.serve()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return server.stats()
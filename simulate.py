@@ -0,0 +1,163 @@
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional extra: pip install "hipodromo[fast]"
+    np = None
+
+from game import RaceEngine, build_race
+
+# Races advanced together per NumPy batch; bounds memory at (horses x batch)
+BATCH_SIZE = 32768
+
+
+def simulate_races(num_races: int, num_horses: int = 5, seed=None, race_profile=None, backend: str = "auto"):
+    """Run ``num_races`` headless races of one race profile and tally results.
+
+    The profile comes from ``build_race(num_horses, seed)`` unless given, so
+    the odds shown in ``jugar`` are the ones being checked. All races draw
+    from a single RNG seeded with ``seed``, which makes a run reproducible.
+    """
+    if race_profile is None:
+        race_profile = build_race(num_horses, seed)
+    weights = race_profile.get("weights", [1.0] * num_horses)
+    distance = race_profile.get("distance", 100)
+    odds = race_profile.get("odds", [])
+
+    start = time.perf_counter()
+    wins, total_ticks = simulate_batch(num_races, weights, distance, seed, backend)
+    elapsed = time.perf_counter() - start
+
+    return _summary(wins, total_ticks, num_races, elapsed, odds)
+
+
+def simulate_batch(num_races: int, weights, distance: int = 100, seed=None, backend: str = "auto"):
+    """Return ``(wins, total_ticks)`` for ``num_races`` races of ``weights``.
+
+    ``backend`` is ``"numpy"``, ``"python"`` or ``"auto"`` (NumPy when it is
+    installed). Both follow ``RaceEngine``'s tick rules but draw from
+    different RNGs, so a seed is reproducible per backend only.
+    """
+    if backend == "auto":
+        backend = "numpy" if np is not None else "python"
+    if backend == "numpy":
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        return _simulate_numpy(num_races, weights, distance, seed)
+    return _simulate_python(num_races, weights, distance, seed)
+
+
+def _simulate_python(num_races, weights, distance, seed):
+    rng = random.Random(seed)
+    wins = [0] * len(weights)
+    total_ticks = 0
+    if not weights:
+        return wins, total_ticks
+    for _ in range(num_races):
+        engine = RaceEngine(weights, distance, rng=rng)
+        winner, _ = engine.run_to_completion()
+        wins[winner - 1] += 1
+        total_ticks += engine.ticks
+    return wins, total_ticks
+
+
+def _simulate_numpy(num_races, weights, distance, seed):
+    """Advance a (horses x races) position matrix one tick at a time.
+
+    Per tick a horse moves 0-3 cells: the uniform 0-2 step plus the bonus
+    step with chance ``b``. That is P(0) = (1 - b) / 3, P(1) = P(2) = 1 / 3
+    and P(3) = b / 3, so one uniform per horse compared against three
+    cumulative thresholds draws the whole tick. Finished races are dropped
+    from the matrix as soon as they end.
+    """
+    num_horses = len(weights)
+    wins = np.zeros(num_horses, dtype=np.int64)
+    total_ticks = 0
+    if not num_horses:
+        return wins.tolist(), total_ticks
+
+    engine = RaceEngine(weights, distance)
+    bonus = np.asarray(engine.bonus_probs, dtype=np.float64) * 0.5
+    thresholds = np.stack([(1 - bonus) / 3, (2 - bonus) / 3, 1 - bonus / 3])
+    thresholds = thresholds.astype(np.float32)[:, :, None]
+    # Positions stop at most 3 cells past the line, so int8 fits short tracks
+    dtype = np.int8 if distance + 3 <= np.iinfo(np.int8).max else np.int32
+    # No race can end before every tick so far has been a 3-cell move
+    min_ticks = -(-distance // 3)
+
+    rng = np.random.default_rng(_numpy_seed(seed))
+    left = num_races
+    while left > 0:
+        n = min(BATCH_SIZE, left)
+        left -= n
+        pos = np.zeros((num_horses, n), dtype=dtype)
+        u = np.empty(pos.shape, dtype=np.float32)
+        moved = np.empty(pos.shape, dtype=bool)
+        tick = 0
+        while pos.shape[1]:
+            rng.random(out=u, dtype=np.float32)
+            for k in range(3):
+                np.greater_equal(u, thresholds[k], out=moved)
+                pos += moved
+            tick += 1
+            if tick < min_ticks:
+                continue
+            done = pos.max(axis=0) >= distance
+            finished = np.count_nonzero(done)
+            if finished:
+                # argmax picks the first maximum: ties go to the lowest index
+                wins += np.bincount(pos[:, done].argmax(axis=0), minlength=num_horses)
+                total_ticks += tick * finished
+                pos = pos[:, ~done]
+                u = np.empty(pos.shape, dtype=np.float32)
+                moved = np.empty(pos.shape, dtype=bool)
+    return wins.tolist(), total_ticks
+
+
+def _numpy_seed(seed):
+    """Map any ``random.Random`` seed (int, str, None) to a NumPy seed."""
+    if seed is None or (isinstance(seed, int) and seed >= 0):
+        return seed
+    return random.Random(seed).getrandbits(64)
+
+
+def _summary(wins, total_ticks, num_races, elapsed, odds):
+    n = max(1, num_races)
+    win_rates = [w / n for w in wins]
+    return {
+        "races": num_races,
+        "wins": wins,
+        "win_rates": win_rates,
+        "odds": list(odds),
+        # Expected payout per unit staked on each horse (1.0 = break even)
+        "returns": [p * o for p, o in zip(win_rates, odds)],
+        "mean_ticks": total_ticks / n,
+        "elapsed": elapsed,
+        "races_per_sec": num_races / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def print_summary(summary, t):
+    print(t("sim_header", races=summary["races"]))
+    odds = summary["odds"]
+    for i, wins in enumerate(summary["wins"]):
+        print(
+            t(
+                "sim_line",
+                idx=i + 1,
+                name=t("horse_name", idx=i + 1),
+                wins=wins,
+                pct=summary["win_rates"][i] * 100,
+                odds=odds[i] if i < len(odds) else 0.0,
+                ret=summary["returns"][i] if i < len(summary["returns"]) else 0.0,
+            )
+        )
+    print(
+        t(
+            "sim_footer",
+            ticks=summary["mean_ticks"],
+            rate=summary["races_per_sec"],
+            elapsed=summary["elapsed"],
+        )
+    )
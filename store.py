@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import itertools
+from contextlib import contextmanager
+
+from config import CONFIG_DIR
+
+HISTORY_DB = os.path.join(CONFIG_DIR, "history.sqlite3")
+# Rounds buffered in memory before one transaction writes them all
+BATCH_SIZE = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    player TEXT NOT NULL,
+    num_horses INTEGER NOT NULL,
+    distance INTEGER NOT NULL,
+    seed TEXT,
+    weights TEXT NOT NULL,
+    odds TEXT NOT NULL,
+    winner INTEGER
+);
+CREATE TABLE IF NOT EXISTS bets (
+    id INTEGER PRIMARY KEY,
+    round_id TEXT NOT NULL REFERENCES rounds(id),
+    ts REAL NOT NULL,
+    player TEXT NOT NULL,
+    horse INTEGER NOT NULL,
+    stake INTEGER NOT NULL,
+    payout INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS rounds_ts ON rounds(ts);
+CREATE INDEX IF NOT EXISTS rounds_horses_ts ON rounds(num_horses, ts);
+CREATE INDEX IF NOT EXISTS rounds_player_ts ON rounds(player, ts);
+CREATE INDEX IF NOT EXISTS bets_round ON bets(round_id);
+CREATE INDEX IF NOT EXISTS bets_player_ts ON bets(player, ts);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    round TEXT,
+    kind TEXT NOT NULL,
+    delta INTEGER NOT NULL,
+    balance INTEGER NOT NULL
+);
+"""
+
+# Applied in order to databases whose PRAGMA user_version is below their index + 1
+_MIGRATIONS = [
+    """
+    ALTER TABLE bets ADD COLUMN kind TEXT NOT NULL DEFAULT 'win';
+    CREATE TABLE IF NOT EXISTS balances (
+        player TEXT PRIMARY KEY,
+        balance INTEGER NOT NULL
+    );
+    """,
+]
+
+
+def default_player():
+    try:
+        import getpass
+        return getpass.getuser()
+    except Exception:
+        return "player"
+
+
+def _connect(path):
+    """Open ``path`` in WAL mode with the current schema."""
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Writers queue on SQLite's own lock instead of failing at once
+    conn = sqlite3.connect(path, timeout=30)
+    for _ in range(100):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            break
+        except sqlite3.OperationalError:
+            # Switching a new file to WAL does not wait out the busy timeout
+            time.sleep(0.02)
+    else:
+        conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL keeps commits consistent; only the last ones can be lost
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < len(_MIGRATIONS):
+        # Concurrent first opens queue on the write lock and re-read the
+        # version inside it, so each migration runs exactly once
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(_MIGRATIONS[version:], start=version + 1):
+                for statement in script.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {i}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        conn.isolation_level = ""
+    return conn
+
+
+def _tolist(column):
+    # NumPy columns convert in C; plain sequences are used as they are
+    return column.tolist() if hasattr(column, "tolist") else column
+
+
+class HistoryStore:
+    """SQLite history of races, bets and payouts.
+
+    Rows are buffered and written ``batch_size`` rounds at a time inside one
+    transaction; ``flush()`` (also run by ``close()`` and at exit) writes the
+    rest. The database runs in WAL mode so readers never block the game.
+    """
+
+    def __init__(self, path=None, batch_size=BATCH_SIZE):
+        self.path = path or HISTORY_DB
+        self.batch_size = max(1, int(batch_size))
+        self._conn = _connect(self.path)
+        self._rounds = []
+        self._bets = []
+        atexit.register(self.close)
+
+    def _round_row(self, round_id, race_profile, winner, player, ts):
+        weights = list(race_profile.get("weights", []))
+        seed = race_profile.get("seed")
+        return (
+            str(round_id),
+            ts,
+            player,
+            len(weights),
+            int(race_profile.get("distance", 100)),
+            None if seed is None else str(seed),
+            json.dumps(weights, separators=(",", ":")),
+            json.dumps(list(race_profile.get("odds", [])), separators=(",", ":")),
+            winner,
+        )
+
+    def record_round(self, round_id, race_profile, winner, bets=(), player=None, ts=None):
+        """Queue one race and its bets as ``(horse, stake, payout)`` tuples."""
+        ts = time.time() if ts is None else ts
+        player = player or default_player()
+        self._rounds.append(self._round_row(round_id, race_profile, winner, player, ts))
+        for horse, stake, payout in bets:
+            self._bets.append((str(round_id), ts, player, int(horse), int(stake), int(payout)))
+        if len(self._rounds) >= self.batch_size:
+            self.flush()
+
+    def record_settlement(self, round_id, race_profile, winner, settlement, ts=None):
+        """Write a ``settle.settle`` batch and its balance deltas in one transaction.
+
+        The round is stored with the house as its player; each bet keeps its
+        own player, and every player's net goes to ``balances``. All bets are
+        to win, which is the ``kind`` column's default.
+
+        This write is not covered by the 100 ms settlement target: 100k bets
+        take about 0.5 s here, almost all of it SQLite maintaining the
+        ``bets`` indexes row by row.
+        """
+        ts = time.time() if ts is None else ts
+        round_id = str(round_id)
+        bets = zip(
+            itertools.repeat(round_id),
+            itertools.repeat(ts),
+            map(str, _tolist(settlement["players"])),
+            _tolist(settlement["horses"]),
+            _tolist(settlement["stakes"]),
+            _tolist(settlement["payouts"]),
+        )
+        self.flush()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._round_row(round_id, race_profile, winner, "house", ts),
+            )
+            self._conn.executemany(
+                "INSERT INTO bets (round_id, ts, player, horse, stake, payout) VALUES (?, ?, ?, ?, ?, ?)",
+                bets,
+            )
+            self._conn.executemany(
+                "INSERT INTO balances (player, balance) VALUES (?, ?) "
+                "ON CONFLICT(player) DO UPDATE SET balance = balance + excluded.balance",
+                ((str(player), int(delta)) for player, delta in settlement["balance_deltas"].items()),
+            )
+
+    def balance(self, player):
+        """Net of every settled batch for ``player`` (0 if never settled)."""
+        row = self._conn.execute("SELECT balance FROM balances WHERE player = ?", (str(player),)).fetchone()
+        return row[0] if row else 0
+
+    def flush(self):
+        if not self._rounds and not self._bets:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._rounds
+            )
+            self._conn.executemany(
+                "INSERT INTO bets (round_id, ts, player, horse, stake, payout) VALUES (?, ?, ?, ?, ?, ?)",
+                self._bets,
+            )
+        self._rounds = []
+        self._bets = []
+
+    def roi(self, last=10000, player=None):
+        """Stakes, payouts and return on investment over the last rounds."""
+        self.flush()
+        if player is None:
+            recent = "SELECT id FROM rounds ORDER BY ts DESC LIMIT ?"
+            args = (int(last),)
+        else:
+            recent = "SELECT id FROM rounds WHERE player = ? ORDER BY ts DESC LIMIT ?"
+            args = (player, int(last))
+        row = self._conn.execute(
+            "SELECT COUNT(DISTINCT b.round_id), COALESCE(SUM(b.stake), 0), COALESCE(SUM(b.payout), 0) "
+            f"FROM ({recent}) AS r JOIN bets AS b ON b.round_id = r.id",
+            args,
+        ).fetchone()
+        rounds, staked, paid = row
+        return {
+            "rounds": rounds,
+            "staked": staked,
+            "paid": paid,
+            "net": paid - staked,
+            "roi": (paid - staked) / staked if staked else 0.0,
+        }
+
+    def win_rates(self, num_horses, last=10000):
+        """Share of the last ``num_horses``-horse races won by each horse."""
+        self.flush()
+        rows = self._conn.execute(
+            "SELECT winner, COUNT(*) FROM (SELECT winner FROM rounds WHERE num_horses = ? "
+            "ORDER BY ts DESC LIMIT ?) GROUP BY winner",
+            (int(num_horses), int(last)),
+        ).fetchall()
+        total = sum(count for _, count in rows)
+        rates = [0.0] * int(num_horses)
+        for winner, count in rows:
+            if winner is not None and 1 <= winner <= num_horses:
+                rates[winner - 1] = count / total
+        return rates
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+            self._conn = None
+            atexit.unregister(self.close)
+
+
+class SettingsStore:
+    """Settings and balance in SQLite, for ``config``'s ``sqlite`` backend.
+
+    Each setting is one JSON value under its key in ``settings``; the
+    balance is the ``balance`` setting. Every write is one ``BEGIN
+    IMMEDIATE`` transaction, so concurrent sessions queue on SQLite's lock
+    and balance changes add up. Stakes and payouts also go to ``ledger``.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB
+        self._conn = _connect(self.path)
+        # Transactions are opened explicitly, as IMMEDIATE
+        self._conn.isolation_level = None
+
+    @contextmanager
+    def _immediate(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _balance(self):
+        row = self._conn.execute("SELECT value FROM settings WHERE key = 'balance'").fetchone()
+        try:
+            return int(json.loads(row[0]))
+        except (TypeError, ValueError):
+            return 0
+
+    def load(self):
+        """Every setting, decoded."""
+        return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM settings")}
+
+    def save(self, values, balance_delta=0):
+        """Write ``values`` and add ``balance_delta``; return the settings after."""
+        with self._immediate():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                ((key, json.dumps(value, ensure_ascii=False)) for key, value in values.items() if key != "balance"),
+            )
+            if balance_delta:
+                # A stale absolute set must not overdraw what others left
+                balance = max(0, self._balance() + int(balance_delta))
+                self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('balance', ?)",
+                                   (json.dumps(balance),))
+            return self.load()
+
+    def seed(self, values):
+        """Add the settings that are not stored yet; return the settings after."""
+        with self._immediate():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                ((key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()),
+            )
+            return self.load()
+
+    def record(self, delta, kind, round_id=None):
+        """Apply one stake or payout and ledger it; return the new balance.
+
+        Raises ValueError, changing nothing, when a stake is more than the
+        balance.
+        """
+        delta = int(delta)
+        with self._immediate():
+            balance = self._balance() + delta
+            if delta < 0 and balance < 0:
+                raise ValueError(f"stake {-delta} over balance {balance - delta}")
+            self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('balance', ?)",
+                               (json.dumps(balance),))
+            self._conn.execute(
+                "INSERT INTO ledger (ts, round, kind, delta, balance) VALUES (?, ?, ?, ?, ?)",
+                (round(time.time(), 3), round_id, kind, delta, balance),
+            )
+        return balance
+
+    def ledger(self):
+        """Yield every ledger record in ``seq`` order, as ``config`` writes them."""
+        rows = self._conn.execute("SELECT seq, ts, round, kind, delta, balance FROM ledger ORDER BY seq")
+        for seq, ts, round_id, kind, delta, balance in rows:
+            yield {"seq": seq, "ts": ts, "round": round_id, "kind": kind, "delta": delta, "balance": balance}
+
+    def data_version(self):
+        """Changes whenever another connection commits to the database."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -2,12 +2,38 @@
 Pytest configuration and fixtures for Hipodromo tests.
 """
 import os
+import atexit
 import tempfile
 import shutil
 import json
 from unittest.mock import patch, MagicMock
 import pytest
 
+# The suite never touches the developer's ~/.config/hipodromo: HOME points at
+# a scratch dir before any project module derives its paths from it, and
+# subprocesses inherit it. Registered before config and game add their own
+# exit-time writes, the cleanup runs after them.
+SCRATCH_HOME = tempfile.mkdtemp(prefix="hipodromo-tests-")
+os.environ["HOME"] = SCRATCH_HOME
+atexit.register(shutil.rmtree, SCRATCH_HOME, True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def loaded_config():
+    """Load the config once from the scratch HOME, as ``Hipodromo.main()`` does at startup."""
+    import config
+    import store
+    import game
+    config_dir = os.path.join(SCRATCH_HOME, ".config", "hipodromo")
+    # Also pinned here in case a module was imported before HOME was set
+    with patch.object(config, "CONFIG_DIR", config_dir), \
+         patch.object(config, "CONFIG_FILE", os.path.join(config_dir, "config.json")), \
+         patch.object(config, "OLD_BALANCE_FILE", os.path.join(SCRATCH_HOME, ".hipodromo_balance")), \
+         patch.object(config, "OLD_LANG_FILE", os.path.join(SCRATCH_HOME, ".hipodromo_lang")), \
+         patch.object(store, "HISTORY_DB", os.path.join(config_dir, "history.sqlite3")), \
+         patch.object(game.ODDS_CACHE, "path", os.path.join(config_dir, "odds_cache.json")):
+        yield config.load_config()
+
 
 @pytest.fixture
 def temp_config_dir():
@@ -7,6 +7,7 @@ import tempfile
 import shutil
 import pytest
 from unittest.mock import patch, mock_open
+import config as config_module
 from config import (
     CONFIG_DIR,
     CONFIG_FILE,
@@ -23,7 +24,18 @@ from config import (
     get_horses,
     set_horses,
     get_seed,
-    set_seed
+    set_seed,
+    get_fps,
+    set_fps,
+    get_instant,
+    set_instant,
+    get_turbo,
+    set_turbo,
+    flush,
+    persist_stats,
+    record_balance,
+    compact_ledger,
+    ledger_entries,
 )
 
 
@@ -240,6 +252,669 @@ class TestConfigGettersSetters:
             
             set_seed(None)
             assert get_seed() is None
+    
+    def test_fps_operations(self, temp_config_dir):
+        """Test frame rate getter and setter."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {}):
+            # Test default value (the original 80 ms per tick)
+            assert get_fps() == 12.5
+            
+            set_fps(30)
+            assert get_fps() == 30.0
+            
+            # Non-positive or invalid values fall back to the default
+            set_fps(0)
+            assert get_fps() == 12.5
+            set_fps("fast")
+            assert get_fps() == 12.5
+    
+    def test_instant_and_turbo_operations(self, temp_config_dir):
+        """Test instant mode and turbo getters and setters."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {}):
+            assert get_instant() is False
+            assert get_turbo() == 1
+            
+            set_instant(True)
+            set_turbo(5)
+            assert get_instant() is True
+            assert get_turbo() == 5
+            
+            flush()
+            with open(config_file) as f:
+                saved = json.load(f)
+            assert saved["instant"] is True
+            assert saved["turbo"] == 5
+            
+            # Turbo below one tick per frame falls back to the default
+            set_turbo(0)
+            assert get_turbo() == 1
+
+
+class TestWriteBehind:
+    """Test the write-behind persister."""
+    
+    def test_setters_do_not_write_synchronously(self, temp_config_dir):
+        """Test that setters only mark the config dirty."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {}), \
+             patch('config._write_config_to_disk') as mock_write, \
+             config_module._io_lock:
+            # Holding the I/O lock keeps the background thread out of the test
+            set_balance(1234)
+            set_fast(True)
+            mock_write.assert_not_called()
+            assert persist_stats()["pending"] is True
+            flush()
+            mock_write.assert_called_once()
+            assert mock_write.call_args[0][0]["balance"] == 1234
+    
+    def test_flush_coalesces_and_counts_avoided_writes(self, temp_config_dir):
+        """Test that many changes between flushes become one write."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {}), \
+             config_module._io_lock:
+            flush()
+            before = persist_stats()
+            for i in range(10):
+                set_balance(5000 - i)
+            flush()
+            flush()  # Nothing pending: no write
+            after = persist_stats()
+            assert after["writes"] - before["writes"] == 1
+            assert after["writes_avoided"] - before["writes_avoided"] == 9
+            assert after["pending"] is False
+            with open(config_file) as f:
+                assert json.load(f)["balance"] == 4991
+    
+    def test_failed_write_stays_pending(self, temp_config_dir):
+        """Test that a flush that cannot write keeps the change for a retry."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 5000}, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {"balance": 5000}), \
+             patch('config._dirty_keys', set()), \
+             patch('config._balance_delta', 0), \
+             config_module._io_lock:
+            set_balance(4000)
+            with patch('os.replace', side_effect=OSError("disk full")):
+                flush()
+            assert persist_stats()["pending"] is True
+            assert config_module._balance_delta == -1000
+            # A reload in between must not undo the unwritten change
+            config_module._maybe_reload()
+            assert get_balance() == 4000
+            flush()
+            assert persist_stats()["pending"] is False
+        with open(config_file) as f:
+            assert json.load(f)["balance"] == 4000
+    
+    def test_background_thread_flushes(self, temp_config_dir):
+        """Test that pending changes reach disk without an explicit flush."""
+        import time
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {}), \
+             patch('config.FLUSH_INTERVAL', 0.01):
+            flush()
+            set_horses(9)
+            deadline = time.time() + 5
+            while persist_stats()["pending"] and time.time() < deadline:
+                time.sleep(0.01)
+            with open(config_file) as f:
+                assert json.load(f)["horses"] == 9
+    
+    def test_flush_on_exit_is_registered(self):
+        """Test that pending state is flushed at interpreter exit."""
+        import subprocess
+        import sys
+        import tempfile
+        with tempfile.TemporaryDirectory() as home:
+            code = (
+                "import config; config.FLUSH_INTERVAL = 3600; "
+                "config.set_balance(4321)"
+            )
+            env = dict(os.environ, HOME=home)
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            subprocess.run([sys.executable, "-c", code], cwd=project_root, env=env, check=True)
+            with open(os.path.join(home, ".config", "hipodromo", "config.json")) as f:
+                assert json.load(f)["balance"] == 4321
+    
+    def test_flush_on_sigterm(self):
+        """Test that SIGTERM flushes pending state before the process dies."""
+        import signal
+        import subprocess
+        import sys
+        import tempfile
+        if not hasattr(signal, "SIGTERM") or os.name == "nt":
+            pytest.skip("POSIX signals only")
+        with tempfile.TemporaryDirectory() as home:
+            code = (
+                "import config, sys, time; config.FLUSH_INTERVAL = 3600; "
+                "config.set_balance(2468); print('ready', flush=True); time.sleep(30)"
+            )
+            env = dict(os.environ, HOME=home)
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            proc = subprocess.Popen([sys.executable, "-c", code], cwd=project_root, env=env,
+                                    stdout=subprocess.PIPE, text=True)
+            assert proc.stdout.readline().strip() == "ready"
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=10)
+            assert proc.returncode == -signal.SIGTERM
+            with open(os.path.join(home, ".config", "hipodromo", "config.json")) as f:
+                assert json.load(f)["balance"] == 2468
+
+
+class TestAtomicWrites:
+    """Test crash-safe, compact config writes."""
+    
+    def test_write_is_compact_and_replaces_file(self, temp_config_dir):
+        """Test that the file is rewritten whole with compact JSON."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            f.write("old contents that are longer than the new ones")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file):
+            assert _write_config_to_disk({"balance": 10, "lang": "es"}) is True
+        with open(config_file, "rb") as f:
+            assert f.read() == b'{"balance":10,"lang":"es"}'
+        # No temp files are left behind
+        assert os.listdir(temp_config_dir) == ["config.json"]
+    
+    def test_identical_bytes_are_skipped(self, temp_config_dir):
+        """Test that rewriting unchanged state touches nothing."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file):
+            assert _write_config_to_disk({"balance": 11}) is True
+            with patch('os.replace') as mock_replace:
+                assert _write_config_to_disk({"balance": 11}) is False
+                mock_replace.assert_not_called()
+            assert _write_config_to_disk({"balance": 12}) is True
+    
+    def test_failed_write_keeps_old_file(self, temp_config_dir):
+        """Test that a crash mid-write leaves the previous config intact."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file):
+            _write_config_to_disk({"balance": 7000})
+            with patch('config.FSYNC_POLICY', "file"), \
+                 patch('os.fsync', side_effect=OSError("disk full")):
+                assert _write_config_to_disk({"balance": 1}) is False
+        with open(config_file) as f:
+            assert json.load(f) == {"balance": 7000}
+        assert os.listdir(temp_config_dir) == ["config.json"]
+    
+    def test_fsync_policy(self, temp_config_dir):
+        """Test that the fsync policy controls durability syscalls."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file):
+            for policy, expected in (("never", 0), ("file", 1), ("full", 2)):
+                with patch('config.FSYNC_POLICY', policy), \
+                     patch('os.fsync') as mock_fsync:
+                    _write_config_to_disk({"policy": policy})
+                    assert mock_fsync.call_count == expected, policy
+    
+    def test_keeps_file_mode(self, temp_config_dir):
+        """Test that replacing the file preserves its permissions."""
+        if os.name == "nt":
+            pytest.skip("POSIX permissions only")
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            f.write("{}")
+        os.chmod(config_file, 0o640)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file):
+            _write_config_to_disk({"balance": 3})
+        assert os.stat(config_file).st_mode & 0o777 == 0o640
+
+
+class TestBalanceLedger:
+    """Test the append-only balance ledger."""
+    
+    @pytest.fixture
+    def ledger_env(self, temp_config_dir):
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 1000, "ledger_seq": 0}, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {"balance": 1000, "ledger_seq": 0}), \
+             patch('config._ledger_seq', 0), \
+             patch('config._ledger_tail', 0), \
+             patch('config._ledger_offset', 0), \
+             patch('config._synced_config', None), \
+             config_module._io_lock:
+            yield temp_config_dir
+    
+    def _lines(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+    
+    def test_record_appends_without_rewriting_config(self, ledger_env):
+        """Test that a stake or payout is one appended record."""
+        with patch('config._write_config_to_disk') as mock_write:
+            assert record_balance(-100, "stake", "r1") == 900
+            assert record_balance(250, "payout", "r1") == 1150
+            mock_write.assert_not_called()
+        assert get_balance() == 1150
+        records = self._lines(os.path.join(ledger_env, "ledger.jsonl"))
+        assert [(r["seq"], r["kind"], r["delta"], r["balance"], r["round"]) for r in records] == [
+            (1, "stake", -100, 900, "r1"),
+            (2, "payout", 250, 1150, "r1"),
+        ]
+        assert persist_stats()["pending"] is False
+    
+    def test_replay_applies_only_newer_records(self, ledger_env):
+        """Test that startup replays the ledger tail on top of the snapshot."""
+        with open(os.path.join(ledger_env, "ledger.jsonl"), "w") as f:
+            for seq, delta in enumerate((-10, -20, 30, -40), start=1):
+                f.write(json.dumps({"seq": seq, "delta": delta}) + "\n")
+            f.write('{"seq": 5, "del')  # torn append from a crash
+        config = {"balance": 500, "ledger_seq": 2}
+        config_module._replay_ledger(config)
+        assert config == {"balance": 490, "ledger_seq": 4}
+        assert config_module._ledger_seq == 4
+    
+    def test_compaction_folds_ledger_into_snapshot(self, ledger_env):
+        """Test that compaction writes the snapshot and archives the records."""
+        ledger = os.path.join(ledger_env, "ledger.jsonl")
+        with patch('config.LEDGER_COMPACT_EVERY', 3):
+            for delta in (-100, 300, -50):
+                record_balance(delta, "stake")
+            assert os.path.getsize(ledger) == 0
+            record_balance(-25, "stake")
+        with open(os.path.join(ledger_env, "config.json")) as f:
+            snapshot = json.load(f)
+        assert (snapshot["balance"], snapshot["ledger_seq"]) == (1150, 3)
+        assert len(self._lines(os.path.join(ledger_env, "ledger.archive.jsonl"))) == 3
+        
+        # The audit trail reconciles against the live balance
+        entries = list(ledger_entries())
+        assert [r["seq"] for r in entries] == [1, 2, 3, 4]
+        assert 1000 + sum(r["delta"] for r in entries) == get_balance() == 1125
+        
+        # A fresh start sees the same balance
+        config_module._replay_ledger(snapshot)
+        assert snapshot["balance"] == 1125
+    
+    def test_interrupted_compaction_does_not_double_count(self, ledger_env):
+        """Test that records already in the snapshot are not replayed."""
+        record_balance(-100, "stake")
+        record_balance(-100, "stake")
+        # Crash after the snapshot write but before the ledger is truncated
+        with patch('builtins.open', side_effect=OSError("crash")):
+            assert compact_ledger() is False
+        with open(os.path.join(ledger_env, "config.json")) as f:
+            snapshot = json.load(f)
+        config_module._replay_ledger(snapshot)
+        assert snapshot["balance"] == 800
+    
+    def test_stake_over_balance_is_refused(self, ledger_env):
+        """Test that a stake another session already spent records nothing."""
+        with open(os.path.join(ledger_env, "ledger.jsonl"), "w") as f:
+            f.write(json.dumps({"seq": 1, "delta": -900}) + "\n")
+        with pytest.raises(ValueError):
+            record_balance(-1000, "stake", "r1")
+        assert get_balance() == 100
+        assert len(self._lines(os.path.join(ledger_env, "ledger.jsonl"))) == 1
+    
+    def test_sync_reads_only_appended_records(self, ledger_env):
+        """Test that a bet folds in other sessions' new records, not the whole ledger."""
+        ledger = os.path.join(ledger_env, "ledger.jsonl")
+        for i in range(250):
+            record_balance(-1, "stake", f"r{i}")
+        with open(ledger, "a") as f:
+            f.write(json.dumps({"seq": 251, "delta": -50}) + "\n")
+        with patch('config._replay_ledger') as mock_replay, \
+             patch('config.json.loads', wraps=json.loads) as mock_loads:
+            assert record_balance(-10, "stake", "r250") == 1000 - 250 - 50 - 10
+            mock_replay.assert_not_called()
+            # Only the one appended record is parsed
+            assert mock_loads.call_count == 1
+        assert [r["seq"] for r in self._lines(ledger)][-2:] == [251, 252]
+    
+    def test_set_balance_supersedes_ledger(self, ledger_env):
+        """Test that an absolute balance is not undone by older records."""
+        record_balance(-300, "stake")
+        set_balance(50)
+        flush()
+        with open(os.path.join(ledger_env, "config.json")) as f:
+            snapshot = json.load(f)
+        config_module._replay_ledger(snapshot)
+        assert snapshot["balance"] == 50
+
+
+class TestSchemaMigrations:
+    """Test versioned, run-once config migrations."""
+    
+    def test_unversioned_config_is_migrated_and_stamped(self, temp_config_dir):
+        """Test that an old config runs every migration and is rewritten once."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 900}, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.LANG_FILE', os.path.join(temp_config_dir, "lang")), \
+             patch('config.OLD_LANG_FILE', os.path.join(temp_config_dir, "old_lang")):
+            config = _ensure_and_migrate_config()
+        assert config["schema_version"] == config_module.SCHEMA_VERSION
+        assert config["balance"] == 900
+        assert config["horses"] == 5
+        with open(config_file) as f:
+            assert json.load(f)["schema_version"] == config_module.SCHEMA_VERSION
+    
+    def test_current_config_is_a_single_read(self, temp_config_dir):
+        """Test that a current config is loaded without probes or writes."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        current = {"balance": 900, "lang": "en", "schema_version": config_module.SCHEMA_VERSION}
+        with open(config_file, "w") as f:
+            json.dump(current, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config._read_legacy_value') as mock_probe, \
+             patch('config._write_config_to_disk') as mock_write, \
+             patch('os.makedirs') as mock_makedirs:
+            config = _ensure_and_migrate_config()
+        assert config == current
+        mock_probe.assert_not_called()
+        mock_write.assert_not_called()
+        mock_makedirs.assert_not_called()
+    
+    def test_pending_migrations_run_once_in_order(self, temp_config_dir):
+        """Test that only migrations newer than the stamp run, oldest first."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"schema_version": 1}, f)
+        calls = []
+        migrations = [(v, lambda config, v=v: calls.append(v)) for v in (1, 2, 3)]
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.MIGRATIONS', migrations), \
+             patch('config.SCHEMA_VERSION', 3):
+            assert _ensure_and_migrate_config()["schema_version"] == 3
+            assert _ensure_and_migrate_config()["schema_version"] == 3
+        assert calls == [2, 3]
+
+
+class TestMultiProcess:
+    """Test concurrent sessions sharing one config directory."""
+    
+    def test_fork_while_a_thread_holds_the_locks(self):
+        """Test that a forked child does not inherit locks held by a thread."""
+        import threading
+        if not hasattr(os, "fork"):
+            pytest.skip("fork only")
+        held = threading.Event()
+        release = threading.Event()
+        
+        def hold():
+            with config_module._io_lock, config_module._state_lock:
+                held.set()
+                release.wait()
+        
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                ok = config_module._io_lock.acquire(timeout=2) and config_module._state_lock.acquire(timeout=2)
+                os._exit(0 if ok and config_module._flusher is None else 1)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            release.set()
+            thread.join()
+        assert os.WEXITSTATUS(status) == 0
+    
+    def test_concurrent_sessions_keep_every_bet(self, tmp_path):
+        """Test N processes doing M bets each against one balance."""
+        import subprocess
+        import sys
+        if config_module.fcntl is None:
+            pytest.skip("fcntl locking only")
+        procs, bets = 4, 40
+        config_dir = tmp_path / ".config" / "hipodromo"
+        config_dir.mkdir(parents=True)
+        (config_dir / "config.json").write_text(json.dumps(
+            {"balance": 5000, "lang": "es", "schema_version": config_module.SCHEMA_VERSION}
+        ))
+        code = (
+            "import sys, json, config\n"
+            "config.FLUSH_INTERVAL = 0.01\n"
+            "config.FSYNC_POLICY = 'never'\n"
+            "config.LEDGER_COMPACT_EVERY = 25\n"
+            "worker = int(sys.argv[1])\n"
+            "if worker == 0: config.set_horses(9)\n"
+            "if worker == 1: config.set_lang('en')\n"
+            "for i in range(int(sys.argv[2])):\n"
+            "    config.record_balance(-10, 'stake', f'{worker}:{i}')\n"
+            "    if i % 2: config.record_balance(25, 'payout', f'{worker}:{i}')\n"
+            "config.set_balance(config.get_balance() + 7)\n"
+            "config.flush()\n"
+            "print(json.dumps(config.persist_stats()))\n"
+        )
+        env = dict(os.environ, HOME=str(tmp_path))
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        running = [
+            subprocess.Popen([sys.executable, "-c", code, str(i), str(bets)], cwd=project_root,
+                             env=env, stdout=subprocess.PIPE, text=True)
+            for i in range(procs)
+        ]
+        stats = []
+        for proc in running:
+            out, _ = proc.communicate(timeout=60)
+            assert proc.returncode == 0
+            stats.append(json.loads(out))
+        
+        check = (
+            "import json, config\n"
+            "print(json.dumps([config.get_balance(), config.get_horses(), config.get_lang(),"
+            " [r['seq'] for r in config.ledger_entries()]]))\n"
+        )
+        out = subprocess.run([sys.executable, "-c", check], cwd=project_root, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        balance, horses, lang, seqs = json.loads(out)
+        per_process = bets * -10 + (bets // 2) * 25 + 7
+        assert balance == 5000 + procs * per_process
+        assert (horses, lang) == (9, "en")
+        assert seqs == list(range(1, procs * (bets + bets // 2) + 1))
+        for stat in stats:
+            assert stat["lock_acquisitions"] > 0
+            # Critical sections are a read, a small parse and one append
+            assert stat["lock_hold_max"] < 0.5
+    
+    def test_stale_session_does_not_overwrite_balance(self, temp_config_dir):
+        """Test that a write from a stale view merges the balance as a delta."""
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 5000, "horses": 5}, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {"balance": 5000, "horses": 5}), \
+             patch('config._dirty_keys', set()), \
+             patch('config._balance_delta', 0), \
+             config_module._io_lock:
+            # Another session wins 300 and changes the horse count meanwhile
+            with open(config_file, "w") as f:
+                json.dump({"balance": 5300, "horses": 8}, f)
+            set_balance(4900)
+            flush()
+            assert get_balance() == 5200
+            assert get_horses() == 8
+        with open(config_file) as f:
+            assert json.load(f) == {"balance": 5200, "horses": 8}
+
+
+class TestReloadCache:
+    """Test stat-based reloading of config edited by other writers."""
+    
+    @pytest.fixture
+    def reload_env(self, temp_config_dir):
+        config_file = os.path.join(temp_config_dir, "config.json")
+        current = {"balance": 5000, "horses": 5, "ledger_seq": 0}
+        with open(config_file, "w") as f:
+            json.dump(current, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', dict(current)), \
+             patch('config._dirty_keys', set()), \
+             patch('config._balance_delta', 0), \
+             patch('config._ledger_seq', 0), \
+             patch('config._ledger_tail', 0), \
+             patch('config.RELOAD_INTERVAL', 0), \
+             config_module._io_lock:
+            with patch('config._file_sig', config_module._stat_signature()), \
+                 patch('config._next_check', 0.0):
+                yield config_file
+    
+    def _edit(self, config_file, data):
+        # A different size guarantees a new signature even within one mtime tick
+        with open(config_file, "w") as f:
+            json.dump(data, f)
+    
+    def test_external_edit_is_picked_up(self, reload_env):
+        """Test that an edit by another writer reaches the getters."""
+        self._edit(reload_env, {"balance": 5000, "horses": 12, "ledger_seq": 0, "lang": "en"})
+        assert get_horses() == 12
+        assert get_lang() == "en"
+    
+    def test_unchanged_file_is_not_reparsed(self, reload_env):
+        """Test that getters only stat an unchanged file."""
+        with patch('config._sync_locked') as mock_sync:
+            for _ in range(5):
+                assert get_horses() == 5
+            mock_sync.assert_not_called()
+    
+    def test_stat_at_most_once_per_interval(self, reload_env):
+        """Test that getters between checks are plain dict reads."""
+        get_horses()
+        with patch('config.RELOAD_INTERVAL', 3600), \
+             patch('config._stat_signature') as mock_stat:
+            mock_stat.return_value = config_module._file_sig
+            get_horses()  # due now: one stat, schedules the next check
+            for _ in range(100):
+                get_horses()
+                get_balance()
+            assert mock_stat.call_count == 1
+    
+    def test_local_changes_survive_reload(self, reload_env):
+        """Test that unwritten local settings win over the reloaded file."""
+        set_horses(3)
+        self._edit(reload_env, {"balance": 5000, "horses": 12, "ledger_seq": 0, "seed": 77})
+        assert get_horses() == 3
+        assert get_seed() == 77
+    
+    def test_ledger_append_refreshes_balance(self, reload_env):
+        """Test that bets another session appended show up in the balance."""
+        ledger = os.path.join(os.path.dirname(reload_env), "ledger.jsonl")
+        with open(ledger, "w") as f:
+            f.write(json.dumps({"seq": 1, "delta": -250}) + "\n")
+        assert get_balance() == 4750
+
+
+class TestSqliteBackend:
+    """Test the getters and setters on the SQLite backend."""
+    
+    @pytest.fixture
+    def sqlite_env(self, temp_config_dir):
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 1200, "lang": "en", "schema_version": config_module.SCHEMA_VERSION}, f)
+        db = os.path.join(temp_config_dir, "history.sqlite3")
+        with patch('config.BACKEND', "sqlite"), \
+             patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('store.HISTORY_DB', db), \
+             patch('config.CONFIG', {}), \
+             patch('config._loaded', False), \
+             patch('config._store', None), \
+             patch('config._dirty_keys', set()), \
+             patch('config._balance_delta', 0), \
+             patch('config.RELOAD_INTERVAL', 0), \
+             config_module._io_lock:
+            try:
+                yield db
+            finally:
+                flush()
+                config_module._store.close()
+    
+    def test_first_load_imports_json_config(self, sqlite_env):
+        """Test that switching backends keeps the balance and settings."""
+        assert get_balance() == 1200
+        assert get_lang() == "en"
+        set_horses(7)
+        flush()
+        import sqlite3
+        conn = sqlite3.connect(sqlite_env)
+        rows = dict(conn.execute("SELECT key, value FROM settings"))
+        conn.close()
+        assert (rows["horses"], rows["balance"], rows["lang"]) == ("7", "1200", '"en"')
+    
+    def test_bets_go_to_the_ledger_table(self, sqlite_env):
+        """Test stakes, payouts and refused overdrafts."""
+        assert record_balance(-200, "stake", "r1") == 1000
+        assert record_balance(450, "payout", "r1") == 1450
+        with pytest.raises(ValueError):
+            record_balance(-1451, "stake", "r2")
+        assert get_balance() == 1450
+        assert [(r["seq"], r["kind"], r["delta"], r["balance"]) for r in ledger_entries()] == [
+            (1, "stake", -200, 1000),
+            (2, "payout", 450, 1450),
+        ]
+    
+    def test_other_connections_are_merged(self, sqlite_env):
+        """Test that another session's bets and settings reach the getters."""
+        from store import SettingsStore
+        get_balance()
+        set_balance(1000)
+        other = SettingsStore(sqlite_env)
+        other.record(-300, "stake", "other:1")
+        other.save({"horses": 9})
+        other.close()
+        # The local set is a pending change on top of the other session's bet
+        assert get_horses() == 9
+        assert get_balance() == 700
+        flush()
+        assert get_balance() == 700
+    
+    def test_concurrent_processes_keep_every_bet(self, tmp_path):
+        """Test N processes betting against one SQLite balance."""
+        import subprocess
+        import sys
+        procs, bets = 4, 25
+        env = dict(os.environ, HOME=str(tmp_path), HIPODROMO_BACKEND="sqlite")
+        code = (
+            "import sys, config\n"
+            "for i in range(int(sys.argv[1])):\n"
+            "    config.record_balance(-10, 'stake')\n"
+            "    config.record_balance(4, 'payout')\n"
+            "config.set_horses(6)\n"
+        )
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        running = [subprocess.Popen([sys.executable, "-c", code, str(bets)], cwd=project_root, env=env)
+                   for _ in range(procs)]
+        for proc in running:
+            assert proc.wait(timeout=60) == 0
+        out = subprocess.run(
+            [sys.executable, "-c", "import config; print(config.get_balance(), config.get_horses(),"
+             " len(list(config.ledger_entries())))"],
+            cwd=project_root, env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        assert out == [str(5000 - procs * bets * 6), "6", str(procs * bets * 2)]
 
 
 class TestConfigEdgeCases:
@@ -323,7 +998,8 @@ class TestConfigDebugging:
         # Use a non-existent subdirectory
         config_subdir = os.path.join(temp_config_dir, "nonexistent", "config")
         
-        with patch('config.CONFIG_DIR', config_subdir):
+        with patch('config.CONFIG_DIR', config_subdir), \
+             patch('config.CONFIG_FILE', os.path.join(config_subdir, "config.json")):
             config = _ensure_and_migrate_config()
             assert os.path.exists(config_subdir)
             assert isinstance(config, dict)
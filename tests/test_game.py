@@ -1,14 +1,26 @@
 """
 Tests for game.py - Race engine, odds calculation, and animation logic.
 """
+import io
+import os
+import sys
 import pytest
 import random
+import subprocess
 from unittest.mock import patch, MagicMock
+from utils import FrameRenderer
 from game import (
     _generate_weights,
     compute_decimal_odds,
     build_race,
-    animacion
+    animacion,
+    RaceEngine,
+    win_probabilities,
+    estimate_win_probabilities,
+    _exact_win_probabilities,
+    OddsCache,
+    _model_version,
+    FrameScheduler
 )
 
 
@@ -61,10 +73,12 @@ class TestComputeDecimalOdds:
         weights = [1.0, 1.0, 1.0]  # Equal weights
         odds = compute_decimal_odds(weights)
         # With equal weights, each horse should have ~3.0 fair odds
-        # With 10% house edge: 3.0 * 0.9 = 2.7, but clamped to 1.5 minimum
-        expected_odds = [2.7, 2.7, 2.7]
-        for i, (actual, expected) in enumerate(zip(odds, expected_odds)):
-            assert abs(actual - expected) < 0.1, f"Odds {i}: expected ~{expected}, got {actual}"
+        # With 10% house edge: 3.0 * 0.9 = 2.7 (ties favour horse 1 slightly)
+        for i, actual in enumerate(odds):
+            assert abs(actual - 2.7) < 0.25, f"Odds {i}: expected ~2.7, got {actual}"
+        # Implied probabilities over the whole book carry exactly the edge
+        overround = sum(1.0 / odd for odd in odds)
+        assert abs(overround - 1.0 / 0.9) < 0.01
     
     def test_compute_odds_favorite(self):
         """Test odds calculation with a clear favorite."""
@@ -73,7 +87,19 @@ class TestComputeDecimalOdds:
         # Favorite should have lower odds (higher probability)
         assert odds[0] < odds[1]
         assert odds[0] < odds[2]
-        assert all(odd >= 1.5 for odd in odds)
+        assert all(p * odd <= 0.9 for p, odd in zip(win_probabilities(weights), odds))
+    
+    def test_house_edge_holds_for_every_horse(self):
+        """Test that no horse is a positive-EV bet, favourites included."""
+        assert compute_decimal_odds([1.4, 0.6])[0] <= 0.9 / win_probabilities([1.4, 0.6])[0]
+        for n in (2, 3, 5):
+            for seed in range(40):
+                weights = _generate_weights(n, seed)
+                odds = compute_decimal_odds(weights)
+                for p, odd in zip(win_probabilities(weights), odds):
+                    assert p * odd <= 0.9 + 1e-12
+                    # Cut to the cent, never more than a cent under the fair edge
+                    assert 0.9 / p - odd < 0.01 + 1e-9
     
     def test_compute_odds_empty_weights(self):
         """Test odds calculation with empty weights."""
@@ -89,6 +115,71 @@ class TestComputeDecimalOdds:
         assert all(odd >= 1.5 for odd in odds)
 
 
+class TestWinProbabilities:
+    """Test exact win probabilities from the tick model."""
+    
+    def test_probabilities_sum_to_one(self):
+        """Test that estimated probabilities form a distribution."""
+        probs = win_probabilities([1.2, 0.8, 1.0, 1.1, 0.9])
+        assert len(probs) == 5
+        assert abs(sum(probs) - 1.0) < 1e-9
+        assert all(0 < p < 1 for p in probs)
+    
+    def test_probabilities_deterministic_and_cached(self):
+        """Test that the same weights always get the same cached estimate."""
+        weights = [0.7, 1.3, 1.05]
+        first = win_probabilities(weights)
+        hits = _exact_win_probabilities.cache_info().hits
+        second = win_probabilities(list(weights))
+        assert first == second
+        assert _exact_win_probabilities.cache_info().hits == hits + 1
+    
+    def test_probabilities_follow_weights(self):
+        """Test that heavier horses are more likely to win."""
+        probs = win_probabilities([0.6, 1.0, 1.4])
+        assert probs[0] < probs[1] < probs[2]
+        # The bonus step compounds over ~80 ticks: a clear favourite wins far
+        # more often than its w/sum(w) share
+        probs = win_probabilities([2.0, 0.5, 0.5])
+        assert probs[0] > 2.0 / 3.0
+    
+    def test_probabilities_empty(self):
+        """Test that no horses means no probabilities."""
+        assert win_probabilities([]) == []
+        assert estimate_win_probabilities([]) == []
+    
+    def test_ties_favour_lowest_index(self):
+        """Test that identical horses split unevenly because ties go to horse 1."""
+        probs = win_probabilities([1.0, 1.0])
+        assert probs[0] > 0.5 > probs[1]
+        assert abs(sum(probs) - 1.0) < 1e-9
+    
+    def test_exact_matches_simulation(self):
+        """Test that the exact solver agrees with Monte Carlo estimates."""
+        weights = [0.6, 1.4, 0.6, 1.4, 0.6]
+        exact = win_probabilities(weights)
+        estimate = estimate_win_probabilities(weights)
+        for p, q in zip(exact, estimate):
+            assert abs(p - q) < 0.03
+    
+    def test_python_and_numpy_solvers_agree(self):
+        """Test that the pure-Python DP matches the NumPy one."""
+        pytest.importorskip("numpy")
+        weights = (0.9, 1.1, 1.3, 0.7)
+        fast = _exact_win_probabilities(weights, 60)
+        with patch('game.np', None):
+            _exact_win_probabilities.cache_clear()
+            slow = _exact_win_probabilities(weights, 60)
+        _exact_win_probabilities.cache_clear()
+        for p, q in zip(fast, slow):
+            assert abs(p - q) < 1e-12
+    
+    def test_short_track(self):
+        """Test that tracks shorter than the largest step still solve."""
+        probs = win_probabilities([1.0, 1.2, 0.8], distance=2)
+        assert abs(sum(probs) - 1.0) < 1e-9
+
+
 class TestBuildRace:
     """Test race profile building."""
     
@@ -120,6 +211,241 @@ class TestBuildRace:
         assert race["odds"] == expected_odds
 
 
+class TestOddsCache:
+    """Test the bounded, persistent odds cache."""
+    
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted."""
+        cache = OddsCache(maxsize=4)
+        assert cache.get(5, 42, 100) is None
+        cache.put(5, 42, 100, [1.0] * 5, [4.5] * 5)
+        assert cache.get(5, 42, 100)["odds"] == [4.5] * 5
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted at the limit."""
+        cache = OddsCache(maxsize=2)
+        cache.put(5, 1, 100, [1.0], [2.0])
+        cache.put(5, 2, 100, [1.0], [2.0])
+        cache.get(5, 1, 100)
+        cache.put(5, 3, 100, [1.0], [2.0])
+        assert cache.get(5, 2, 100) is None
+        assert cache.get(5, 1, 100) is not None
+        assert cache.stats()["size"] == 2
+    
+    def test_seed_types_are_distinct(self):
+        """Test that int and str seeds do not share entries."""
+        cache = OddsCache()
+        cache.put(5, 1, 100, [1.0], [2.0])
+        assert cache.get(5, "1", 100) is None
+    
+    def test_persists_across_instances(self, temp_config_dir):
+        """Test that entries survive a restart via the on-disk store."""
+        path = os.path.join(temp_config_dir, "odds_cache.json")
+        cache = OddsCache(path=path)
+        cache.put(7, 99, 100, [1.1] * 7, [6.0] * 7)
+        cache.save()
+        reloaded = OddsCache(path=path)
+        assert reloaded.get(7, 99, 100) == {"weights": [1.1] * 7, "odds": [6.0] * 7}
+    
+    def test_stale_model_version_is_discarded(self, temp_config_dir):
+        """Test that entries from another tick model are never served."""
+        path = os.path.join(temp_config_dir, "odds_cache.json")
+        with patch('game._model_version', return_value="old"):
+            cache = OddsCache(path=path)
+            cache.put(7, 99, 100, [1.1] * 7, [6.0] * 7)
+            cache.save()
+        assert OddsCache(path=path).get(7, 99, 100) is None
+    
+    def test_saves_are_batched_and_atomic(self, temp_config_dir):
+        """Test that misses are written in batches, through a renamed temp file."""
+        path = os.path.join(temp_config_dir, "cache", "odds_cache.json")
+        cache = OddsCache(path=path, save_every=3)
+        with patch('game.os.replace', wraps=os.replace) as mock_replace:
+            cache.put(5, 1, 100, [1.0] * 5, [4.5] * 5)
+            cache.put(5, 2, 100, [1.0] * 5, [4.5] * 5)
+            assert not os.path.exists(path)
+            cache.put(5, 3, 100, [1.0] * 5, [4.5] * 5)
+            cache.put(5, 4, 100, [1.0] * 5, [4.5] * 5)
+            assert mock_replace.call_count == 1
+            cache.save()
+            cache.save()
+            assert mock_replace.call_count == 2
+        assert os.listdir(os.path.dirname(path)) == ["odds_cache.json"]
+        assert OddsCache(path=path).get(5, 4, 100) is not None
+    
+    def test_model_version_is_stable_across_processes(self):
+        """Test that a fresh interpreter computes the same model version."""
+        out = subprocess.run(
+            [sys.executable, "-c", "import game; print(game._model_version())"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        assert out.stdout.strip() == _model_version()
+    
+    def test_model_version_tracks_odds_constants(self):
+        """Test that changing the house edge invalidates entries."""
+        version = _model_version()
+        with patch('game.HOUSE_EDGE', 0.5):
+            assert _model_version() != version
+        assert _model_version() == version
+    
+    def test_corrupt_store_is_ignored(self, temp_config_dir):
+        """Test that an unreadable store starts an empty cache."""
+        path = os.path.join(temp_config_dir, "odds_cache.json")
+        with open(path, "w") as f:
+            f.write("not json")
+        assert OddsCache(path=path).get(5, 1, 100) is None
+    
+    def test_build_race_uses_cache(self):
+        """Test that seeded races are cached and unseeded ones are not."""
+        cache = OddsCache()
+        with patch('game.ODDS_CACHE', cache):
+            first = build_race(5, seed=2024)
+            with patch('game.compute_decimal_odds') as mock_odds:
+                second = build_race(5, seed=2024)
+                mock_odds.assert_not_called()
+            build_race(5)
+        assert first == second
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+
+class TestRaceEngine:
+    """Test the headless race engine."""
+    
+    def test_engine_runs_to_completion(self):
+        """Test that a race finishes with a valid winner and finish ticks."""
+        engine = RaceEngine([1.2, 0.8, 1.0], distance=100, seed=7)
+        winner, finish_ticks = engine.run_to_completion()
+        assert engine.finished
+        assert 1 <= winner <= 3
+        assert finish_ticks[winner - 1] == engine.ticks
+        assert all(ft is None or ft == engine.ticks for ft in finish_ticks)
+    
+    def test_engine_seed_reproducible(self):
+        """Test that a seeded engine replays the same race."""
+        race = build_race(5, seed=42)
+        first = RaceEngine.from_profile(race)
+        second = RaceEngine.from_profile(race)
+        assert first.run_to_completion() == second.run_to_completion()
+        assert first.positions == second.positions
+    
+    def test_engine_does_not_touch_global_random(self):
+        """Test that stepping the engine leaves the module RNG untouched."""
+        random.seed(1)
+        expected = random.random()
+        random.seed(1)
+        RaceEngine([1.0] * 5, seed=3).run_to_completion()
+        assert random.random() == expected
+    
+    def test_engine_step_after_finish_is_noop(self):
+        """Test that stepping a finished race does not move horses."""
+        engine = RaceEngine([1.0, 1.0], distance=5, seed=0)
+        engine.run_to_completion()
+        positions, ticks = list(engine.positions), engine.ticks
+        engine.step()
+        assert engine.positions == positions
+        assert engine.ticks == ticks
+    
+    def test_engine_tie_goes_to_lowest_index(self):
+        """Test that a tie at the finish favours the lowest index."""
+        engine = RaceEngine([1.0, 1.0], distance=10)
+        engine.positions = [10, 10]
+        assert engine.winner == 1
+    
+    @patch('game.clear_screen')
+    @patch('game.cprint')
+    def test_animacion_matches_engine(self, mock_cprint, mock_clear_screen):
+        """Test that animacion renders the same race the engine computes."""
+        mock_t = MagicMock()
+        mock_t.side_effect = lambda key, **kwargs: f"mock_{key}"
+        race = build_race(5, seed=99)
+        expected, _ = RaceEngine.from_profile(race).run_to_completion()
+        assert animacion(5, 1, mock_t, race_profile=race, fast=True) == expected
+
+
+class FakeClock:
+    """Deterministic clock whose sleep just advances time."""
+    
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestFrameScheduler:
+    """Test the fixed-timestep frame scheduler."""
+    
+    def test_sleeps_only_remaining_time(self):
+        """Test that render time is subtracted from the frame sleep."""
+        clock = FakeClock()
+        scheduler = FrameScheduler(10, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        clock.now += 0.03  # 30 ms of rendering
+        assert scheduler.wait() == 1
+        assert clock.sleeps == [pytest.approx(0.07)]
+        assert clock.now == pytest.approx(100.1)
+    
+    def test_no_drift_across_frames(self):
+        """Test that frames stay on the fixed grid regardless of jitter."""
+        clock = FakeClock()
+        scheduler = FrameScheduler(10, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        for render in (0.01, 0.05, 0.09, 0.0):
+            clock.now += render
+            scheduler.wait()
+        assert clock.now == pytest.approx(100.4)
+        assert scheduler.dropped == 0
+    
+    def test_drops_frames_when_behind(self):
+        """Test that a slow frame skips ticks instead of slowing the race."""
+        clock = FakeClock()
+        scheduler = FrameScheduler(10, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        clock.now += 0.35  # Render took 3.5 frame periods
+        # Ticks for 0.1, 0.2 and 0.3 are due; only the 0.3 frame gets drawn
+        assert scheduler.wait() == 3
+        assert scheduler.dropped == 2
+        assert clock.sleeps == []
+        # Back on schedule: the next frame is due at the 0.4s mark
+        assert scheduler.wait() == 1
+        assert clock.now == pytest.approx(100.4)
+    
+    def test_stats(self):
+        """Test achieved FPS and dropped frame reporting."""
+        clock = FakeClock()
+        scheduler = FrameScheduler(10, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        for _ in range(9):
+            scheduler.wait()
+        scheduler.stop()
+        stats = scheduler.stats()
+        assert stats["frames"] == 10
+        assert stats["dropped"] == 0
+        assert stats["fps"] == pytest.approx(10 / 0.9)
+        assert stats["target_fps"] == 10
+    
+    def test_unthrottled(self):
+        """Test that fps=None never sleeps or drops."""
+        clock = FakeClock()
+        scheduler = FrameScheduler(None, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        clock.now += 5
+        assert scheduler.wait() == 1
+        assert clock.sleeps == []
+        assert scheduler.dropped == 0
+
+
 class TestAnimacion:
     """Test race animation logic."""
     
@@ -178,6 +504,88 @@ class TestAnimacion:
             assert isinstance(winner, int)
             assert 1 <= winner <= num_horses
     
+    @patch('subprocess.Popen')
+    @patch('os.system')
+    @patch('game.cprint')
+    def test_animacion_with_renderer(self, mock_cprint, mock_system, mock_popen):
+        """Test that a renderer draws the race without spawning processes."""
+        mock_t = MagicMock()
+        mock_t.side_effect = lambda key, **kwargs: f"mock_{key}"
+        renderer = FrameRenderer(io.StringIO())
+        race = build_race(5, seed=3)
+        expected, _ = RaceEngine.from_profile(race).run_to_completion()
+        
+        winner = animacion(5, 1, mock_t, race_profile=race, fast=True, renderer=renderer)
+        
+        assert winner == expected
+        assert not renderer.active
+        mock_system.assert_not_called()
+        mock_popen.assert_not_called()
+        stats = renderer.stats()
+        full_frame = sum(len(line.encode("utf-8")) + 1 for line in renderer._lines)
+        assert stats["frames"] > 30
+        # Diffed frames are a fraction of a full reprint
+        assert stats["bytes_per_frame"] < full_frame / 4
+    
+    @patch('game.clear_screen')
+    @patch('game.cprint')
+    def test_animacion_paced_with_dropped_frames(self, mock_cprint, mock_clear_screen, capsys):
+        """Test that dropped frames still run every tick of the same race."""
+        mock_t = MagicMock()
+        mock_t.side_effect = lambda key, **kwargs: f"mock_{key}"
+        race = build_race(5, seed=21)
+        engine = RaceEngine.from_profile(race)
+        expected, _ = engine.run_to_completion()
+        
+        clock = FakeClock()
+        # Every frame takes 2.5 periods to draw, so most frames are dropped
+        mock_clear_screen.side_effect = lambda: setattr(clock, "now", clock.now + 0.25)
+        scheduler = FrameScheduler(10, clock=clock, sleep=clock.sleep)
+        winner = animacion(5, 1, mock_t, race_profile=race, scheduler=scheduler)
+        
+        assert winner == expected
+        stats = scheduler.stats()
+        assert stats["dropped"] > 0
+        assert stats["frames"] + stats["dropped"] >= engine.ticks
+        assert "mock_race_stats" in capsys.readouterr().out
+    
+    @patch('os.system')
+    @patch('game.clear_screen')
+    @patch('game.cprint')
+    def test_animacion_instant(self, mock_cprint, mock_clear_screen, mock_system, capsys):
+        """Test that instant mode prints only the final board."""
+        mock_t = MagicMock()
+        mock_t.side_effect = lambda key, **kwargs: f"mock_{key}"
+        race = build_race(5, seed=8)
+        expected, _ = RaceEngine.from_profile(race).run_to_completion()
+        
+        winner = animacion(5, 1, mock_t, race_profile=race, instant=True)
+        
+        assert winner == expected
+        mock_clear_screen.assert_not_called()
+        mock_system.assert_not_called()
+        mock_cprint.assert_called_once()
+        out = capsys.readouterr().out
+        assert out.count("mock_winner_suffix") == 1
+        assert "mock_race_stats" not in out
+    
+    @patch('game.clear_screen')
+    @patch('game.cprint')
+    def test_animacion_turbo_renders_every_kth_tick(self, mock_cprint, mock_clear_screen):
+        """Test that turbo draws one frame per k ticks of the same race."""
+        mock_t = MagicMock()
+        mock_t.side_effect = lambda key, **kwargs: f"mock_{key}"
+        race = build_race(5, seed=8)
+        engine = RaceEngine.from_profile(race)
+        expected, _ = engine.run_to_completion()
+        
+        scheduler = FrameScheduler(None)
+        winner = animacion(5, 1, mock_t, race_profile=race, fast=True, scheduler=scheduler, turbo=4)
+        
+        assert winner == expected
+        # One frame per 4 ticks plus the starting frame
+        assert scheduler.stats()["frames"] == -(-engine.ticks // 4) + 1
+    
     @patch('game.clear_screen')
     @patch('game.cprint')
     def test_animacion_no_race_profile(self, mock_cprint, mock_clear_screen):
@@ -10,12 +10,10 @@ from Hipodromo import (
     cargar_idioma,
     cargar_dinero,
     guardar_dinero,
-    animar_carrera,
-    jugar,
-    cambiar_idioma,
-    toggle_fast,
-    mostrar_saldo,
-    main
+    main,
+    Session,
+    parse_apuesta,
+    leer_estrategia,
 )
 
 
@@ -60,6 +58,30 @@ class TestGameIntegration:
         guardar_dinero(7500)
         mock_set_balance.assert_called_with(7500)
     
+    @patch('Hipodromo.set_balance')
+    @patch('Hipodromo.record_balance')
+    def test_guardar_dinero_ledger_movements(self, mock_record_balance, mock_set_balance):
+        """Test that stakes and payouts are appended to the ledger."""
+        guardar_dinero(4000, -1000, "stake", "s:1")
+        mock_record_balance.assert_called_once_with(-1000, "stake", "s:1")
+        mock_set_balance.assert_not_called()
+    
+    @patch('Hipodromo.HistoryStore')
+    def test_registrar_ronda_history(self, mock_store):
+        """Test that rounds are recorded only when history is enabled."""
+        import Hipodromo
+        race = {"weights": [1.0, 1.0], "odds": [1.8, 1.8]}
+        Hipodromo._historial.cache_clear()
+        Hipodromo.registrar_ronda("s:1", race, 1, 1, 100, 180)
+        mock_store.assert_not_called()
+        Hipodromo.registrar_ronda("s:1", race, 1, 1, 100, 180, activo=True)
+        Hipodromo.registrar_ronda("s:2", race, 2, 1, 100, 0, activo=True)
+        # The mock store must not outlive this test
+        Hipodromo._historial.cache_clear()
+        mock_store.assert_called_once()
+        calls = mock_store.return_value.record_round.call_args_list
+        assert calls[1][0] == ("s:2", race, 2, [(1, 100, 0)])
+    
     @patch('game.build_race')
     @patch('game.animacion')
     def test_animar_carrera_integration(self, mock_animacion, mock_build_race):
@@ -68,11 +90,12 @@ class TestGameIntegration:
         mock_build_race.return_value = mock_race
         mock_animacion.return_value = 2
         
-        with patch('Hipodromo.SEED', 42), patch('Hipodromo.FAST_MODE', True):
-            result = animar_carrera(3, 1)
-            assert result == 2
-            mock_build_race.assert_called_with(3, 42)
-            mock_animacion.assert_called_with(3, 1, mock_race, fast=True)
+        sesion = Session(n_horses=3, seed=42, fast=True)
+        result = sesion.animar_carrera(1)
+        assert result == 2
+        mock_build_race.assert_called_with(3, 42)
+        mock_animacion.assert_called_with(3, 1, sesion.t, race_profile=mock_race, fast=True, fps=12.5,
+                                          instant=False, turbo=1)
 
 
 class TestGameFlowIntegration:
@@ -98,14 +121,13 @@ class TestGameFlowIntegration:
         mock_animacion.return_value = 1  # Player's horse wins
         mock_input_entero.side_effect = [1, 1000, 0]  # Bet on horse 1, bet 1000, then exit
         
-        with patch('Hipodromo.dinero', 5000), patch('Hipodromo.N_HORSES', 5):
-            jugar()
-            
-            # Verify interactions
-            mock_build_race.assert_called()
-            mock_animacion.assert_called()
-            mock_guardar_dinero.assert_called()
-            mock_cprint.assert_called()
+        Session(dinero=5000, n_horses=5, persist=True).jugar()
+        
+        # Verify interactions
+        mock_build_race.assert_called()
+        mock_animacion.assert_called()
+        mock_guardar_dinero.assert_called()
+        mock_cprint.assert_called()
     
     @patch('Hipodromo.cargar_dinero')
     @patch('Hipodromo.guardar_dinero')
@@ -127,14 +149,13 @@ class TestGameFlowIntegration:
         mock_animacion.return_value = 2  # Different horse wins
         mock_input_entero.side_effect = [1, 1000, 0]  # Bet on horse 1, bet 1000, then exit
         
-        with patch('Hipodromo.dinero', 5000), patch('Hipodromo.N_HORSES', 5):
-            jugar()
-            
-            # Verify interactions
-            mock_build_race.assert_called()
-            mock_animacion.assert_called()
-            mock_guardar_dinero.assert_called()
-            mock_cprint.assert_called()
+        Session(dinero=5000, n_horses=5, persist=True).jugar()
+        
+        # Verify interactions
+        mock_build_race.assert_called()
+        mock_animacion.assert_called()
+        mock_guardar_dinero.assert_called()
+        mock_cprint.assert_called()
     
     @patch('Hipodromo.cargar_dinero')
     @patch('Hipodromo.guardar_dinero')
@@ -156,11 +177,36 @@ class TestGameFlowIntegration:
         mock_animacion.return_value = 2  # Player loses
         mock_input_entero.side_effect = [1, 1000]  # Bet all money and lose
         
-        with patch('Hipodromo.dinero', 1000), patch('Hipodromo.N_HORSES', 5):
-            jugar()
-            
-            # Should exit when money reaches 0
-            mock_guardar_dinero.assert_called_with(0)
+        Session(dinero=1000, n_horses=5, persist=True).jugar()
+        
+        # Should exit when money reaches 0
+        mock_guardar_dinero.assert_called_with(0)
+
+
+    @patch('Hipodromo.guardar_dinero')
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.animacion')
+    @patch('Hipodromo.input_entero')
+    @patch('Hipodromo.cprint')
+    @patch('Hipodromo.clear_screen')
+    @patch('builtins.input')
+    def test_jugar_integration_instant(self, mock_input, mock_clear_screen, mock_cprint, mock_input_entero,
+                                       mock_animacion, mock_build_race, mock_guardar_dinero):
+        """Test that instant rounds resolve without animation or screen clears."""
+        mock_build_race.return_value = {
+            "weights": [1.0, 1.0, 1.0, 1.0, 1.0],
+            "odds": [2.0, 2.0, 2.0, 2.0, 2.0]
+        }
+        mock_animacion.return_value = 1
+        mock_input_entero.side_effect = [1, 100, 2, 100, 0]
+        
+        Session(dinero=5000, n_horses=5, instant=True, turbo=3).jugar()
+        
+        assert mock_animacion.call_count == 2
+        for args, kwargs in mock_animacion.call_args_list:
+            assert kwargs["instant"] is True
+            assert kwargs["turbo"] == 3
+        mock_clear_screen.assert_not_called()
 
 
 class TestMenuIntegration:
@@ -178,10 +224,11 @@ class TestMenuIntegration:
         mock_fzf_select.return_value = "Español"
         mock_input.return_value = ""
         
-        with patch('Hipodromo.LANG', 'en'):
-            cambiar_idioma()
-            mock_set_lang.assert_called_with('es')
-            mock_cprint.assert_called()
+        sesion = Session(lang='en', persist=True)
+        sesion.cambiar_idioma()
+        mock_set_lang.assert_called_with('es')
+        mock_cprint.assert_called()
+        assert sesion.lang == 'es'
     
     @patch('Hipodromo.set_fast')
     @patch('Hipodromo.cprint')
@@ -190,10 +237,12 @@ class TestMenuIntegration:
         """Test fast mode toggle integration."""
         mock_input.return_value = ""
         
-        with patch('Hipodromo.FAST_MODE', False):
-            toggle_fast()
-            mock_set_fast.assert_called_with(True)
-            mock_cprint.assert_called()
+        sesion = Session(fast=False, persist=True)
+        sesion.toggle_fast()
+        mock_set_fast.assert_called_with(True)
+        mock_cprint.assert_called()
+        sesion.toggle_fast()
+        mock_set_fast.assert_called_with(False)
     
     @patch('Hipodromo.cprint')
     @patch('Hipodromo.input')
@@ -201,10 +250,352 @@ class TestMenuIntegration:
         """Test balance display integration."""
         mock_input.return_value = ""
         
-        with patch('Hipodromo.dinero', 7500):
-            mostrar_saldo()
-            mock_cprint.assert_called()
-            mock_input.assert_called()
+        Session(dinero=7500).mostrar_saldo()
+        assert "7500" in mock_cprint.call_args.args[0]
+        mock_input.assert_called()
+
+
+class TestSession:
+    """Test independent in-memory player sessions."""
+    
+    RACE = {"weights": [1.0, 1.0, 1.0], "odds": [2.5, 2.5, 2.5]}
+    
+    @patch('Hipodromo.guardar_dinero')
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.animacion')
+    @patch('Hipodromo.input_entero')
+    @patch('Hipodromo.cprint')
+    @patch('Hipodromo.clear_screen')
+    @patch('builtins.input')
+    def test_sessions_are_independent(self, mock_input, mock_clear_screen, mock_cprint, mock_input_entero,
+                                      mock_animacion, mock_build_race, mock_guardar_dinero):
+        """Test that two sessions keep their own balance and never touch config."""
+        mock_build_race.return_value = self.RACE
+        mock_animacion.return_value = 1
+        ana = Session(dinero=1000, n_horses=3, seed=7)
+        bob = Session(dinero=200, n_horses=3, lang="en")
+        
+        from game import compute_decimal_odds
+        odd = compute_decimal_odds(self.RACE["weights"])[0]
+        mock_input_entero.side_effect = [1, 100, 0]  # ana backs the winner
+        ana.jugar()
+        mock_input_entero.side_effect = [2, 200]  # bob loses everything
+        bob.jugar()
+        
+        assert (ana.dinero, ana.ronda) == (1000 - 100 + int(round(100 * odd)), 1)
+        assert (bob.dinero, bob.ronda) == (0, 1)
+        assert ana.id != bob.id
+        mock_guardar_dinero.assert_not_called()
+        seeds = [kwargs["race_profile"]["seed"] for _, kwargs in mock_animacion.call_args_list]
+        assert seeds[0] == "7:1"
+        assert isinstance(seeds[1], int)
+    
+    @patch('Hipodromo.set_lang')
+    @patch('Hipodromo.menu_available', return_value=False)
+    @patch('Hipodromo.cprint')
+    @patch('builtins.input', return_value="1")
+    def test_language_change_is_per_session(self, mock_input, mock_cprint, mock_menu_available, mock_set_lang):
+        """Test that a session switches its own translator only."""
+        sesion = Session(lang="es")
+        sesion.cambiar_idioma()
+        assert sesion.lang == "en"
+        assert sesion.t("menu_exit") == Session(lang="en").t("menu_exit")
+        mock_set_lang.assert_not_called()
+    
+    def test_persisted_sessions_keep_each_others_bets(self, temp_config_dir):
+        """Test that exiting or a stale balance never undoes another session's bet."""
+        import json
+        import config
+        config_file = os.path.join(temp_config_dir, "config.json")
+        with open(config_file, "w") as f:
+            json.dump({"balance": 5000, "ledger_seq": 0}, f)
+        with patch('config.CONFIG_DIR', temp_config_dir), \
+             patch('config.CONFIG_FILE', config_file), \
+             patch('config.CONFIG', {"balance": 5000, "ledger_seq": 0}), \
+             patch('config._dirty_keys', set()), \
+             patch('config._balance_delta', 0), \
+             patch('config._ledger_seq', 0), \
+             patch('config._ledger_tail', 0), \
+             patch('config._ledger_offset', 0), \
+             patch('config._synced_config', None), \
+             config._io_lock:
+            ana = Session(dinero=5000, n_horses=3, persist=True, id="ana")
+            bob = Session(dinero=5000, n_horses=3, persist=True, id="bob")
+            bob.apostar(1, 100, self.RACE, [2.5] * 3, lambda perfil: 2)
+            ana._guardar()
+            assert config.get_balance() == 4900
+            
+            # ana still believes in 5000 but can only stake what is left
+            with patch('Hipodromo.RaceEngine') as mock_engine:
+                mock_engine.from_profile.return_value.run_to_completion.return_value = [2]
+                resumen = ana.jugar_script([(1, 5000)], rondas=1)
+            assert (resumen["staked"], resumen["balance"]) == (4900, 0)
+            assert config.get_balance() == 0
+            with pytest.raises(ValueError):
+                bob.apostar(1, 5000, self.RACE, [2.5] * 3, lambda perfil: 2)
+            assert (bob.dinero, bob.ronda) == (0, 1)
+            # A fresh start replays the ledger to the same balance
+            with open(config_file) as f:
+                snapshot = json.load(f)
+            config._replay_ledger(snapshot)
+            assert snapshot["balance"] == 0
+    
+    def test_session_memory_footprint(self):
+        """Test that a session is a small slotted object."""
+        import tracemalloc
+        Session()
+        assert not hasattr(Session(), "__dict__")
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            sessions = [Session(dinero=5000 + i) for i in range(2000)]
+            per_session = (tracemalloc.get_traced_memory()[0] - before) / len(sessions)
+        finally:
+            tracemalloc.stop()
+        assert per_session < 512
+
+
+class TestScriptedPlay:
+    """Test non-interactive play from --bet and --strategy-file."""
+    
+    RACE = {"weights": [1.0, 1.0, 1.0], "odds": [2.5, 2.5, 2.5], "distance": 100}
+    
+    def test_parse_bets_and_strategy_file(self, temp_config_dir):
+        """Test the HORSE:AMOUNT format on the command line and in files."""
+        import argparse
+        assert parse_apuesta("3:100") == (3, 100)
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_apuesta("3x100")
+        ruta = os.path.join(temp_config_dir, "strategy.txt")
+        with open(ruta, "w") as f:
+            f.write("# favourite first\n1:100\n\n2:50  # hedge\n")
+        assert leer_estrategia(ruta) == [(1, 100), (2, 50)]
+    
+    @patch('Hipodromo.guardar_dinero')
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.animacion', side_effect=AssertionError("animated"))
+    @patch('Hipodromo.input_entero', side_effect=AssertionError("prompted"))
+    @patch('Hipodromo.clear_screen', side_effect=AssertionError("cleared"))
+    @patch('builtins.input', side_effect=AssertionError("prompted"))
+    def test_script_settles_like_jugar(self, mock_input, mock_clear_screen, mock_input_entero,
+                                       mock_animacion, mock_build_race, mock_guardar_dinero):
+        """Test that scripted rounds pay the shown odds with no prompts or animation."""
+        mock_build_race.return_value = self.RACE
+        sesion = Session(dinero=1000, n_horses=3, seed=11)
+        resumen = sesion.jugar_script([(1, 100), (2, 50)], rondas=10)
+        
+        from game import RaceEngine, compute_decimal_odds
+        odds = compute_decimal_odds(self.RACE["weights"])
+        dinero = 1000
+        for ronda in range(1, 11):
+            caballo, apuesta = [(1, 100), (2, 50)][(ronda - 1) % 2]
+            apuesta = min(apuesta, dinero)
+            ganador = RaceEngine(self.RACE["weights"], seed=f"11:{ronda}").run_to_completion()[0]
+            dinero += int(round(apuesta * odds[caballo - 1])) - apuesta if caballo == ganador else -apuesta
+        
+        assert resumen["rounds"] == 10
+        assert resumen["balance"] == sesion.dinero == dinero
+        assert resumen["net"] == resumen["paid"] - resumen["staked"] == dinero - 1000
+        assert resumen["rounds_per_sec"] > 0
+        mock_guardar_dinero.assert_not_called()
+    
+    @patch('Hipodromo.guardar_dinero', return_value=None)
+    @patch('Hipodromo.build_race')
+    def test_script_net_ignores_other_sessions(self, mock_build_race, mock_guardar_dinero):
+        """Test that the summary's net counts only this run's stakes and payouts."""
+        mock_build_race.return_value = self.RACE
+        sesion = Session(dinero=1000, n_horses=3, seed=1, persist=True)
+        # Another session pays 100 into the shared balance before every round
+        with patch('Hipodromo.get_balance', side_effect=lambda actual: actual + 100), \
+             patch('Hipodromo.flush'):
+            resumen = sesion.jugar_script([(1, 10)], rondas=4)
+        assert resumen["net"] == resumen["paid"] - resumen["staked"]
+        assert resumen["balance"] == 1000 + 4 * 100 + resumen["net"]
+    
+    @patch('Hipodromo.build_race')
+    def test_script_stops_when_broke(self, mock_build_race):
+        """Test that stakes are cut to the balance and play ends at zero."""
+        mock_build_race.return_value = self.RACE
+        sesion = Session(dinero=250, n_horses=3)
+        resumen = sesion.jugar_script([(1, 100)], rondas=100000)
+        assert resumen["balance"] == sesion.dinero
+        if sesion.dinero == 0:
+            assert resumen["staked"] - resumen["paid"] == 250
+            assert resumen["rounds"] < 100000
+        with pytest.raises(ValueError):
+            Session(n_horses=3).jugar_script([(4, 100)])
+    
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    def test_main_bet_flags(self, mock_iniciar, mock_set_fast):
+        """Test that --bet/--rounds run a scripted session without prompting."""
+        sesion = mock_iniciar.return_value
+        sesion.salida = None
+        sesion.jugar_script.return_value = {"rounds": 30, "wins": 0, "staked": 0, "paid": 0, "net": 0,
+                                            "balance": 0, "elapsed": 0.0, "rounds_per_sec": 0.0}
+        with patch('sys.argv', ['hipodromo', '--bet', '2:100', '--bet', '1:50', '--rounds', '30']):
+            main()
+        mock_iniciar.assert_called_once_with(preguntar=False)
+        sesion.jugar_script.assert_called_once_with([(2, 100), (1, 50)], 30)
+    
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    def test_main_invalid_script_exits_2(self, mock_iniciar, mock_set_fast, tmp_path, capsys):
+        """Test that a bad --bet or strategy file is a usage error on stderr."""
+        mala = tmp_path / "estrategia.txt"
+        mala.write_text("1:10\nnope\n")
+        for argv in (['--bet', '9:10'], ['--strategy-file', str(mala)], ['--strategy-file', str(tmp_path / "no")]):
+            mock_iniciar.return_value = Session(dinero=1000, n_horses=3, lang="en")
+            with patch('sys.argv', ['hipodromo', *argv]), pytest.raises(SystemExit) as salida:
+                main()
+            assert salida.value.code == 2
+            captured = capsys.readouterr()
+            assert captured.out == ""
+            assert captured.err.startswith("Invalid bet or strategy file")
+    
+    @patch('Hipodromo.set_seed')
+    @patch('Hipodromo.set_horses')
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    def test_main_keeps_state_in_session(self, mock_iniciar, mock_set_fast, mock_set_horses, mock_set_seed):
+        """Test that CLI flags land on the Session from iniciar, not on module globals."""
+        import Hipodromo
+        sesion = Session(dinero=1000, n_horses=5)
+        mock_iniciar.return_value = sesion
+        with patch('Hipodromo.build_race', return_value=self.RACE), \
+             patch('sys.argv', ['hipodromo', '--bet', '1:10', '--rounds', '2', '--horses', '3',
+                                '--seed', '9', '--fast']):
+            main()
+        assert (sesion.n_horses, sesion.seed, sesion.fast, sesion.ronda) == (3, 9, True, 2)
+        assert not hasattr(Hipodromo, "N_HORSES")
+
+
+class TestJsonlOutput:
+    """Test the per-round JSON Lines stream of --output jsonl."""
+    
+    RACE = {"weights": [1.0, 1.2, 0.8], "odds": [2.5, 2.5, 2.5], "distance": 100}
+    
+    class Stream:
+        """StringIO that counts flushes."""
+        
+        def __init__(self):
+            import io
+            self.buffer = io.StringIO()
+            self.writes = 0
+            self.flushes = 0
+        
+        def write(self, data):
+            self.writes += 1
+            return self.buffer.write(data)
+        
+        def flush(self):
+            self.flushes += 1
+        
+        def records(self):
+            import json
+            return [json.loads(line) for line in self.buffer.getvalue().splitlines()]
+    
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.cprint')
+    def test_one_record_per_round(self, mock_cprint, mock_build_race):
+        """Test that each round is one compact line, written and flushed once."""
+        mock_build_race.return_value = self.RACE
+        salida = self.Stream()
+        sesion = Session(dinero=1000, n_horses=3, seed=3, salida=salida)
+        resumen = sesion.jugar_script([(2, 40)], rondas=5)
+        
+        registros = salida.records()
+        assert len(registros) == salida.writes == salida.flushes == resumen["rounds"] == 5
+        assert ", " not in salida.buffer.getvalue()
+        assert [r["round"] for r in registros] == [f"{sesion.id}:{i}" for i in range(1, 6)]
+        assert registros[-1]["balance"] == sesion.dinero
+        assert sum(r["payout"] - r["stake"] for r in registros) == sesion.dinero - 1000
+        primero = registros[0]
+        assert primero["weights"] == self.RACE["weights"]
+        assert primero["seed"] == "3:1"
+        assert (primero["horse"], primero["stake"]) == (2, 40)
+        assert primero["payout"] == (int(round(40 * primero["odds"][1])) if primero["winner"] == 2 else 0)
+        assert 0 <= primero["race_ms"] <= primero["round_ms"]
+        mock_cprint.assert_not_called()
+    
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.animacion')
+    @patch('Hipodromo.input_entero')
+    @patch('Hipodromo.cprint')
+    @patch('Hipodromo.clear_screen')
+    @patch('builtins.input')
+    def test_interactive_rounds_skip_text(self, mock_input, mock_clear_screen, mock_cprint, mock_input_entero,
+                                          mock_animacion, mock_build_race):
+        """Test that jugar emits records instead of colored text and the track."""
+        mock_build_race.return_value = self.RACE
+        mock_input_entero.side_effect = [1, 100, 3, 50, 0]
+        salida = self.Stream()
+        Session(dinero=1000, n_horses=3, salida=salida).jugar()
+        
+        assert [(r["horse"], r["stake"]) for r in salida.records()] == [(1, 100), (3, 50)]
+        mock_animacion.assert_not_called()
+        mock_cprint.assert_not_called()
+        mock_clear_screen.assert_not_called()
+        mock_input.assert_not_called()
+    
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    @patch('Hipodromo.guardar_dinero')
+    @patch('Hipodromo.build_race')
+    def test_main_output_jsonl(self, mock_build_race, mock_guardar_dinero, mock_iniciar, mock_set_fast, capsys):
+        """Test that stdout carries only records and the summary moves to stderr."""
+        import json
+        mock_build_race.return_value = self.RACE
+        mock_iniciar.return_value = Session(dinero=1000, n_horses=3)
+        with patch('sys.argv', ['hipodromo', '--bet', '1:10', '--rounds', '4', '--output', 'jsonl']):
+            main()
+        captured = capsys.readouterr()
+        lineas = captured.out.splitlines()
+        assert len(lineas) == 4
+        assert all(json.loads(linea)["stake"] == 10 for linea in lineas)
+        assert captured.err.strip()
+
+
+    @patch('Hipodromo.flush')
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    @patch('Hipodromo.build_race')
+    @patch('Hipodromo.clear_screen')
+    @patch('builtins.input')
+    def test_menu_talks_on_stderr(self, mock_input, mock_clear_screen, mock_build_race, mock_iniciar,
+                                  mock_set_fast, mock_flush, capsys):
+        """Test that the interactive loop keeps stdout to JSON Lines."""
+        import json
+        mock_build_race.return_value = self.RACE
+        mock_iniciar.return_value = Session(dinero=1000, n_horses=3, lang="en")
+        # Play one round, show the balance, exit
+        mock_input.side_effect = ["1", "2", "100", "0", "3", "", "0"]
+        with patch('sys.argv', ['hipodromo', '--output', 'jsonl']):
+            main()
+        captured = capsys.readouterr()
+        registros = [json.loads(linea) for linea in captured.out.splitlines()]
+        assert [(r["horse"], r["stake"]) for r in registros] == [(2, 100)]
+        assert "Main menu" in captured.err
+        assert "Thanks" in captured.err
+        mock_clear_screen.assert_not_called()
+        assert all(llamada == () for llamada, _ in mock_input.call_args_list)
+
+
+    def test_first_run_prompt_on_stderr(self, tmp_path):
+        """Test that a fresh config's language prompt stays off the JSON Lines stdout."""
+        import sys
+        import json
+        import subprocess
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # English, play, horse 2 for 100, back, exit
+        result = subprocess.run([sys.executable, "Hipodromo.py", "--output", "jsonl"], cwd=project_root,
+                                env=dict(os.environ, HOME=str(tmp_path)), input="1\n1\n2\n100\n0\n0\n",
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0
+        registros = [json.loads(linea) for linea in result.stdout.splitlines()]
+        assert [(r["horse"], r["stake"]) for r in registros] == [(2, 100)]
+        assert result.stderr.startswith("Select language")
+        assert "Main menu" in result.stderr
 
 
 class TestCLIIntegration:
@@ -237,6 +628,26 @@ class TestCLIIntegration:
             mock_parser.add_argument.assert_called()
             mock_parser.parse_known_args.assert_called()
     
+    @patch('Hipodromo.flush')
+    @patch('Hipodromo.set_fast')
+    @patch('Hipodromo.iniciar')
+    @patch('Hipodromo.menu_select')
+    @patch('Hipodromo.menu_available', return_value=True)
+    @patch('Hipodromo.cprint')
+    @patch('Hipodromo.clear_screen')
+    def test_main_selector_skips_clear_and_title(self, mock_clear_screen, mock_cprint, mock_menu_available,
+                                                 mock_menu_select, mock_iniciar, mock_set_fast, mock_flush):
+        """Test that menu iterations on the selector never clear the screen or print the title."""
+        sesion = Session(dinero=1000, n_horses=3, lang="en")
+        mock_iniciar.return_value = sesion
+        # Show the balance twice, then exit
+        mock_menu_select.side_effect = [sesion.t("menu_show_balance")] * 2 + [sesion.t("menu_exit")]
+        with patch('sys.argv', ['hipodromo']), patch('builtins.input', return_value=""):
+            main()
+        assert mock_menu_select.call_count == 3
+        mock_clear_screen.assert_not_called()
+        assert sesion.t("title") not in [args[0] for args, _ in mock_cprint.call_args_list]
+    
     @patch('Hipodromo.argparse.ArgumentParser')
     def test_main_cli_config_flag_integration(self, mock_parser_class):
         """Test CLI config flag integration."""
@@ -294,29 +705,26 @@ class TestErrorHandlingIntegration:
 class TestStateManagementIntegration:
     """Test state management integration across the game."""
     
-    def test_global_state_consistency(self):
-        """Test that global state remains consistent across operations."""
-        with patch('Hipodromo.dinero', 5000), \
-             patch('Hipodromo.N_HORSES', 5), \
-             patch('Hipodromo.FAST_MODE', False), \
-             patch('Hipodromo.SEED', None):
-            
-            # Test that state is preserved across operations
-            assert getattr(Hipodromo, 'dinero', None) == 5000
-            assert getattr(Hipodromo, 'N_HORSES', None) == 5
-            assert getattr(Hipodromo, 'FAST_MODE', None) is False
-            assert getattr(Hipodromo, 'SEED', None) is None
+    def test_session_state_consistency(self):
+        """Test that each session keeps its own state and the module keeps none."""
+        import Hipodromo
+        sesion = Session(dinero=5000, n_horses=5, fast=False, seed=None)
+        otra = Session(dinero=100, n_horses=3, fast=True, seed=7)
+        otra.dinero -= 50
+        
+        assert (sesion.dinero, sesion.n_horses, sesion.fast, sesion.seed) == (5000, 5, False, None)
+        assert (otra.dinero, otra.n_horses, otra.fast, otra.seed) == (50, 3, True, 7)
+        assert getattr(Hipodromo, 'dinero', None) is None
     
     @patch('Hipodromo.guardar_dinero')
     def test_money_state_persistence(self, mock_guardar_dinero):
         """Test that money state is properly persisted."""
-        with patch('Hipodromo.dinero', 5000):
-            # Simulate money changes
-            guardar_dinero(7500)
-            mock_guardar_dinero.assert_called_with(7500)
-            
-            guardar_dinero(0)
-            mock_guardar_dinero.assert_called_with(0)
+        # Simulate money changes
+        guardar_dinero(7500)
+        mock_guardar_dinero.assert_called_with(7500)
+        
+        guardar_dinero(0)
+        mock_guardar_dinero.assert_called_with(0)
 
 
 class TestPerformanceIntegration:
@@ -331,22 +739,19 @@ class TestPerformanceIntegration:
         mock_animacion.return_value = 1
         
         # Test with many horses
-        with patch('Hipodromo.SEED', 42), patch('Hipodromo.FAST_MODE', True):
-            result = animar_carrera(10, 1)
-            assert result == 1
-            mock_build_race.assert_called_with(10, 42)
+        result = Session(n_horses=10, seed=42, fast=True).animar_carrera(1)
+        assert result == 1
+        mock_build_race.assert_called_with(10, 42)
     
     @patch('Hipodromo.input_entero')
     def test_input_performance_integration(self, mock_input_entero):
         """Test input performance integration."""
         mock_input_entero.side_effect = [0]  # Exit immediately
         
-        with patch('Hipodromo.dinero', 5000), \
-             patch('Hipodromo.N_HORSES', 5), \
-             patch('Hipodromo.build_race'), \
+        with patch('Hipodromo.build_race'), \
              patch('Hipodromo.clear_screen'), \
              patch('Hipodromo.cprint'):
             
             # Should handle rapid input without issues
-            jugar()
+            Session(dinero=5000, n_horses=5).jugar()
             mock_input_entero.assert_called()
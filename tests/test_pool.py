@@ -0,0 +1,71 @@
+"""
+Tests for pool.py - pari-mutuel win pools.
+"""
+import time
+import pytest
+from game import payout
+from pool import Pool
+
+
+class TestPool:
+    """Test pool totals, live odds and settlement."""
+
+    def test_odds_follow_the_money(self):
+        """Test odds as the pool less takeout over the money on each horse."""
+        pool = Pool(3, takeout=0.10)
+        pool.add(1, 600, "ana")
+        pool.add(2, 300, "bob")
+        pool.add(3, 100, "eva")
+        assert pool.total == 1000
+        assert pool.all_odds() == [1.5, 3.0, 9.0]
+
+    def test_breakage_and_minimum(self):
+        """Test that odds are cut to the cent and never drop below evens."""
+        pool = Pool(2, takeout=0.15)
+        pool.add(1, 300, "ana")
+        pool.add(2, 700, "bob")
+        # 850 / 300 = 2.8333...
+        assert pool.odds(1) == 2.83
+        pool.add(1, 1000, "ana")
+        pool.remove("bob")
+        assert pool.odds(1) == 1.0
+        assert pool.odds(2) == 0.0
+
+    def test_replace_and_remove_keep_totals(self):
+        """Test that a key holds one bet and withdrawing undoes it."""
+        pool = Pool(3)
+        pool.add(1, 100, "ana")
+        pool.add(2, 50, "ana")
+        assert (pool.totals, pool.total, len(pool)) == ([0, 50, 0], 50, 1)
+        pool.remove("ana")
+        pool.remove("nobody")
+        assert (pool.totals, pool.total, len(pool)) == ([0, 0, 0], 0, 0)
+        with pytest.raises(ValueError):
+            pool.add(4, 10, "ana")
+
+    def test_settle_pays_only_the_winner_pool(self):
+        """Test payouts at the final odds, rounded like fixed-odds bets."""
+        pool = Pool(3, takeout=0.10)
+        pool.add(1, 333, "ana")
+        pool.add(1, 167, "bob")
+        pool.add(2, 500, "eva")
+        odds = pool.odds(1)
+        pagos = pool.settle(1)
+        assert pagos == {"ana": payout(333, odds), "bob": payout(167, odds)}
+        assert sum(pagos.values()) <= pool.total * 0.9 + len(pagos)
+        assert pool.settle(3) == {}
+
+    def test_incremental_updates_are_constant_time(self):
+        """Test that bets and odds reads cost the same on a big pool."""
+        def rate(pool, n):
+            start = time.perf_counter()
+            for i in range(n):
+                pool.add(i % 5 + 1, 10, ("k", i % 1000))
+                pool.odds(i % 5 + 1)
+            return time.perf_counter() - start
+
+        pequeño = Pool(5)
+        grande = Pool(5)
+        for i in range(200000):
+            grande.add(i % 5 + 1, 10, i)
+        assert rate(grande, 20000) < rate(pequeño, 20000) * 3 + 0.05
@@ -0,0 +1,201 @@
+"""
+Tests for server.py - asyncio multiplayer races.
+"""
+import time
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from server import Client, RaceServer
+
+
+async def bettor(port, caballo, monto, lines=None):
+    """Connect, bet once when the race opens and read until the result."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    frames = 0
+    result = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if lines is not None:
+                lines.append(line.decode().strip())
+            if line.startswith(b"RACE"):
+                writer.write(f"BET {caballo} {monto}\n".encode())
+                await writer.drain()
+            elif line.startswith(b"FRAME"):
+                frames += 1
+            elif line.startswith(b"RESULT"):
+                result = [int(x) for x in line.split()[1:]]
+                break
+    finally:
+        writer.close()
+    return frames, result
+
+
+async def load_test(n_clients, **kwargs):
+    """In-process load generator: ``n_clients`` bettors on one shared race."""
+    server = await RaceServer(port=0, **kwargs).start()
+    tasks = [asyncio.create_task(bettor(server.port, i % server.n_horses + 1, 10)) for i in range(n_clients)]
+    while len(server.clients) < n_clients:
+        await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    ganador = await server.run_round()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stats = server.stats()
+    await server.close()
+    return ganador, results, elapsed, stats
+
+
+class TestRaceServer:
+    """Test the line protocol, shared races and settlement."""
+
+    def test_single_round_protocol(self):
+        """Test one bettor through the whole round."""
+        async def run():
+            server = await RaceServer(port=0, n_horses=3, seed=9, window=0.05, fps=None).start()
+            lines = []
+            task = asyncio.create_task(bettor(server.port, 2, 100, lines))
+            while not server.clients:
+                await asyncio.sleep(0.01)
+            ganador = await server.run_round()
+            frames, result = await task
+            await server.close()
+            return ganador, frames, result, lines
+
+        ganador, frames, result, lines = asyncio.run(run())
+        assert lines[0].startswith("HELLO ") and lines[0].endswith(" 5000")
+        assert lines[1].startswith("RACE 1 3 ")
+        assert "OK 2 100" in lines and "GO" in lines
+        assert f"WINNER {ganador}" in lines
+        assert frames > 0
+        stake, payout, balance = result
+        assert stake == 100
+        assert balance == 5000 - 100 + payout
+        assert (payout > 0) == (ganador == 2)
+
+    def test_bets_are_validated(self):
+        """Test that bad and late bets are refused."""
+        server = RaceServer(n_horses=3)
+        client = MagicMock()
+        client.sesion.dinero = 50
+        assert server._apostar(client, ["1", "10"]) == "ERR closed\n"
+        server.abierta = True
+        assert server._apostar(client, ["x"]) == "ERR syntax\n"
+        assert server._apostar(client, ["4", "10"]) == "ERR horse\n"
+        assert server._apostar(client, ["1", "51"]) == "ERR amount\n"
+        assert server._apostar(client, ["1", "50"]) == "OK 1 50\n"
+        assert client.apuesta == (1, 50)
+
+    def test_slow_client_skips_frames(self):
+        """Test that a paused client drops frames but still gets control lines."""
+        server = RaceServer()
+        client = Client(server)
+        client.transport = MagicMock()
+        client.transport.is_closing.return_value = False
+        client.transport.get_write_buffer_size.return_value = 0
+        server.clients.add(client)
+
+        client.pause_writing()
+        server.broadcast(b"FRAME 1 0,0\n")
+        server.anunciar(b"GO\n")
+        client.resume_writing()
+        server.broadcast(b"FRAME 2 1,2\n")
+
+        written = [c.args[0] for c in client.transport.write.call_args_list]
+        assert written == [b"GO\n", b"FRAME 2 1,2\n"]
+        assert server.stats()["frames_dropped"] == client.dropped == 1
+
+    def test_hopeless_client_is_dropped(self):
+        """Test that a client too far behind is disconnected."""
+        server = RaceServer()
+        client = Client(server)
+        client.transport = MagicMock()
+        client.transport.is_closing.return_value = False
+        client.transport.get_write_buffer_size.return_value = 10 * 1024 * 1024
+        client.send(b"GO\n")
+        client.transport.abort.assert_called_once()
+        client.transport.write.assert_not_called()
+
+    def test_frames_are_encoded_once(self):
+        """Test that every client gets the very same frame object."""
+        server = RaceServer()
+        clients = [MagicMock() for _ in range(3)]
+        server.clients.update(clients)
+        frame = b"FRAME 3 1,2,3\n"
+        server.broadcast(frame)
+        for client in clients:
+            assert client.send_frame.call_args.args[0] is frame
+
+    def test_parimutuel_round(self):
+        """Test live pool odds and settlement at the final pool odds."""
+        async def run():
+            server = await RaceServer(port=0, n_horses=2, seed=5, window=0.6, fps=None, parimutuel=True).start()
+            lines = [[] for _ in range(4)]
+            bets = [(1, 300), (1, 100), (2, 400), (2, 200)]
+            tasks = [asyncio.create_task(bettor(server.port, c, m, lines[i])) for i, (c, m) in enumerate(bets)]
+            while len(server.clients) < 4:
+                await asyncio.sleep(0.01)
+            ganador = await server.run_round()
+            results = await asyncio.gather(*tasks)
+            await server.close()
+            return ganador, results, lines
+
+        ganador, results, lines = asyncio.run(run())
+        odds_lines = [line for line in lines[0] if line.startswith("ODDS")]
+        assert odds_lines
+        final = [float(o) for o in odds_lines[-1].split()[1].split(",")]
+        # 1000 staked, 900 after takeout: 400 on horse 1, 600 on horse 2
+        assert final == [2.25, 1.5]
+        for (caballo, monto), (_, (stake, pago, balance)) in zip([(1, 300), (1, 100), (2, 400), (2, 200)], results):
+            assert stake == monto
+            assert pago == (int(round(monto * final[caballo - 1])) if caballo == ganador else 0)
+            assert balance == 5000 - monto + pago
+
+    def test_parimutuel_leaver_still_pays(self):
+        """Test that a bettor who disconnects mid-race has paid into the pool."""
+        async def desertor(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            while True:
+                line = await reader.readline()
+                if line.startswith(b"RACE"):
+                    writer.write(b"BET 1 1000\n")
+                    await writer.drain()
+                elif line.startswith(b"GO") or not line:
+                    writer.close()
+                    return
+
+        async def run():
+            server = await RaceServer(port=0, n_horses=2, seed=2, window=0.2, fps=120, parimutuel=True).start()
+            tasks = [asyncio.create_task(desertor(server.port)), asyncio.create_task(bettor(server.port, 2, 100))]
+            while len(server.clients) < 2:
+                await asyncio.sleep(0.01)
+            sesiones = [client.sesion for client in server.clients]
+            ganador = await server.run_round()
+            await asyncio.gather(*tasks)
+            await server.close()
+            return ganador, sesiones
+
+        ganador, sesiones = asyncio.run(run())
+        # Horse 2 wins this seed: its backer is paid from the leaver's 1000,
+        # which was taken (1100 pooled, 990 after takeout, all to horse 2)
+        assert ganador == 2
+        assert sorted(sesion.dinero for sesion in sesiones) == [4000, 5000 - 100 + 990]
+
+    def test_load_1000_clients(self):
+        """Test one shared race for 1000 concurrent local connections."""
+        ganador, results, elapsed, stats = asyncio.run(
+            load_test(1000, n_horses=5, seed=4, window=0.5, fps=None)
+        )
+        assert stats["peak_clients"] == 1000
+        assert stats["bets"] == 1000
+        assert all(result is not None for _, result in results)
+        for i, (frames, (stake, payout, balance)) in enumerate(results):
+            assert frames > 0
+            assert stake == 10
+            assert (payout > 0) == (i % 5 + 1 == ganador)
+            assert balance == 5000 - stake + payout
+        # Fan-out of one frame to 1000 sockets stays well under a frame period
+        assert stats["broadcast_ms"] < 80
+        assert elapsed < 30
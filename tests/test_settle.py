@@ -0,0 +1,82 @@
+"""
+Tests for settle.py - bulk settlement of bet batches.
+"""
+import random
+import pytest
+from unittest.mock import patch
+from game import payout
+from settle import WIN, settle
+
+
+ODDS = [2.5, 1.5, 4.37, 6.1]
+ORDER = [2, 4, 1, 3]
+
+
+def batch(n, seed=0):
+    rng = random.Random(seed)
+    players = [f"p{rng.randrange(50)}" for _ in range(n)]
+    horses = [rng.randint(1, 4) for _ in range(n)]
+    stakes = [rng.randint(1, 999) for _ in range(n)]
+    kinds = [rng.choice(("win", WIN)) for _ in range(n)]
+    return players, horses, stakes, kinds
+
+
+class TestSettle:
+    """Test payouts, per-player deltas and both backends."""
+
+    def test_win_payouts_round_like_jugar(self):
+        """Test that win bets pay exactly int(round(stake * odds)), halves to even."""
+        result = settle(["a", "b", "c", "d"], [2, 2, 1, 4], [1, 3, 100, 50], ["win"] * 4, [2, 1, 3, 4], ODDS)
+        # 1 * 1.5 = 1.5 -> 2 and 3 * 1.5 = 4.5 -> 4, as round() does
+        assert list(result["payouts"]) == [payout(1, 1.5), payout(3, 1.5), 0, 0] == [2, 4, 0, 0]
+        assert list(result["deltas"]) == [1, 1, -100, -50]
+
+    def test_only_the_winner_pays(self):
+        """Test that bets on the runner-up lose like any other."""
+        result = settle(["a", "a", "b"], [2, 4, 1], [100, 100, 100], [WIN, WIN, WIN], ORDER, ODDS)
+        assert list(result["payouts"]) == [payout(100, ODDS[1]), 0, 0]
+        assert result["balance_deltas"] == {"a": 150 - 200, "b": -100}
+
+    def test_backends_agree(self):
+        """Test that the NumPy pass matches the scalar loop bet by bet."""
+        pytest.importorskip("numpy")
+        players, horses, stakes, kinds = batch(5000)
+        fast = settle(players, horses, stakes, kinds, ORDER, ODDS, backend="numpy")
+        slow = settle(players, horses, stakes, kinds, ORDER, ODDS, backend="python")
+        assert list(fast["payouts"]) == slow["payouts"]
+        assert fast["balance_deltas"] == slow["balance_deltas"]
+        assert sum(slow["balance_deltas"].values()) == sum(slow["deltas"])
+
+    def test_auto_falls_back_without_numpy(self):
+        """Test the pure-Python backend when NumPy is missing."""
+        with patch('settle.np', None):
+            result = settle(["a"], [2], [10], [WIN], ORDER, ODDS)
+            assert result["payouts"] == [15]
+            with pytest.raises(RuntimeError):
+                settle(["a"], [2], [10], [WIN], ORDER, ODDS, backend="numpy")
+
+    @pytest.mark.parametrize("backend", ["python", "numpy"])
+    def test_invalid_bets(self, backend):
+        """Test that unknown horses and bet types, place bets included, are refused."""
+        if backend == "numpy":
+            pytest.importorskip("numpy")
+        with pytest.raises(ValueError):
+            settle(["a"], [5], [10], ["win"], ORDER, ODDS, backend=backend)
+        for kind in ("place", 1):
+            with pytest.raises(ValueError):
+                settle(["a"], [1], [10], [kind], ORDER, ODDS, backend=backend)
+
+    def test_100k_bets_are_fast(self):
+        """Test computing 100k columnar bets well under 100 ms (the store write is not timed)."""
+        np = pytest.importorskip("numpy")
+        rng = np.random.default_rng(7)
+        n = 100000
+        players = rng.integers(0, 10000, n)
+        result = settle(players, rng.integers(1, 5, n), rng.integers(1, 1000, n), np.zeros(n, dtype=int), ORDER, ODDS)
+        best = min(
+            settle(players, result["horses"], result["stakes"], result["kinds"], ORDER, ODDS)["elapsed"]
+            for _ in range(3)
+        )
+        assert len(result["payouts"]) == n
+        assert sum(result["balance_deltas"].values()) == int(result["deltas"].sum())
+        assert best < 0.1
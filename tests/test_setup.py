@@ -23,6 +23,31 @@ def test_imports():
         pytest.fail(f"Failed to import module: {e}")
 
 
+def test_imports_have_no_side_effects(tmp_path):
+    """Test that importing the modules touches no files, spawns nothing and never prompts."""
+    import subprocess
+    code = (
+        "import sys, os, builtins\n"
+        "home = os.path.realpath(os.environ['HOME'])\n"
+        "events = []\n"
+        "def hook(event, args):\n"
+        "    if event == 'open' and isinstance(args[0], str) and os.path.realpath(args[0]).startswith(home):\n"
+        "        events.append((event, args[0]))\n"
+        "    elif event in ('subprocess.Popen', 'os.system', 'os.posix_spawn', 'os.exec'):\n"
+        "        events.append((event, str(args[0])))\n"
+        "sys.addaudithook(hook)\n"
+        "builtins.input = lambda *a: events.append(('input', a))\n"
+        "import game, config, store, simulate, Hipodromo\n"
+        "game.build_race(5)\n"
+        "print(events)\n"
+    )
+    env = dict(os.environ, HOME=str(tmp_path))
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+    assert list(tmp_path.iterdir()) == []
+
+
 def test_basic_functionality():
     """Test basic functionality of core modules."""
     # Test game module
@@ -0,0 +1,144 @@
+"""
+Tests for simulate.py - Headless bulk race simulation.
+"""
+import os
+import sys
+import subprocess
+import pytest
+from unittest.mock import patch
+from game import build_race
+from i18n import translator
+from simulate import simulate_races, simulate_batch, print_summary
+
+
+class TestSimulateRaces:
+    """Test the headless simulator."""
+    
+    def test_simulate_counts(self):
+        """Test that every race produces exactly one winner."""
+        summary = simulate_races(200, 5, seed=1)
+        assert summary["races"] == 200
+        assert len(summary["wins"]) == 5
+        assert sum(summary["wins"]) == 200
+        assert abs(sum(summary["win_rates"]) - 1.0) < 1e-9
+        assert summary["races_per_sec"] > 0
+    
+    def test_simulate_reproducible_with_seed(self):
+        """Test that a seeded simulation is fully reproducible."""
+        first = simulate_races(100, 4, seed=123)
+        second = simulate_races(100, 4, seed=123)
+        assert first["wins"] == second["wins"]
+        assert first["mean_ticks"] == second["mean_ticks"]
+    
+    def test_simulate_uses_given_profile(self):
+        """Test that a provided race profile is simulated as-is."""
+        race = build_race(3, seed=5)
+        summary = simulate_races(50, race_profile=race, seed=5)
+        assert summary["odds"] == race["odds"]
+        assert len(summary["wins"]) == 3
+    
+    def test_simulate_race_length(self):
+        """Test that mean race length matches a 0-2 step to distance 100."""
+        summary = simulate_races(200, 5, seed=2)
+        # Roughly 1 step per tick plus a small bonus; the leader needs < 100 ticks
+        assert 60 < summary["mean_ticks"] < 100
+    
+    def test_simulate_zero_races(self):
+        """Test that an empty run does not divide by zero."""
+        summary = simulate_races(0, 3, seed=1)
+        assert summary["wins"] == [0, 0, 0]
+        assert summary["mean_ticks"] == 0
+
+
+class TestSimulateBackends:
+    """Test the NumPy and pure-Python backends."""
+    
+    def test_python_backend(self):
+        """Test that the pure-Python backend tallies every race."""
+        wins, total_ticks = simulate_batch(100, [1.0, 1.2, 0.8], seed=4, backend="python")
+        assert sum(wins) == 100
+        assert total_ticks > 0
+    
+    def test_auto_falls_back_without_numpy(self):
+        """Test that auto selects the pure-Python path when NumPy is missing."""
+        with patch('simulate.np', None):
+            wins, _ = simulate_batch(50, [1.0, 1.0], seed=4)
+            assert wins == simulate_batch(50, [1.0, 1.0], seed=4, backend="python")[0]
+            with pytest.raises(RuntimeError):
+                simulate_batch(10, [1.0, 1.0], backend="numpy")
+    
+    def test_numpy_backend_counts(self):
+        """Test that the vectorized backend tallies every race across batches."""
+        pytest.importorskip("numpy")
+        with patch('simulate.BATCH_SIZE', 64):
+            wins, total_ticks = simulate_batch(300, [1.0] * 7, seed=1, backend="numpy")
+        assert sum(wins) == 300
+        assert 60 * 300 < total_ticks < 100 * 300
+    
+    def test_numpy_backend_reproducible(self):
+        """Test that the vectorized backend is reproducible for int and str seeds."""
+        pytest.importorskip("numpy")
+        for seed in (7, "abc"):
+            first = simulate_batch(500, [1.0, 1.3, 0.7], seed=seed, backend="numpy")
+            second = simulate_batch(500, [1.0, 1.3, 0.7], seed=seed, backend="numpy")
+            assert first == second
+    
+    def test_numpy_matches_python_distribution(self):
+        """Test that both backends agree on win rates and race length."""
+        pytest.importorskip("numpy")
+        weights = [0.6, 1.0, 1.4, 1.2]
+        races = 4000
+        fast_wins, fast_ticks = simulate_batch(races, weights, seed=11, backend="numpy")
+        slow_wins, slow_ticks = simulate_batch(races, weights, seed=11, backend="python")
+        for fast, slow in zip(fast_wins, slow_wins):
+            # Well within 5 standard errors for p ~ 0.25
+            assert abs(fast - slow) / races < 0.05
+        assert abs(fast_ticks - slow_ticks) / races < 1.0
+    
+    def test_numpy_long_track(self):
+        """Test that tracks too long for int8 positions still finish."""
+        pytest.importorskip("numpy")
+        wins, total_ticks = simulate_batch(20, [1.0, 1.0], distance=400, seed=2, backend="numpy")
+        assert sum(wins) == 20
+        assert total_ticks > 20 * 200
+
+
+class TestPrintSummary:
+    """Test summary output."""
+    
+    def test_print_summary(self, capsys):
+        """Test that the summary prints one line per horse plus header/footer."""
+        summary = simulate_races(20, 3, seed=9)
+        print_summary(summary, translator("en"))
+        lines = capsys.readouterr().out.strip().splitlines()
+        assert lines[0] == "Simulated 20 races:"
+        assert len(lines) == 5
+        assert "races/s" in lines[-1]
+
+
+class TestSimulateCLI:
+    """Test the --simulate CLI mode."""
+    
+    @patch('Hipodromo.set_seed')
+    @patch('Hipodromo.set_horses')
+    @patch('Hipodromo.clear_screen')
+    def test_main_simulate(self, mock_clear_screen, mock_set_horses, mock_set_seed, capsys):
+        """Test that --simulate prints a report and leaves config alone."""
+        from Hipodromo import main
+        with patch('sys.argv', ['hipodromo', '--simulate', '30', '--horses', '4', '--seed', '8']):
+            main()
+        out = capsys.readouterr().out
+        assert out.count("\n") == 6
+        mock_clear_screen.assert_not_called()
+        mock_set_horses.assert_not_called()
+        mock_set_seed.assert_not_called()
+    
+    def test_one_shots_never_prompt(self, tmp_path):
+        """Test that one-shot commands on a fresh config skip the language prompt."""
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, HOME=str(tmp_path))
+        for argv in (["--simulate", "5"], ["--config"], ["--roi", "5"]):
+            result = subprocess.run([sys.executable, "Hipodromo.py", *argv], cwd=project_root, env=env,
+                                    stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+            assert result.returncode == 0
+            assert "Select language" not in result.stdout
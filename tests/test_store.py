@@ -0,0 +1,133 @@
+"""
+Tests for store.py - SQLite history of rounds and bets.
+"""
+import os
+import sqlite3
+import time
+import pytest
+from store import HistoryStore
+from settle import settle
+
+
+RACE = {"weights": [1.0, 2.0, 3.0], "odds": [4.5, 2.8, 1.9], "distance": 100, "seed": "s:1"}
+
+
+@pytest.fixture
+def store(temp_config_dir):
+    history = HistoryStore(os.path.join(temp_config_dir, "history.sqlite3"), batch_size=1)
+    yield history
+    history.close()
+
+
+class TestHistoryStore:
+    """Test recording and querying race history."""
+
+    def test_wal_mode_and_indexes(self, store):
+        """Test that the database runs in WAL mode with the query indexes."""
+        conn = sqlite3.connect(store.path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"rounds_ts", "rounds_horses_ts", "rounds_player_ts", "bets_player_ts"} <= indexes
+        conn.close()
+
+    def test_inserts_are_batched(self, temp_config_dir):
+        """Test that rounds reach the database one batch per transaction."""
+        path = os.path.join(temp_config_dir, "history.sqlite3")
+        history = HistoryStore(path, batch_size=3)
+        reader = sqlite3.connect(path)
+        count = lambda: reader.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+        history.record_round("r1", RACE, 1, [(1, 100, 450)], player="ana")
+        history.record_round("r2", RACE, 2, [(1, 100, 0)], player="ana")
+        assert count() == 0
+        history.record_round("r3", RACE, 3, [(1, 100, 0)], player="ana")
+        assert count() == 3
+        history.record_round("r4", RACE, 3, [(3, 50, 95)], player="ana")
+        history.close()
+        assert count() == 4
+        assert reader.execute("SELECT SUM(stake) FROM bets").fetchone()[0] == 350
+        reader.close()
+
+    def test_round_row(self, store):
+        """Test that the race profile and winner are stored with the round."""
+        store.record_round("r1", RACE, 2, [(2, 10, 28)], player="ana", ts=1.0)
+        row = sqlite3.connect(store.path).execute(
+            "SELECT id, ts, player, num_horses, distance, seed, odds, winner FROM rounds"
+        ).fetchone()
+        assert row == ("r1", 1.0, "ana", 3, 100, "s:1", "[4.5,2.8,1.9]", 2)
+
+    def test_roi_over_last_rounds(self, store):
+        """Test ROI over the most recent rounds, optionally per player."""
+        store.record_round("old", RACE, 1, [(1, 1000, 0)], player="ana", ts=1.0)
+        store.record_round("r1", RACE, 1, [(1, 100, 450)], player="ana", ts=2.0)
+        store.record_round("r2", RACE, 2, [(1, 100, 0)], player="ana", ts=3.0)
+        store.record_round("r3", RACE, 3, [(3, 100, 190)], player="bob", ts=4.0)
+
+        assert store.roi(last=2, player="ana") == {
+            "rounds": 2, "staked": 200, "paid": 450, "net": 250, "roi": 1.25,
+        }
+        everyone = store.roi(last=10)
+        assert (everyone["rounds"], everyone["staked"], everyone["paid"]) == (4, 1300, 640)
+        assert store.roi(player="nobody")["roi"] == 0.0
+
+    def test_win_rates(self, store):
+        """Test win shares grouped by field size."""
+        for i, winner in enumerate((1, 1, 3, 2)):
+            store.record_round(f"r{i}", RACE, winner, player="ana", ts=float(i))
+        assert store.win_rates(3) == [0.5, 0.25, 0.25]
+        assert store.win_rates(5) == [0.0] * 5
+
+    def test_roi_uses_index(self, store):
+        """Test that the recent-rounds scan is served by an index."""
+        plan = " ".join(
+            str(row[-1]) for row in store._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM rounds WHERE player = ? ORDER BY ts DESC LIMIT ?",
+                ("ana", 10),
+            )
+        )
+        assert "rounds_player_ts" in plan
+
+    def test_roi_10k_rounds_is_fast(self, temp_config_dir):
+        """Test ROI over 10k rounds in a bulk-loaded history."""
+        history = HistoryStore(os.path.join(temp_config_dir, "history.sqlite3"), batch_size=1000)
+        for i in range(12000):
+            history.record_round(f"r{i}", RACE, i % 3 + 1, [(1, 10, 45 if i % 3 == 0 else 0)],
+                                 player="ana", ts=float(i))
+        history.flush()
+        start = time.perf_counter()
+        stats = history.roi(last=10000, player="ana")
+        elapsed = time.perf_counter() - start
+        history.close()
+        assert stats["rounds"] == 10000
+        assert stats["staked"] == 100000
+        assert elapsed < 0.5
+
+    def test_record_settlement_in_one_transaction(self, store):
+        """Test that a settled batch lands as one round, its bets and balances."""
+        odds = [4.5, 2.8, 1.9]
+        for round_id, winner in (("r1", 2), ("r2", 1)):
+            result = settle(["ana", "bob", "ana"], [2, 1, 3], [100, 50, 10], ["win"] * 3,
+                            [winner, 3, 1 if winner == 2 else 2], odds)
+            store.record_settlement(round_id, dict(RACE, odds=odds), winner, result)
+        conn = sqlite3.connect(store.path)
+        assert conn.execute("SELECT COUNT(*) FROM bets").fetchone()[0] == 6
+        assert conn.execute("SELECT COUNT(*) FROM bets WHERE kind = 'win'").fetchone()[0] == 6
+        assert conn.execute("SELECT player FROM rounds WHERE id = 'r1'").fetchone()[0] == "house"
+        # r1: ana +180 -10, bob -50; r2: ana -100 -10, bob +175
+        assert store.balance("bob") == -50 + 175
+        assert store.balance("ana") == (280 - 100 - 10) + (-100 - 10)
+        assert store.balance("nobody") == 0
+
+    def test_migrates_old_databases(self, temp_config_dir):
+        """Test that a database from before bet types gains them once."""
+        path = os.path.join(temp_config_dir, "history.sqlite3")
+        HistoryStore(path).close()
+        conn = sqlite3.connect(path)
+        conn.executescript("DROP TABLE bets; DROP TABLE balances; PRAGMA user_version = 0;")
+        conn.close()
+        history = HistoryStore(path)
+        history.record_round("r1", RACE, 1, [(1, 100, 450)], player="ana")
+        history.close()
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        assert conn.execute("SELECT kind FROM bets").fetchone()[0] == "win"
+        conn.close()
@@ -1,7 +1,10 @@
 """
 Tests for utils.py - Utility functions for input validation, screen clearing, and fzf integration.
 """
+import io
 import os
+import time
+import threading
 import subprocess
 import pytest
 from unittest.mock import patch, MagicMock, call
@@ -9,8 +12,16 @@ from utils import (
     clear_screen,
     input_entero,
     fzf_available,
-    fzf_select
+    fzf_select,
+    display_width,
+    FrameRenderer,
+    fuzzy_score,
+    parse_keys,
+    Selector,
+    menu_available,
+    menu_select
 )
+import utils
 
 
 class TestClearScreen:
@@ -128,6 +139,9 @@ class TestInputEntero:
 class TestFzfAvailable:
     """Test fzf availability checking."""
     
+    def setup_method(self):
+        utils._fzf_probe.clear()
+    
     @patch('shutil.which')
     def test_fzf_available_true(self, mock_which):
         """Test when fzf is available."""
@@ -149,6 +163,16 @@ class TestFzfAvailable:
         assert fzf_available() is False
 
 
+    @patch('shutil.which', return_value="/usr/bin/fzf")
+    def test_fzf_available_is_cached(self, mock_which):
+        """Test that repeated checks look PATH up once until PATH changes."""
+        assert all(fzf_available() for _ in range(5))
+        mock_which.assert_called_once_with("fzf")
+        with patch.dict(os.environ, {"PATH": "/elsewhere"}):
+            assert fzf_available() is True
+        assert mock_which.call_count == 2
+
+
 class TestFzfSelect:
     """Test fzf selection functionality."""
     
@@ -250,6 +274,191 @@ class TestFzfSelect:
         assert result == "Option with émojis 🐎"
 
 
+class TestFrameRenderer:
+    """Test the diff-based ANSI frame renderer."""
+    
+    def test_display_width(self):
+        """Test that wide glyphs take two columns."""
+        assert display_width("abc") == 3
+        assert display_width("a🐴") == 3
+        assert display_width("") == 0
+    
+    def test_enter_and_leave_alternate_screen(self):
+        """Test that the alternate screen is entered and left exactly once."""
+        stream = io.StringIO()
+        with FrameRenderer(stream) as renderer:
+            renderer.draw(["a"])
+            renderer.draw(["b"])
+        out = stream.getvalue()
+        assert out.count("\x1b[?1049h") == 1
+        assert out.endswith(FrameRenderer.LEAVE)
+    
+    def test_only_changed_tail_is_rewritten(self):
+        """Test that a moved horse rewrites just the end of its line."""
+        stream = io.StringIO()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["| Horse 1  🐴", "| Horse 2  🐴"])
+        stream.seek(0)
+        stream.truncate()
+        renderer.draw(["| Horse 1   🐴", "| Horse 2  🐴"])
+        assert stream.getvalue() == "\x1b[1;12H 🐴\x1b[K"
+    
+    def test_column_accounts_for_wide_glyphs(self):
+        """Test that the cursor column skips two cells per emoji."""
+        stream = io.StringIO()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["🐴a"])
+        stream.seek(0)
+        stream.truncate()
+        renderer.draw(["🐴b"])
+        assert stream.getvalue() == "\x1b[1;3Hb\x1b[K"
+    
+    def test_unchanged_frame_writes_nothing(self):
+        """Test that an identical frame costs zero bytes."""
+        stream = MagicMock()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["x", "y"])
+        renderer.draw(["x", "y"])
+        assert stream.write.call_count == 1
+        assert renderer.stats()["frames"] == 2
+    
+    def test_one_write_per_frame(self):
+        """Test that a frame touching several lines is a single write."""
+        stream = MagicMock()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["a", "b", "c"])
+        renderer.draw(["A", "B", "C"])
+        assert stream.write.call_count == 2
+    
+    def test_colored_prefix_rewrites_whole_line(self):
+        """Test that a diff after a color escape restarts the line."""
+        stream = io.StringIO()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["\x1b[94mTitle A\x1b[0m"])
+        stream.seek(0)
+        stream.truncate()
+        renderer.draw(["\x1b[94mTitle B\x1b[0m"])
+        assert stream.getvalue().startswith("\x1b[1;1H\x1b[94m")
+    
+    def test_removed_lines_are_cleared(self):
+        """Test that lines missing from the new frame are erased."""
+        stream = io.StringIO()
+        renderer = FrameRenderer(stream)
+        renderer.draw(["a", "b"])
+        stream.seek(0)
+        stream.truncate()
+        renderer.draw(["a"])
+        assert stream.getvalue() == "\x1b[2;1H\x1b[K"
+
+
+class _Espejo:
+    """Stream that records writes and signals each one."""
+    
+    def __init__(self):
+        self.writes = []
+        self.escrito = threading.Event()
+    
+    def write(self, data):
+        self.writes.append(data)
+        self.escrito.set()
+    
+    def flush(self):
+        pass
+
+
+class TestSelector:
+    """Test fuzzy matching, key decoding and the in-process menu."""
+    
+    MENU = ["1) Play", "2) Change language", "3) Show balance", "4) Toggle fast mode", "0) Exit"]
+    
+    def test_fuzzy_score(self):
+        """Test subsequence matching, accents and ranking."""
+        assert fuzzy_score("", "Exit") == 0
+        assert fuzzy_score("xz", "Exit") is None
+        assert fuzzy_score("espanol", "Español") is not None
+        assert fuzzy_score("la", "Change language") > fuzzy_score("la", "Toggle fast mode")
+    
+    def test_parse_keys(self):
+        """Test arrows, editing keys and characters in one read."""
+        assert parse_keys("\x1b[Aab\x7f\x1b[B\r") == ["up", "a", "b", "backspace", "down", "enter"]
+        assert parse_keys("\x1b") == ["esc"]
+        assert parse_keys("\x1b[1;5Cx") == ["x"]
+    
+    def test_hotkeys_pick_on_one_key(self):
+        """Test that numbered labels answer to their digit."""
+        selector = Selector(self.MENU, "Menu")
+        assert selector.handle("0") is True
+        assert selector.result == "0) Exit"
+        selector = Selector(["English", "Español"], "Language", hotkeys=["1", "2"])
+        assert selector.handle("2") is True
+        assert selector.result == "Español"
+    
+    def test_typing_filters_incrementally(self):
+        """Test that the query narrows matches and backspace widens them."""
+        selector = Selector(self.MENU, "Menu")
+        for key in "lan":
+            selector.handle(key)
+        assert [selector.options[i] for i in selector.matches][0] == "2) Change language"
+        assert len(selector.matches) < len(self.MENU)
+        # Digits are part of the query once typing has started
+        selector.handle("9")
+        assert selector.matches == [] and selector.result is None
+        assert selector.handle("enter") is False
+        for _ in range(4):
+            selector.handle("backspace")
+        assert selector.matches == list(range(len(self.MENU)))
+    
+    def test_cursor_and_cancel(self):
+        """Test arrow navigation, enter and escape."""
+        selector = Selector(self.MENU, "Menu")
+        selector.handle("up")
+        selector.handle("down")
+        selector.handle("down")
+        assert selector.lines()[3].startswith(Selector.MARK)
+        assert selector.handle("enter") is True
+        assert selector.result == "3) Show balance"
+        selector = Selector(self.MENU, "Menu")
+        assert selector.handle("esc") is True
+        assert selector.result is None
+    
+    def test_menu_unavailable_without_tty(self):
+        """Test that piped stdin falls back to numbered prompts."""
+        with patch('sys.stdin', io.StringIO("")):
+            assert menu_available() is False
+    
+    @pytest.mark.skipif(utils.termios is None, reason="needs a POSIX terminal")
+    def test_menu_select_in_pty(self):
+        """Test keypress-to-redraw latency on a real pty, with no process spawned."""
+        master, slave = os.openpty()
+        espejo = _Espejo()
+        resultado = []
+        with patch('subprocess.Popen', side_effect=AssertionError("spawned")), \
+             patch('os.fork', side_effect=AssertionError("forked")):
+            hilo = threading.Thread(
+                target=lambda: resultado.append(menu_select(self.MENU, "Menu", fd=slave, renderer=FrameRenderer(espejo)))
+            )
+            try:
+                hilo.start()
+                assert espejo.escrito.wait(2)
+                latencias = []
+                for key in ["s", "h", "o", "\x7f", "\x7f", "\x7f", "\x1b[B", "\x1b[A"] * 4:
+                    espejo.escrito.clear()
+                    start = time.perf_counter()
+                    os.write(master, key.encode())
+                    assert espejo.escrito.wait(2)
+                    latencias.append(time.perf_counter() - start)
+                os.write(master, b"3")
+                hilo.join(2)
+            finally:
+                os.close(master)
+                os.close(slave)
+        assert resultado == ["3) Show balance"]
+        assert espejo.writes[-1] == FrameRenderer.LEAVE
+        latencias.sort()
+        # Far inside one 60 Hz frame (16 ms); the median here is ~60 us
+        assert latencias[len(latencias) // 2] < 0.005
+
+
 class TestUtilsEdgeCases:
     """Test edge cases in utility functions."""
     
@@ -0,0 +1,106 @@
+"""
+Tests for warm.py - warm daemon and Unix-socket client.
+"""
+import os
+import sys
+import json
+import socket
+import time
+import subprocess
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the daemon forks per run")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A daemon serving a throwaway HOME; yields a client runner."""
+    config_dir = tmp_path / ".config" / "hipodromo"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.json").write_text(json.dumps({"lang": "en", "balance": 5000}))
+    env = dict(os.environ, HOME=str(tmp_path))
+    proc = subprocess.Popen([sys.executable, "Hipodromo.py", "--daemon"], cwd=project_root, env=env,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = config_dir / "daemon.sock"
+    deadline = time.time() + 20
+    while not socket_path.exists() and time.time() < deadline:
+        time.sleep(0.05)
+
+    def client(*argv):
+        return subprocess.run([sys.executable, "warm.py", *argv], cwd=project_root, env=env,
+                              stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+
+    client.config_dir = config_dir
+    client.socket_path = socket_path
+    yield client
+    client("--daemon-stop")
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+class TestWarmDaemon:
+    """Test running commands through the warm daemon."""
+
+    def test_socket_is_private(self, daemon):
+        """Test that only the owner can talk to the daemon."""
+        assert daemon.socket_path.exists()
+        assert oct(daemon.socket_path.stat().st_mode & 0o777) == "0o600"
+
+    def test_commands_match_cold_runs(self, daemon):
+        """Test that output and exit status come back through the socket."""
+        result = daemon("--config")
+        assert result.returncode == 0
+        assert result.stdout.strip() == str(daemon.config_dir / "config.json")
+
+        warm = daemon("--simulate", "300", "--seed", "4", "--horses", "3")
+        cold = subprocess.run([sys.executable, "Hipodromo.py", "--simulate", "300", "--seed", "4", "--horses", "3"],
+                              cwd=project_root, env=dict(os.environ, HOME=str(daemon.config_dir.parent.parent)),
+                              stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+        # The last line carries timings
+        assert warm.stdout.splitlines()[:-1] == cold.stdout.splitlines()[:-1]
+
+        bad = daemon("--output", "bogus")
+        assert bad.returncode == 2
+        assert "invalid choice" in bad.stderr
+
+    def test_runs_get_their_own_session(self, daemon):
+        """Test that forked runs persist to the ledger under distinct round ids."""
+        for _ in range(2):
+            assert daemon("--bet", "1:10", "--rounds", "2", "--seed", "3").returncode == 0
+        with open(daemon.config_dir / "ledger.jsonl") as f:
+            rounds = [json.loads(line)["round"] for line in f if '"stake"' in line]
+        assert len(rounds) == 4
+        assert len(set(rounds)) == 4
+
+    def test_stop(self, daemon):
+        """Test that --daemon-stop shuts the daemon down and removes its socket."""
+        assert daemon("--daemon-stop").returncode == 0
+        deadline = time.time() + 10
+        while daemon.socket_path.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        assert not daemon.socket_path.exists()
+
+    def test_stalled_client_does_not_block_others(self, daemon):
+        """Test that a client that connects and never sends is dropped."""
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # The socket file exists from bind(), slightly before listen()
+        deadline = time.time() + 10
+        while True:
+            try:
+                stalled.connect(str(daemon.socket_path))
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+        try:
+            start = time.time()
+            result = daemon("--config")
+            assert result.returncode == 0
+            assert time.time() - start < 30
+        finally:
+            stalled.close()
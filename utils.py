@@ -1,6 +1,15 @@
 import os
+import sys
+import codecs
 import shutil
 import subprocess
+import unicodedata
+
+try:
+    import termios
+    import tty
+except ImportError:  # Windows: menus fall back to numbered prompts
+    termios = tty = None
 
 
 def clear_screen():
@@ -10,27 +19,119 @@ def clear_screen():
         os.system("clear")
 
 
-def input_entero(prompt, minimo=None, maximo=None, invalid_msg=None, min_msg=None, max_msg=None):
+def display_width(text):
+    """Terminal columns taken by ``text`` (wide glyphs such as emoji count 2)."""
+    return sum(2 if unicodedata.east_asian_width(c) in ("W", "F") else 1 for c in text)
+
+
+class FrameRenderer:
+    """Draw full-screen frames in the terminal's alternate screen.
+
+    Each frame is a list of lines. Only the tail of each line that changed
+    since the previous frame is rewritten, positioned with cursor escapes,
+    and the whole frame goes out in a single write. Nothing is spawned.
+    """
+
+    ENTER = "\x1b[?1049h\x1b[?25l\x1b[H\x1b[2J"
+    LEAVE = "\x1b[?25h\x1b[?1049l"
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.active = False
+        self.frames = 0
+        self.bytes_written = 0
+        self._lines = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def start(self):
+        if not self.active:
+            self.active = True
+            self._lines = []
+            self._write(self.ENTER)
+
+    def stop(self):
+        if self.active:
+            self.active = False
+            self._write(self.LEAVE)
+
+    def draw(self, lines):
+        out = []
+        for row, line in enumerate(lines):
+            old = self._lines[row] if row < len(self._lines) else None
+            if line == old:
+                continue
+            start = len(os.path.commonprefix([old, line])) if old is not None else 0
+            # Cutting inside or after a color escape would lose its state
+            if "\x1b" in line[:start]:
+                start = 0
+            col = display_width(line[:start]) + 1
+            out.append(f"\x1b[{row + 1};{col}H{line[start:]}\x1b[K")
+        for row in range(len(lines), len(self._lines)):
+            out.append(f"\x1b[{row + 1};1H\x1b[K")
+        self._lines = list(lines)
+        self.frames += 1
+        if out:
+            self.bytes_written += self._write("".join(out))
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes_written,
+            "bytes_per_frame": self.bytes_written / self.frames if self.frames else 0.0,
+        }
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.stream.flush()
+        return len(data.encode("utf-8"))
+
+
+def input_entero(prompt, minimo=None, maximo=None, invalid_msg=None, min_msg=None, max_msg=None, salida=None):
+    """Ask until an int in range is typed; ``salida`` takes the prompt and messages."""
+    decir = print if salida is None else (lambda mensaje: print(mensaje, file=salida))
     while True:
         try:
-            valor_str = input(prompt)
+            if salida is None:
+                valor_str = input(prompt)
+            else:
+                salida.write(prompt)
+                salida.flush()
+                valor_str = input()
             valor = int(valor_str)
             if minimo is not None and valor < minimo:
                 if min_msg:
-                    print(min_msg)
+                    decir(min_msg)
                 continue
             if maximo is not None and valor > maximo:
                 if max_msg:
-                    print(max_msg)
+                    decir(max_msg)
                 continue
             return valor
         except ValueError:
             if invalid_msg:
-                print(invalid_msg)
+                decir(invalid_msg)
+
+
+# fzf lookups by PATH value; the menu loop asks on every redraw
+_fzf_probe = {}
 
 
 def fzf_available():
-    return shutil.which("fzf") is not None
+    """Whether fzf is on PATH, looked up once per PATH value."""
+    path = os.environ.get("PATH", "")
+    if path not in _fzf_probe:
+        try:
+            _fzf_probe[path] = shutil.which("fzf") is not None
+        except Exception:
+            _fzf_probe[path] = False
+    return _fzf_probe[path]
 
 
 def fzf_select(options, prompt):
@@ -52,3 +153,183 @@ def fzf_select(options, prompt):
     return None
 
 
+def _plegar(text):
+    """Lowercase ``text`` and drop accents, so "espanol" finds "Español"."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def fuzzy_score(query, text):
+    """Score ``query`` as a subsequence of ``text``; None when it is not one.
+
+    Runs of consecutive letters and letters that start a word score higher.
+    """
+    if not query:
+        return 0
+    texto = _plegar(text)
+    score = 0
+    pos = -1
+    for ch in _plegar(query):
+        nuevo = texto.find(ch, pos + 1)
+        if nuevo < 0:
+            return None
+        score += 1
+        if nuevo == pos + 1:
+            score += 2
+        if nuevo == 0 or not texto[nuevo - 1].isalnum():
+            score += 2
+        pos = nuevo
+    return score
+
+
+def parse_keys(text):
+    """Split terminal input into key names and printable characters."""
+    claves = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\x1b":
+            if text[i + 1:i + 2] in ("[", "O") and i + 2 < len(text):
+                fin = i + 2
+                while fin < len(text) and not (text[fin].isalpha() or text[fin] == "~"):
+                    fin += 1
+                final = text[fin:fin + 1]
+                # Other arrows and function keys are read whole and ignored
+                if final == "A":
+                    claves.append("up")
+                elif final == "B":
+                    claves.append("down")
+                i = fin + 1
+            else:
+                claves.append("esc")
+                i += 1
+            continue
+        if ch in ("\r", "\n"):
+            claves.append("enter")
+        elif ch in ("\x7f", "\x08"):
+            claves.append("backspace")
+        elif ch in ("\x10", "\x0b"):
+            claves.append("up")
+        elif ch in ("\x0e", "\t"):
+            claves.append("down")
+        elif ch in ("\x03", "\x04"):
+            claves.append("esc")
+        elif ch == "\x15":
+            claves.append("clear")
+        elif ch.isprintable():
+            claves.append(ch)
+        i += 1
+    return claves
+
+
+class Selector:
+    """Menu state for ``menu_select``: fuzzy query, matches and cursor.
+
+    Typing filters the options incrementally: a longer query only rescans
+    the options the shorter one matched. With an empty query a hotkey
+    picks its option on one keypress; by default an option labelled
+    ``"1) Play"`` answers to ``1``. No terminal I/O happens here.
+    """
+
+    MARK = "\x1b[7m"
+    RESET = "\x1b[0m"
+
+    def __init__(self, options, prompt="", hotkeys=None):
+        self.options = list(options)
+        self.prompt = prompt
+        if hotkeys is None:
+            hotkeys = [o[0] if len(o) > 1 and o[1] == ")" else None for o in self.options]
+        self.hotkeys = {k: o for k, o in zip(hotkeys, self.options) if k}
+        self.query = ""
+        self.matches = list(range(len(self.options)))
+        self.cursor = 0
+        self.result = None
+
+    def _filtrar(self, candidatos):
+        puntuados = []
+        for i in candidatos:
+            score = fuzzy_score(self.query, self.options[i])
+            if score is not None:
+                puntuados.append((-score, i))
+        puntuados.sort()
+        self.matches = [i for _, i in puntuados]
+        self.cursor = 0
+
+    def handle(self, key):
+        """Apply one key; True once an option is chosen or the menu cancelled."""
+        if key == "enter":
+            if not self.matches:
+                return False
+            self.result = self.options[self.matches[self.cursor]]
+            return True
+        if key == "esc":
+            self.result = None
+            return True
+        if key == "up":
+            self.cursor = max(0, self.cursor - 1)
+        elif key == "down":
+            self.cursor = min(len(self.matches) - 1, self.cursor + 1) if self.matches else 0
+        elif key == "backspace":
+            if self.query:
+                self.query = self.query[:-1]
+                self._filtrar(range(len(self.options)))
+        elif key == "clear":
+            self.query = ""
+            self._filtrar(range(len(self.options)))
+        elif len(key) == 1:
+            if not self.query and key in self.hotkeys:
+                self.result = self.hotkeys[key]
+                return True
+            self.query += key
+            self._filtrar(self.matches)
+        return False
+
+    def lines(self):
+        lineas = [f"{self.prompt} > {self.query}"]
+        for fila, i in enumerate(self.matches):
+            if fila == self.cursor:
+                lineas.append(f"{self.MARK}> {self.options[i]}{self.RESET}")
+            else:
+                lineas.append(f"  {self.options[i]}")
+        return lineas
+
+
+def menu_available():
+    """Whether ``menu_select`` can drive this terminal (stdin/stdout are ttys)."""
+    try:
+        return termios is not None and sys.stdin.isatty() and sys.stdout.isatty()
+    except Exception:
+        return False
+
+
+def menu_select(options, prompt, hotkeys=None, fd=None, renderer=None):
+    """Return the option picked in an in-process menu, or None if canceled.
+
+    Puts the terminal in cbreak mode and redraws through ``FrameRenderer``
+    after each read, so a keypress costs one diffed write and no process
+    is ever spawned. ``hotkeys`` lists one key per option (see
+    ``Selector``).
+    """
+    if not options:
+        return None
+    fd = sys.stdin.fileno() if fd is None else fd
+    selector = Selector(options, prompt, hotkeys)
+    renderer = renderer if renderer is not None else FrameRenderer()
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    anterior = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        with renderer:
+            renderer.draw(selector.lines())
+            while True:
+                data = os.read(fd, 64)
+                if not data:
+                    return None
+                for key in parse_keys(decoder.decode(data)):
+                    if selector.handle(key):
+                        return selector.result
+                renderer.draw(selector.lines())
+    except (KeyboardInterrupt, OSError):
+        return None
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, anterior)
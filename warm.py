@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import array
+import struct
+import signal
+import socket
+
+# Same directory as config.CONFIG_DIR; the client must not import config
+SOCKET_PATH = os.path.expanduser("~/.config/hipodromo/daemon.sock")
+_STATUS = struct.Struct("!i")
+MAX_REQUEST = 64 * 1024
+# A client sends its request right after connecting; one that stalls is dropped
+REQUEST_TIMEOUT = 2.0
+
+
+def _send_request(sock, request, fds):
+    body = json.dumps(request, separators=(",", ":")).encode("utf-8")
+    data = _STATUS.pack(len(body)) + body
+    ancdata = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))] if fds else []
+    sent = sock.sendmsg([data], ancdata)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def _recv_request(sock):
+    """Read one request and the file descriptors sent with it."""
+    fds = array.array("i")
+    msg, ancdata, _, _ = sock.recvmsg(MAX_REQUEST, socket.CMSG_LEN(3 * fds.itemsize))
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % fds.itemsize)])
+    size = _STATUS.unpack_from(msg)[0]
+    msg = msg[_STATUS.size:]
+    while len(msg) < size:
+        chunk = sock.recv(size - len(msg))
+        if not chunk:
+            break
+        msg += chunk
+    return json.loads(msg.decode("utf-8")), list(fds)
+
+
+def _recv_int(sock):
+    data = b""
+    while len(data) < _STATUS.size:
+        chunk = sock.recv(_STATUS.size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return _STATUS.unpack(data)[0]
+
+
+def client_main(argv=None, path=None):
+    """Run ``hipodromo`` in the warm daemon, on this terminal.
+
+    Sends argv, the working directory, the environment and stdin/stdout/
+    stderr over the Unix socket; the daemon forks a child that plays on
+    those descriptors. Signals are forwarded to the child and its exit
+    status becomes ours. Without a daemon the game runs here, cold.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or SOCKET_PATH)
+    except OSError:
+        sock.close()
+        import Hipodromo
+        sys.argv = ["hipodromo"] + list(argv)
+        return Hipodromo.main()
+
+    request = {"argv": list(argv), "cwd": os.getcwd(), "env": dict(os.environ)}
+    with sock:
+        _send_request(sock, request, [0, 1, 2])
+        pid = _recv_int(sock)
+        if pid is None:
+            sys.exit(1)
+
+        def forward(signum, frame):
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+
+        if pid > 0:
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
+                signal.signal(signum, forward)
+        status = _recv_int(sock)
+    sys.exit(1 if status is None else status)
+
+
+def _run_child(conn, request, fds):
+    """In the forked child: adopt the client's terminal and run the game."""
+    code = 0
+    try:
+        for target, fd in enumerate(fds[:3]):
+            os.dup2(fd, target)
+        for fd in fds:
+            os.close(fd)
+        os.chdir(request.get("cwd") or "/")
+        os.environ.clear()
+        os.environ.update(request.get("env") or {})
+        for signum in (signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        conn.sendall(_STATUS.pack(os.getpid()))
+
+        import Hipodromo
+        sys.argv = ["hipodromo"] + list(request.get("argv") or [])
+        try:
+            Hipodromo.main()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except KeyboardInterrupt:
+            code = 130
+    except Exception:
+        code = 1
+    try:
+        import atexit
+        # Config flushes and history closes run here, before the status goes out
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except Exception:
+        pass
+    try:
+        conn.sendall(_STATUS.pack(code))
+    except OSError:
+        pass
+    os._exit(code)
+
+
+def _preload():
+    """Import and load everything a run would, once, before any fork."""
+    import argparse  # noqa: F401
+    import shutil  # noqa: F401
+    import subprocess  # noqa: F401
+    import config
+    import Hipodromo  # noqa: F401
+    config.load_config()
+
+
+def serve(path=None):
+    """Run the warm daemon until SIGTERM/SIGINT or a client sends ``stop``."""
+    path = path or SOCKET_PATH
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        probe.close()
+        raise RuntimeError(f"daemon already running on {path}")
+    except OSError:
+        probe.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+    _preload()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(64)
+    # Children report their own status; the kernel reaps them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    def terminar(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminar)
+    try:
+        while True:
+            conn, _ = listener.accept()
+            try:
+                conn.settimeout(REQUEST_TIMEOUT)
+                request, fds = _recv_request(conn)
+                conn.settimeout(None)
+            except Exception:
+                conn.close()
+                continue
+            if request.get("stop"):
+                for fd in fds:
+                    os.close(fd)
+                conn.sendall(_STATUS.pack(0) + _STATUS.pack(0))
+                conn.close()
+                break
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                listener.close()
+                _run_child(conn, request, fds)
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def stop(path=None):
+    """Ask a running daemon to exit; False if none is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or SOCKET_PATH)
+    except OSError:
+        sock.close()
+        return False
+    with sock:
+        _send_request(sock, {"stop": True}, [])
+        _recv_int(sock)
+    return True
+
+
+if __name__ == "__main__":
+    client_main()